@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Compare memory and top-k agreement of compact embedding storage configurations
+against the float64 list-per-element layout snapshots used to hold.
+
+Vectors are synthetic, with variance decaying across dimensions the way
+Matryoshka-trained models (text-embedding-3) concentrate information in the
+leading dimensions. Queries are noisy copies of random elements.
+"""
+
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from look_it_from_here.core.embedding_store import EmbeddingStore, EmbeddingStorageConfig
+
+NUM_ELEMENTS = 2000
+DIMENSION = 3072
+NUM_QUERIES = 200
+TOP_K = 5
+
+
+def make_vectors(rng):
+    spectrum = 1.0 / np.sqrt(1.0 + np.arange(DIMENSION) / 32.0)
+    elements = rng.standard_normal((NUM_ELEMENTS, DIMENSION)) * spectrum
+    targets = rng.integers(0, NUM_ELEMENTS, NUM_QUERIES)
+    queries = elements[targets] + rng.standard_normal((NUM_QUERIES, DIMENSION)) * spectrum * 0.8
+    return elements, queries
+
+
+def list_layout_bytes(vectors):
+    """Approximate size of a Dict[str, List[float]] holding the vectors."""
+    per_list = sys.getsizeof([0.0] * DIMENSION) + DIMENSION * sys.getsizeof(1.0)
+    return per_list * len(vectors)
+
+
+def top_k_rows(scores, k):
+    return set(np.argsort(-scores)[:k].tolist())
+
+
+def recall_at_k(store, queries, reference, rescore):
+    hits = 0
+    for query, expected in zip(queries, reference):
+        scores = store.scores(query)
+        if rescore and store.has_full_precision:
+            shortlist = np.argsort(-scores)[:TOP_K * 4]
+            exact = store.exact_scores(query, shortlist)
+            found = set(shortlist[np.argsort(-exact)[:TOP_K]].tolist())
+        else:
+            found = top_k_rows(scores, TOP_K)
+        hits += len(found & expected)
+    return hits / (len(queries) * TOP_K)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    elements, queries = make_vectors(rng)
+    vectors = {str(i): elements[i].tolist() for i in range(NUM_ELEMENTS)}
+
+    normalized = elements / np.linalg.norm(elements, axis=1, keepdims=True)
+    reference = [top_k_rows(normalized @ (q / np.linalg.norm(q)), TOP_K) for q in queries]
+    baseline_bytes = list_layout_bytes(vectors)
+
+    configs = [
+        EmbeddingStorageConfig('float32'),
+        EmbeddingStorageConfig('float16'),
+        EmbeddingStorageConfig('int8'),
+        EmbeddingStorageConfig('float16', dimensions=1024),
+        EmbeddingStorageConfig('int8', dimensions=512),
+        EmbeddingStorageConfig('int8', dimensions=256),
+        EmbeddingStorageConfig('int8', dimensions=256, keep_full_precision=True),
+    ]
+
+    print(f"{NUM_ELEMENTS} elements x {DIMENSION} dims, list layout: {baseline_bytes / 1e6:.1f} MB")
+    print(f"{'config':<44} {'MB':>8} {'shrink':>8} {'recall@' + str(TOP_K):>10} {'ms/query':>9}")
+    for config in configs:
+        store = EmbeddingStore.from_vectors(vectors, config)
+        start = time.perf_counter()
+        recall = recall_at_k(store, queries, reference, rescore=True)
+        per_query = (time.perf_counter() - start) / NUM_QUERIES * 1000
+        label = f"{config.dtype} dims={config.dimensions} full={config.keep_full_precision}"
+        print(f"{label:<44} {store.nbytes() / 1e6:>8.2f} {baseline_bytes / store.nbytes():>7.1f}x {recall:>10.3f} {per_query:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Embedded text volume and retrieval quality of composed (hierarchical) embeddings.
+
+Every element of the Google.com semantic tree in notebooks/output.json is
+embedded with HashingEmbeddingProvider from its full reverse tree and by
+composition (HierarchicalEmbeddingConfig) under several weightings. For
+each configuration the benchmark reports the characters sent to the
+embedder, the mean cosine similarity of the composed vectors to the full
+ones, and, for the queries of benchmarks/local_embeddings.py, how many
+find the expected actionable element and how many pick the same element
+as the full embeddings. Text volume is also reported for the page
+repeated COPIES times, where shared regions pay off most.
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from look_it_from_here.core.semantic_node import SemanticElementNode
+from look_it_from_here.core.embeddings import Embedder
+from look_it_from_here.core.hashing_embeddings import HashingEmbeddingProvider
+from look_it_from_here.core.hierarchical_embeddings import HierarchicalEmbedder, HierarchicalEmbeddingConfig
+from look_it_from_here.core.transform.embedding_generation.pipeline import create_parent_mapping
+from look_it_from_here.core.transform.embedding_generation.reverse_tree_text import ReverseTreeWriter
+from local_embeddings import QUERIES, load_tree, elements, describe
+
+COPIES = 10
+CONFIGS = {
+    'local only': HierarchicalEmbeddingConfig(local_weight=1.0),
+    'local 0.7': HierarchicalEmbeddingConfig(local_weight=0.7),
+    'default (0.5)': HierarchicalEmbeddingConfig(),
+    'local 0.3': HierarchicalEmbeddingConfig(local_weight=0.3),
+    '0.5, 6 ancestors': HierarchicalEmbeddingConfig(max_ancestors=6, ancestor_decay=0.7)
+}
+
+
+def full_embeddings(nodes, parent_map, embedder):
+    writer = ReverseTreeWriter()
+    texts = [writer.write(node, parent_map) for node in nodes]
+    return np.asarray(embedder.create_embeddings(texts), dtype=np.float32), sum(len(text) for text in texts)
+
+
+def composed_embeddings(nodes, parent_map, embedder, config):
+    hierarchical = HierarchicalEmbedder(config)
+    vectors = hierarchical.embed(nodes, parent_map, embedder)
+    return np.stack([vectors[node.id] for node in nodes]), hierarchical.embedded_characters
+
+
+def unit(matrix):
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def top_matches(matrix, nodes, actionable, embedder):
+    queries = unit(np.asarray(embedder.create_embeddings(list(QUERIES)), dtype=np.float32))
+    scores = unit(matrix[actionable]) @ queries.T
+    return [describe(nodes[actionable[i]]) for i in np.argmax(scores, axis=0)]
+
+
+def main():
+    embedder = Embedder(HashingEmbeddingProvider())
+    tree = load_tree()
+    parent_map = create_parent_mapping(tree)
+    nodes = list(elements(tree))
+    actionable = [i for i, node in enumerate(nodes) if node.tag in ('a', 'button', 'input', 'textarea')
+                  or dict(node.attributes).get('role') == 'button']
+
+    full, full_characters = full_embeddings(nodes, parent_map, embedder)
+    full_found = top_matches(full, nodes, actionable, embedder)
+    full_hits = sum(expected in found for expected, found in zip(QUERIES.values(), full_found))
+    print(f"{len(nodes)} elements, {len(QUERIES)} queries")
+    print(f"{'full reverse trees':<18} {full_characters:>10} chars  {'':>12}  {full_hits:>2} hits")
+
+    for name, config in CONFIGS.items():
+        composed, characters = composed_embeddings(nodes, parent_map, embedder, config)
+        similarity = float(np.mean(np.sum(unit(full) * unit(composed), axis=1)))
+        found = top_matches(composed, nodes, actionable, embedder)
+        hits = sum(expected in match for expected, match in zip(QUERIES.values(), found))
+        agreement = sum(a == b for a, b in zip(found, full_found))
+        print(f"{name:<18} {characters:>10} chars  cosine {similarity:.2f}  {hits:>2} hits, "
+              f"{agreement}/{len(QUERIES)} same as full  ({full_characters / characters:.0f}x fewer chars)")
+
+    page = SemanticElementNode(tag='body', content=[load_tree() for _ in range(COPIES)])
+    page_parent_map = create_parent_mapping(page)
+    page_nodes = list(elements(page))
+    writer = ReverseTreeWriter()
+    page_full = sum(len(writer.write(node, page_parent_map)) for node in page_nodes)
+    _, page_composed = composed_embeddings(page_nodes, page_parent_map, embedder, HierarchicalEmbeddingConfig())
+    print(f"\npage x{COPIES}: {len(page_nodes)} elements, full {page_full} chars, "
+          f"composed {page_composed} chars ({page_full / page_composed:.0f}x fewer)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Work saved and results kept by region-first (hierarchical) element selection.
+
+A catalogue page is generated with a navigation bar and search form
+followed by CATEGORIES sections, each a list of ITEMS products with a link
+and an "add to cart" button. Every element is embedded from its reverse
+tree with HashingEmbeddingProvider. For queries naming one product's
+button, flat scoring ('embedding' mode) is compared with 'hierarchical'
+mode under several beam widths: nodes scored per query (regions and
+elements), time per query, how many queries find the expected button, and
+how many pick the same top element as flat scoring.
+"""
+
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from look_it_from_here.core.semantic_node import SemanticElementNode, SemanticTextNode
+from look_it_from_here.core.snapshot import WebSnapshot
+from look_it_from_here.core.element_selector import ElementSelector
+from look_it_from_here.core.embeddings import Embedder
+from look_it_from_here.core.hashing_embeddings import HashingEmbeddingProvider
+from look_it_from_here.core.transform.embedding_generation.pipeline import (
+    embed_semantic_elements, select_elements_to_embed
+)
+
+CATEGORIES = [
+    'laptops', 'phones', 'tablets', 'cameras', 'headphones', 'speakers', 'monitors', 'keyboards',
+    'printers', 'routers', 'watches', 'drones', 'consoles', 'projectors', 'microphones', 'chargers',
+    'blenders', 'kettles', 'toasters', 'vacuums', 'heaters', 'lamps', 'mirrors', 'rugs',
+    'tents', 'backpacks', 'bicycles', 'helmets', 'skates', 'kayaks', 'jackets', 'boots'
+]
+ITEMS = 20
+BRANDS = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Vandelay', 'Wonka', 'Stark', 'Wayne', 'Cyberdyne']
+NUM_QUERIES = 100
+MAX_CONTEXT_NODES = 40
+BEAM_WIDTHS = (1, 2, 3, 5)
+
+
+def element(tag, attributes=(), content=()):
+    return SemanticElementNode(tag=tag, attributes=list(attributes), content=list(content))
+
+
+def product_name(category, item):
+    return f"{BRANDS[item % len(BRANDS)]} {category} model {item}"
+
+
+def build_page():
+    """Catalogue page; returns the tree and, per (category, item), the id of its add-to-cart button."""
+    buttons = {}
+    nav = element('nav', [('aria-label', 'Departments')], [
+        element('a', [], [SemanticTextNode(text=category.title())]) for category in CATEGORIES
+    ])
+    search = element('form', [('role', 'search')], [
+        element('input', [('type', 'search'), ('placeholder', 'Search the store')]),
+        element('button', [], [SemanticTextNode(text='Search')])
+    ])
+    sections = []
+    for category in CATEGORIES:
+        items = []
+        for item in range(ITEMS):
+            button = element('button', [], [SemanticTextNode(text=f"Add {product_name(category, item)} to cart")])
+            buttons[(category, item)] = button.id
+            items.append(element('li', [], [
+                element('a', [], [SemanticTextNode(text=product_name(category, item))]),
+                element('span', [], [SemanticTextNode(text=f"${(item + 1) * 10}")]),
+                button
+            ]))
+        sections.append(element('section', [('aria-label', f"{category.title()} department")], [
+            element('h2', [], [SemanticTextNode(text=category.title())]),
+            element('ul', [], items)
+        ]))
+    footer = element('footer', [], [element('a', [], [SemanticTextNode(text='Privacy')])])
+    return element('body', [], [nav, search, *sections, footer]), buttons
+
+
+def run(selector, snapshot, queries, query_vectors, mode, beam_width=None):
+    found = []
+    nodes_scored = 0
+    start = time.perf_counter()
+    for query, vector in zip(queries, query_vectors):
+        results = selector.select_elements(
+            snapshot, query, top_k=1, threshold=0, mode=mode, query_embedding=vector, beam_width=beam_width
+        )
+        found.append(results[0][0] if results else None)
+        nodes_scored += selector.last_stats.nodes_scored
+    elapsed = (time.perf_counter() - start) / len(queries) * 1000
+    return found, nodes_scored / len(queries), elapsed
+
+
+def main():
+    embedder = Embedder(HashingEmbeddingProvider())
+    tree, buttons = build_page()
+    embeddings, _ = embed_semantic_elements(
+        select_elements_to_embed(tree, 'all'), tree, embedder, max_context_nodes=MAX_CONTEXT_NODES,
+        keep_reverse_trees=False
+    )
+    snapshot = WebSnapshot(None, tree, {}, {}, embeddings, embedder=embedder)
+    # Every element counts as selectable; results carry no WebElement
+    snapshot.semantic_id_to_webelement = {semantic_id: None for semantic_id in embeddings}
+
+    rng = np.random.default_rng(0)
+    targets = [(CATEGORIES[rng.integers(len(CATEGORIES))], int(rng.integers(ITEMS))) for _ in range(NUM_QUERIES)]
+    queries = [f"add the {product_name(category, item)} to my cart" for category, item in targets]
+    expected = [buttons[target] for target in targets]
+    # Queries are embedded up front, so timings measure search alone
+    query_vectors = embedder.create_embeddings(queries)
+    selector = ElementSelector(embedder)
+
+    regions = snapshot.region_index
+    print(f"{len(embeddings)} elements embedded, {len(regions)} regions, {NUM_QUERIES} queries")
+    print(f"{'mode':<22} {'nodes scored':>12} {'ms/query':>9} {'hits':>5} {'same as flat':>13}")
+    flat, flat_nodes, flat_ms = run(selector, snapshot, queries, query_vectors, 'embedding')
+    flat_hits = sum(a == b for a, b in zip(flat, expected))
+    print(f"{'flat':<22} {flat_nodes:>12.0f} {flat_ms:>9.2f} {flat_hits:>5} {'':>13}")
+    for beam_width in BEAM_WIDTHS:
+        found, nodes, ms = run(selector, snapshot, queries, query_vectors, 'hierarchical', beam_width)
+        hits = sum(a == b for a, b in zip(found, expected))
+        same = sum(a == b for a, b in zip(found, flat))
+        print(f"{'hierarchical, beam ' + str(beam_width):<22} {nodes:>12.0f} {ms:>9.2f} {hits:>5} {same:>13}")
+
+
+if __name__ == '__main__':
+    main()
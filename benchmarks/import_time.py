@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Cold import time of the package and what it drags in.
+
+Each import runs in a fresh interpreter (so nothing is cached in
+sys.modules) several times; the median is reported together with the heavy
+third-party modules loaded by that import.
+"""
+
+import sys
+import os
+import json
+import statistics
+import subprocess
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+RUNS = 7
+HEAVY_MODULES = ('numpy', 'playwright', 'dotenv', 'openai')
+
+STATEMENTS = {
+    'import look_it_from_here': 'import look_it_from_here',
+    'import ...core.transform': 'import look_it_from_here.core.transform',
+    'import ...core.embeddings': 'import look_it_from_here.core.embeddings',
+    'look_it_from_here.WebSnapshot': 'import look_it_from_here; look_it_from_here.WebSnapshot',
+    'look_it_from_here.PlaywrightPage': 'import look_it_from_here; look_it_from_here.PlaywrightPage',
+}
+
+PROBE = """
+import sys, time, json
+started = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - started
+print(json.dumps({{'seconds': seconds, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(statement):
+    code = PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+    env = dict(os.environ, PYTHONPATH=SRC)
+    samples = []
+    heavy = []
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append(result['seconds'])
+        heavy = result['heavy']
+    return statistics.median(samples), heavy
+
+
+def main():
+    print(f"Median of {RUNS} fresh interpreters")
+    print(f"{'statement':<36} {'ms':>8}  heavy modules loaded")
+    for name, statement in STATEMENTS.items():
+        try:
+            seconds, heavy = measure(statement)
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<36} {'failed':>8}  {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{name:<36} {seconds * 1000:>8.1f}  {', '.join(heavy) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Throughput and sanity check of HashingEmbeddingProvider on real reverse trees.
+
+Reverse trees are generated for every element of the Google.com snapshot in
+notebooks/output.json and embedded in batches of BATCH_SIZE (the page is
+repeated to fill them). A few natural language queries are then matched
+against the actionable elements to check the vectors carry meaning.
+"""
+
+import sys
+import os
+import json
+import time
+
+import numpy as np
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from look_it_from_here.core.semantic_node import SemanticElementNode, SemanticTextNode
+from look_it_from_here.core.hashing_embeddings import HashingEmbeddingProvider
+from look_it_from_here.core.transform.embedding_generation.pipeline import generate_reverse_tree, create_parent_mapping
+
+SNAPSHOT = os.path.join(os.path.dirname(__file__), '..', 'notebooks', 'output.json')
+BATCH_SIZE = 1000
+REPEATS = 3
+# Query -> text the best matching actionable element should contain
+QUERIES = {
+    'search by voice': 'Search by voice',
+    'search by image': 'Search by image',
+    'sign in': 'Sign in',
+    'i am feeling lucky': "I'm Feeling Lucky",
+    'settings': 'Settings',
+    'advertising': 'Advertising',
+    'business': 'Business',
+    'about': 'About',
+    'gmail': 'Gmail',
+    'images': 'Images',
+    'store': 'Store',
+    'privacy': 'Privacy',
+    'terms': 'Terms',
+    'how search works': 'How Search works'
+}
+
+
+def load_tree():
+    def convert(data):
+        if isinstance(data, str):
+            return SemanticTextNode(text=data)
+        attributes = [(key, value) for key, value in data.items() if key not in ('tag', 'content')]
+        return SemanticElementNode(
+            tag=data['tag'], attributes=attributes, content=[convert(child) for child in data.get('content', [])]
+        )
+
+    with open(SNAPSHOT) as f:
+        return convert(json.load(f))
+
+
+def elements(tree):
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.get_element_children())
+
+
+def describe(node):
+    attributes = ', '.join(f'{key}={value!r}' for key, value in node.attributes if key in ('aria-label', 'title', 'href'))
+    text = ' '.join(child.text.strip() for child in node.get_text_children())[:40]
+    return f'<{node.tag}> {attributes} {text}'.strip()
+
+
+def main():
+    tree = load_tree()
+    parent_map = create_parent_mapping(tree)
+    nodes = list(elements(tree))
+    texts = [generate_reverse_tree(node, tree, parent_map).to_text() for node in nodes]
+    characters = sum(len(text) for text in texts)
+    print(f"{len(texts)} reverse trees, {characters / len(texts):.0f} characters on average")
+
+    batch = (texts * (BATCH_SIZE // len(texts) + 1))[:BATCH_SIZE]
+    batch_characters = sum(len(text) for text in batch)
+    provider = HashingEmbeddingProvider()
+
+    provider.embed(batch)
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        provider.embed(batch)
+    seconds = (time.perf_counter() - start) / REPEATS
+    print(f"batches of {BATCH_SIZE}: {BATCH_SIZE / seconds:.0f} reverse trees/s "
+          f"({batch_characters / seconds / 1e6:.1f} MB/s)")
+
+    start = time.perf_counter()
+    for text in batch[:200]:
+        provider.create_embedding(text)
+    print(f"one at a time: {200 / (time.perf_counter() - start):.0f} reverse trees/s")
+
+    start = time.perf_counter()
+    HashingEmbeddingProvider().fit(batch)
+    print(f"fit on {BATCH_SIZE}: {time.perf_counter() - start:.3f}s")
+
+    matrix = provider.embed(texts)
+    print(f"deterministic: {np.array_equal(matrix, HashingEmbeddingProvider().embed(texts))}")
+
+    actionable = [i for i, node in enumerate(nodes) if node.tag in ('a', 'button', 'input', 'textarea')
+                  or dict(node.attributes).get('role') == 'button']
+    print()
+    hits = 0
+    for query, expected in QUERIES.items():
+        scores = matrix[actionable] @ provider.embed([query])[0]
+        found = describe(nodes[actionable[int(np.argmax(scores))]])
+        hits += expected in found
+        print(f"{'✅' if expected in found else '❌'} {query!r:>20} -> {found} ({scores.max():.2f})")
+    print(f"{hits}/{len(QUERIES)} queries matched")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Embedding throughput against a rate limited endpoint, with and without
+RateLimitedEmbeddingProvider.
+
+A local stand-in for the OpenAI embeddings endpoint simulates latency, a
+request and token budget per second and a cap on concurrent requests, and
+answers 429 with Retry-After and x-ratelimit-* headers when they are
+exceeded. Many threads (think pages of a pool) embed batches concurrently.
+The plain provider gives up on the first 429; the wrapper paces, adapts its
+concurrency and retries.
+
+Uses the openai package when installed, a minimal urllib client otherwise.
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from look_it_from_here.core.embeddings import (
+    EmbeddingProvider, OpenAIEmbeddingProvider, RateLimitError, TransientEmbeddingError,
+    parse_rate_limit_headers
+)
+from look_it_from_here.core.rate_limited_provider import RateLimitedEmbeddingProvider, estimate_tokens
+
+DIMENSION = 8
+REQUESTS_PER_SECOND = 40
+TOKENS_PER_SECOND = 20000
+MAX_CONCURRENT = 6
+LATENCY = 0.03
+NUM_CLIENTS = 16
+NUM_BATCHES = 120
+BATCH_SIZE = 32
+
+
+class StandInServer:
+    """OpenAI-compatible /v1/embeddings endpoint with simulated rate limits."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests_available = float(REQUESTS_PER_SECOND)
+        self.tokens_available = float(TOKENS_PER_SECOND)
+        self.updated = time.monotonic()
+        self.in_flight = 0
+        self.rejected = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                texts = body['input'] if isinstance(body['input'], list) else [body['input']]
+                server.handle(self, texts)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/v1'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def handle(self, handler, texts):
+        tokens = sum(estimate_tokens(text) for text in texts)
+        with self.lock:
+            now = time.monotonic()
+            elapsed, self.updated = now - self.updated, now
+            self.requests_available = min(REQUESTS_PER_SECOND, self.requests_available + elapsed * REQUESTS_PER_SECOND)
+            self.tokens_available = min(TOKENS_PER_SECOND, self.tokens_available + elapsed * TOKENS_PER_SECOND)
+            allowed = (
+                self.in_flight < MAX_CONCURRENT and self.requests_available >= 1 and self.tokens_available >= tokens
+            )
+            if allowed:
+                self.requests_available -= 1
+                self.tokens_available -= tokens
+                self.in_flight += 1
+            else:
+                self.rejected += 1
+            headers = {
+                'x-ratelimit-limit-requests': str(REQUESTS_PER_SECOND * 60),
+                'x-ratelimit-remaining-requests': str(int(self.requests_available * 60)),
+                'x-ratelimit-limit-tokens': str(TOKENS_PER_SECOND * 60),
+                'x-ratelimit-remaining-tokens': str(int(self.tokens_available * 60)),
+                'x-ratelimit-reset-requests': f'{1000 // REQUESTS_PER_SECOND}ms'
+            }
+
+        if not allowed:
+            self.respond(handler, 429, {'error': {'message': 'Rate limit reached', 'type': 'requests'}},
+                         dict(headers, **{'retry-after-ms': '100'}))
+            return
+
+        try:
+            time.sleep(LATENCY + 0.0005 * len(texts))
+            data = [
+                {'object': 'embedding', 'index': i, 'embedding': [float(len(text) % 7)] * DIMENSION}
+                for i, text in enumerate(texts)
+            ]
+            self.respond(handler, 200, {
+                'object': 'list', 'data': data, 'model': 'stand-in',
+                'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}
+            }, headers)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    @staticmethod
+    def respond(handler, status, payload, headers):
+        body = json.dumps(payload).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+class UrllibEmbeddingProvider(EmbeddingProvider):
+    """Minimal client of the embeddings endpoint for environments without the openai package."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.rate_limits = {}
+
+    def create_embedding(self, text):
+        return self.create_embeddings([text])[0]
+
+    def create_embeddings(self, texts):
+        request = urllib.request.Request(
+            f'{self.base_url}/embeddings',
+            data=json.dumps({'model': 'stand-in', 'input': texts}).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                self.rate_limits = parse_rate_limit_headers(response.headers)
+                payload = json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            retry_after = e.headers.get('retry-after-ms')
+            retry_after = float(retry_after) / 1000.0 if retry_after else None
+            if e.code == 429:
+                raise RateLimitError(f"Stand-in rate limit: {e}", retry_after)
+            if e.code >= 500:
+                raise TransientEmbeddingError(f"Stand-in unavailable: {e}", retry_after)
+            raise RuntimeError(f"Stand-in error: {e}")
+        return [item['embedding'] for item in sorted(payload['data'], key=lambda item: item['index'])]
+
+    def get_dimension(self):
+        return DIMENSION
+
+
+def make_provider(base_url):
+    try:
+        import openai  # noqa: F401
+    except ImportError:
+        return UrllibEmbeddingProvider(base_url)
+    return OpenAIEmbeddingProvider(api_key='stand-in', model='text-embedding-3-small', base_url=base_url, max_retries=0)
+
+
+def run(provider):
+    batches = [
+        [f'element {batch} {i} ' + 'x' * (i % 40) for i in range(BATCH_SIZE)]
+        for batch in range(NUM_BATCHES)
+    ]
+    failures = 0
+    embedded = 0
+
+    def embed(batch):
+        return provider.create_embeddings(batch)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=NUM_CLIENTS) as executor:
+        futures = [executor.submit(embed, batch) for batch in batches]
+        for future in futures:
+            try:
+                embedded += len(future.result())
+            except RuntimeError:
+                failures += 1
+    return embedded, failures, time.perf_counter() - started
+
+
+def main():
+    print(f"Endpoint: {REQUESTS_PER_SECOND} req/s, {TOKENS_PER_SECOND} tokens/s, "
+          f"{MAX_CONCURRENT} concurrent, {LATENCY * 1000:.0f} ms latency")
+    print(f"Workload: {NUM_BATCHES} batches of {BATCH_SIZE} texts from {NUM_CLIENTS} threads")
+    print()
+    print(f"{'provider':<22} {'embedded':>9} {'failed':>7} {'429s':>6} {'seconds':>8} {'texts/s':>8}")
+
+    for name in ('plain', 'rate limited'):
+        server = StandInServer()
+        provider = make_provider(server.url)
+        if name == 'rate limited':
+            provider = RateLimitedEmbeddingProvider(provider, base_backoff=0.05, seed=0)
+        embedded, failures, seconds = run(provider)
+        server.close()
+        print(f"{name:<22} {embedded:>9} {failures:>7} {server.rejected:>6} {seconds:>8.2f} {embedded / seconds:>8.0f}")
+
+        if isinstance(provider, RateLimitedEmbeddingProvider):
+            metrics = provider.metrics
+            print(f"  retries {metrics.retries}, mean latency {metrics.mean_latency * 1000:.0f} ms, "
+                  f"final concurrency limit {provider.concurrency_limit}, "
+                  f"{metrics.tokens_per_second:.0f} tokens/s")
+
+
+if __name__ == '__main__':
+    main()
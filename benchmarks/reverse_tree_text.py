@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Speed of building reverse-tree texts with and without intermediate trees.
+
+The Google.com semantic tree in notebooks/output.json is repeated COPIES
+times under one root, and the reverse-tree text of every element is built
+with generate_reverse_tree(...).to_text() (reverse tree, then dict, then
+json.dumps) and with ReverseTreeWriter, in the same format and in the
+compact one-line format. Throughput is reported in characters per second,
+with and without a cap on context nodes.
+"""
+
+import sys
+import os
+import json
+import time
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from look_it_from_here.core.semantic_node import SemanticElementNode, SemanticTextNode
+from look_it_from_here.core.transform.embedding_generation.pipeline import generate_reverse_tree, create_parent_mapping
+from look_it_from_here.core.transform.embedding_generation.reverse_tree_text import ReverseTreeWriter
+
+SNAPSHOT = os.path.join(os.path.dirname(__file__), '..', 'notebooks', 'output.json')
+COPIES = 10
+REPEATS = 3
+MAX_CONTEXT_NODES = (None, 50)
+
+
+def build_tree():
+    def convert(data):
+        if isinstance(data, str):
+            return SemanticTextNode(text=data)
+        attributes = [(key, value) for key, value in data.items() if key not in ('tag', 'content')]
+        return SemanticElementNode(
+            tag=data['tag'], attributes=attributes, content=[convert(child) for child in data.get('content', [])]
+        )
+
+    with open(SNAPSHOT) as f:
+        data = json.load(f)
+    return SemanticElementNode(tag='body', content=[convert(data) for _ in range(COPIES)])
+
+
+def elements_of(tree):
+    nodes = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(reversed(node.get_element_children()))
+    return nodes
+
+
+def timed(build_texts):
+    best = float('inf')
+    texts = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        texts = build_texts()
+        best = min(best, time.perf_counter() - start)
+    return texts, best
+
+
+def main():
+    tree = build_tree()
+    parent_map = create_parent_mapping(tree)
+    nodes = elements_of(tree)
+    writer = ReverseTreeWriter()
+    compact_writer = ReverseTreeWriter(indent=None)
+    print(f"{len(nodes)} elements")
+
+    for max_context_nodes in MAX_CONTEXT_NODES:
+        print(f"== max_context_nodes={max_context_nodes}")
+        paths = {
+            'to_text': lambda: [
+                generate_reverse_tree(node, tree, parent_map, max_context_nodes).to_text() for node in nodes
+            ],
+            'writer': lambda: [writer.write(node, parent_map, max_context_nodes) for node in nodes],
+            'writer, compact': lambda: [compact_writer.write(node, parent_map, max_context_nodes) for node in nodes]
+        }
+
+        baseline = None
+        for name, build_texts in paths.items():
+            texts, seconds = timed(build_texts)
+            characters = sum(len(text) for text in texts)
+            if baseline is None:
+                baseline = texts
+            note = ''
+            if name == 'writer':
+                note = ' (identical)' if texts == baseline else ' (DIFFERENT)'
+            print(f"  {name:<16} {characters / seconds / 1e6:>7.1f} M chars/s, "
+                  f"{characters / len(nodes):>8.0f} chars/element, {seconds * 1000:>7.0f} ms{note}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Memory and query throughput of worker processes serving one snapshot.
+
+A large snapshot (the Google.com semantic tree in notebooks/output.json
+repeated under one root, with a random vector per element) is either
+loaded privately by every worker (archive read into memory) or published
+once with SharedSnapshot and attached by every worker. Each worker reports
+its private resident memory (RssAnon, Linux only) and runs NUM_QUERIES
+selections.
+"""
+
+import sys
+import os
+import json
+import multiprocessing
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from look_it_from_here.core.semantic_node import SemanticElementNode, SemanticTextNode
+from look_it_from_here.core.snapshot import WebSnapshot
+from look_it_from_here.core.snapshot_archive import SharedSnapshot
+from look_it_from_here.core.embeddings import Embedder, EmbeddingProvider
+
+SNAPSHOT = os.path.join(os.path.dirname(__file__), '..', 'notebooks', 'output.json')
+COPIES = 150
+DIMENSION = 1536
+NUM_WORKERS = 4
+NUM_QUERIES = 200
+
+
+class RandomProvider(EmbeddingProvider):
+    """Deterministic random query vectors."""
+
+    def create_embedding(self, text):
+        return np.random.default_rng(zlib.crc32(text.encode('utf-8'))).standard_normal(DIMENSION).tolist()
+
+    def get_dimension(self):
+        return DIMENSION
+
+
+def build_snapshot():
+    def convert(data):
+        if isinstance(data, str):
+            return SemanticTextNode(text=data)
+        attributes = [(key, value) for key, value in data.items() if key not in ('tag', 'content')]
+        return SemanticElementNode(
+            tag=data['tag'], attributes=attributes, content=[convert(child) for child in data.get('content', [])]
+        )
+
+    with open(SNAPSHOT) as f:
+        data = json.load(f)
+    root = SemanticElementNode(tag='body', content=[convert(data) for _ in range(COPIES)])
+
+    ids = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        ids.append(node.id)
+        stack.extend(node.get_element_children())
+    vectors = np.random.default_rng(0).standard_normal((len(ids), DIMENSION)).astype(np.float32)
+    dom_id_to_semantic_id = {f'dom-{i}': semantic_id for i, semantic_id in enumerate(ids)}
+    return WebSnapshot(None, root, {}, dom_id_to_semantic_id, dict(zip(ids, vectors)), embedder=Embedder(RandomProvider()))
+
+
+def private_memory_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('RssAnon:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float('nan')
+
+
+def worker(mode, source, results):
+    before = private_memory_mb()
+    embedder = Embedder(RandomProvider())
+    handle = None
+    if mode == 'shared':
+        handle = SharedSnapshot.attach(source, embedder)
+        snapshot = handle.snapshot
+    else:
+        snapshot = WebSnapshot.load(source, embedder, mmap=False)
+
+    start = time.perf_counter()
+    for i in range(NUM_QUERIES):
+        snapshot.select_elements(f'query {i % 20}', top_k=5)
+    seconds = time.perf_counter() - start
+    results.put((private_memory_mb() - before, NUM_QUERIES / seconds))
+
+    del snapshot
+    if handle is not None:
+        handle.close()
+
+
+def run(mode, source):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(mode, source, results)) for _ in range(NUM_WORKERS)]
+    for process in processes:
+        process.start()
+    measurements = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    memory = np.mean([megabytes for megabytes, _ in measurements])
+    throughput = sum(rate for _, rate in measurements)
+    print(f"{mode:<8} {memory:>12.1f} {throughput:>12.0f}")
+
+
+def main():
+    snapshot = build_snapshot()
+    store = snapshot.semantic_id_to_embedding
+    print(f"{len(store)} elements, {store.nbytes() / 1e6:.1f} MB of vectors, {NUM_WORKERS} workers")
+    print(f"{'mode':<8} {'private MB':>12} {'queries/s':>12}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'snapshot.lifh')
+        snapshot.save(path)
+        run('private', path)
+
+    with SharedSnapshot.publish(snapshot) as shared:
+        run('shared', shared.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Save/load speed and size of binary snapshot archives.
+
+A large snapshot is built by repeating the Google.com semantic tree in
+notebooks/output.json under one root, with a random DIMENSION-dimensional
+vector per element. It is saved with float32 and int8 embeddings, reloaded
+with and without memory-mapping, and compared with pickling the same
+snapshot. Query time after a load includes faulting the mapped rows in.
+"""
+
+import sys
+import os
+import json
+import pickle
+import tempfile
+import time
+
+import numpy as np
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from look_it_from_here.core.semantic_node import SemanticElementNode, SemanticTextNode
+from look_it_from_here.core.snapshot import WebSnapshot
+from look_it_from_here.core.embeddings import Embedder, EmbeddingProvider
+from look_it_from_here.core.embedding_store import EmbeddingStorageConfig
+
+SNAPSHOT = os.path.join(os.path.dirname(__file__), '..', 'notebooks', 'output.json')
+COPIES = 150
+DIMENSION = 1536
+
+
+class FixedProvider(EmbeddingProvider):
+    """Returns the same query vector for every text."""
+
+    def __init__(self, vector):
+        self.vector = vector
+
+    def create_embedding(self, text):
+        return self.vector
+
+    def get_dimension(self):
+        return DIMENSION
+
+
+def build_snapshot(rng, embedder, storage):
+    def convert(data):
+        if isinstance(data, str):
+            return SemanticTextNode(text=data)
+        attributes = [(key, value) for key, value in data.items() if key not in ('tag', 'content')]
+        return SemanticElementNode(
+            tag=data['tag'], attributes=attributes, content=[convert(child) for child in data.get('content', [])]
+        )
+
+    with open(SNAPSHOT) as f:
+        data = json.load(f)
+    root = SemanticElementNode(tag='body', content=[convert(data) for _ in range(COPIES)])
+
+    ids = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        ids.append(node.id)
+        stack.extend(node.get_element_children())
+    vectors = rng.standard_normal((len(ids), DIMENSION)).astype(np.float32)
+
+    dom_id_to_semantic_id = {f'dom-{i}': semantic_id for i, semantic_id in enumerate(ids)}
+    return WebSnapshot(
+        None, root, {}, dom_id_to_semantic_id, dict(zip(ids, vectors)),
+        embedder=embedder, embedding_storage=storage
+    )
+
+
+def timed(function, repeats=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    rng = np.random.default_rng(0)
+    embedder = Embedder(FixedProvider(rng.standard_normal(DIMENSION).tolist()))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'snapshot.lifh')
+        for name, storage in (('float32', None), ('int8', EmbeddingStorageConfig('int8'))):
+            snapshot = build_snapshot(rng, embedder, storage)
+            elements = len(snapshot.semantic_id_to_embedding)
+            print(f"{name}: {elements} elements, {snapshot.semantic_id_to_embedding.nbytes() / 1e6:.1f} MB of vectors")
+
+            size, save_seconds = timed(lambda: snapshot.save(path))
+            pickled, pickle_seconds = timed(lambda: pickle.dumps(
+                (snapshot.semantic_tree, snapshot.dom_id_to_semantic_id, dict(snapshot.semantic_id_to_embedding.items()))
+            ))
+            print(f"  archive {size / 1e6:.1f} MB, save {save_seconds * 1000:.0f} ms "
+                  f"(pickle {len(pickled) / 1e6:.1f} MB, {pickle_seconds * 1000:.0f} ms)")
+
+            for mmap in (True, False):
+                loaded, load_seconds = timed(lambda: WebSnapshot.load(path, embedder, mmap=mmap))
+                start = time.perf_counter()
+                loaded.select_elements('query', top_k=5)
+                query_seconds = time.perf_counter() - start
+                print(f"  load {'mmap' if mmap else 'read'}: {load_seconds * 1000:.0f} ms, "
+                      f"first query {query_seconds * 1000:.1f} ms")
+
+            _, unpickle_seconds = timed(lambda: pickle.loads(pickled))
+            print(f"  unpickle: {unpickle_seconds * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
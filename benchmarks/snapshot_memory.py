@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Memory held by snapshots under each retention policy.
+
+The Google.com page in notebooks/output.json is repeated COPIES times under
+one <body> to make a large DOM tree, converted to a semantic tree and
+embedded in the background with the local hashing provider, as
+PlaywrightPage.start_snapshot does. The memory report of the finished
+snapshot is printed per policy, followed by the peak memory of
+create_embeddings_from_semantic_tree with and without returning reverse trees.
+"""
+
+import sys
+import os
+import asyncio
+import json
+import tracemalloc
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from look_it_from_here.core.dom_node import DOMElementNode, DOMTextNode
+from look_it_from_here.core.interfaces import WebElement
+from look_it_from_here.core.snapshot import WebSnapshot
+from look_it_from_here.core.retention import RetentionPolicy
+from look_it_from_here.core.transform import create_semantic_tree
+from look_it_from_here.core.transform.embedding_generation import (
+    create_embeddings_from_semantic_tree, prioritize_elements, select_elements_to_embed
+)
+from look_it_from_here.core.embeddings import Embedder
+from look_it_from_here.core.hashing_embeddings import HashingEmbeddingProvider
+
+SNAPSHOT = os.path.join(os.path.dirname(__file__), '..', 'notebooks', 'output.json')
+COPIES = 20
+POLICIES = {
+    'default': RetentionPolicy(),
+    'lean': RetentionPolicy.lean(),
+    'lean, no semantic tree': RetentionPolicy.lean(keep_semantic_tree=False)
+}
+
+
+class DetachedElement(WebElement):
+    """WebElement stand-in; snapshots only hold a reference to it."""
+
+    def __init__(self, tag):
+        self.tag = tag
+
+    async def click(self):
+        return False
+
+    async def fill(self, text):
+        return False
+
+    async def is_visible(self):
+        return True
+
+    async def get_attributes(self):
+        return {}
+
+    async def get_tag(self):
+        return self.tag
+
+    async def get_children(self):
+        return []
+
+
+def build_html_tree():
+    with open(SNAPSHOT) as f:
+        data = json.load(f)
+    elements = {}
+
+    def convert(node):
+        if isinstance(node, str):
+            return DOMTextNode(node)
+        attributes = {key: value for key, value in node.items() if key not in ('tag', 'content')}
+        element = DOMElementNode(node['tag'], attributes, [convert(child) for child in node.get('content', [])])
+        elements[element.id] = DetachedElement(element.tag)
+        return element
+
+    root = DOMElementNode('body', {}, [convert(data) for _ in range(COPIES)])
+    elements[root.id] = DetachedElement('body')
+    return root, elements
+
+
+async def snapshot_with(policy, embedder):
+    html_tree, elements = build_html_tree()
+    semantic_tree, mapping = create_semantic_tree(html_tree)
+    snapshot = WebSnapshot(html_tree, semantic_tree, elements, mapping, embedder=embedder, retention=policy)
+    snapshot.start_background_embedding(prioritize_elements(select_elements_to_embed(semantic_tree, 'all')))
+    await snapshot.wait_for_embeddings()
+    return snapshot
+
+
+def main():
+    embedder = Embedder(HashingEmbeddingProvider())
+
+    for name, policy in POLICIES.items():
+        snapshot = asyncio.run(snapshot_with(policy, embedder))
+        print(f"== {name}: {len(snapshot.semantic_id_to_embedding)} elements embedded")
+        print(snapshot.memory_report())
+        print()
+
+    html_tree, _ = build_html_tree()
+    semantic_tree, _ = create_semantic_tree(html_tree)
+    for keep_reverse_trees in (True, False):
+        tracemalloc.start()
+        create_embeddings_from_semantic_tree(semantic_tree, embedder, keep_reverse_trees=keep_reverse_trees)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"create_embeddings_from_semantic_tree(keep_reverse_trees={keep_reverse_trees}): "
+              f"peak {peak / 2 ** 20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
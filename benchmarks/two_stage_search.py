@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Speed/recall trade-off of two-stage (coarse-to-fine) element selection.
+
+Each configuration runs the same queries through ElementSelector and is
+compared with exhaustive full-dimension scoring: recall@k is the fraction
+of the exhaustive top-k that the two-stage search also returns.
+"""
+
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add src to path so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from look_it_from_here.core.element_selector import ElementSelector
+from look_it_from_here.core.embedding_store import EmbeddingStore, EmbeddingStorageConfig
+from look_it_from_here.core.embeddings import Embedder, EmbeddingProvider
+
+NUM_ELEMENTS = 20000
+DIMENSION = 3072
+NUM_QUERIES = 100
+TOP_K = 5
+
+
+class PrecomputedProvider(EmbeddingProvider):
+    """Serves precomputed query vectors so only search time is measured."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def create_embedding(self, text):
+        return self.vectors[int(text)]
+
+    def get_dimension(self):
+        return DIMENSION
+
+
+class BenchmarkSnapshot:
+    def __init__(self, store):
+        self.semantic_id_to_embedding = store
+        self.semantic_id_to_webelement = {semantic_id: None for semantic_id in store.ids}
+
+
+def make_vectors(rng):
+    spectrum = 1.0 / np.sqrt(1.0 + np.arange(DIMENSION) / 32.0)
+    elements = rng.standard_normal((NUM_ELEMENTS, DIMENSION)).astype(np.float32) * spectrum
+    targets = rng.integers(0, NUM_ELEMENTS, NUM_QUERIES)
+    queries = elements[targets] + rng.standard_normal((NUM_QUERIES, DIMENSION)).astype(np.float32) * spectrum * 0.8
+    return elements, queries
+
+
+def run(selector, snapshot, shortlist_size=None):
+    results = []
+    coarse = exact = 0.0
+    start = time.perf_counter()
+    for i in range(NUM_QUERIES):
+        found = selector.select_elements(snapshot, str(i), top_k=TOP_K, threshold=0, shortlist_size=shortlist_size)
+        results.append({semantic_id for semantic_id, _, _ in found})
+        coarse += selector.last_stats.coarse_seconds
+        exact += selector.last_stats.exact_seconds
+    elapsed = (time.perf_counter() - start) / NUM_QUERIES * 1000
+    return results, elapsed, coarse / NUM_QUERIES * 1000, exact / NUM_QUERIES * 1000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    elements, queries = make_vectors(rng)
+    vectors = {str(i): elements[i] for i in range(NUM_ELEMENTS)}
+    embedder = Embedder(PrecomputedProvider(queries))
+
+    exact_snapshot = BenchmarkSnapshot(EmbeddingStore.from_vectors(vectors))
+    reference, baseline_ms, _, _ = run(ElementSelector(embedder), exact_snapshot)
+
+    int8_snapshot = BenchmarkSnapshot(EmbeddingStore.from_vectors(
+        vectors, EmbeddingStorageConfig('int8', keep_full_precision=True)
+    ))
+
+    print(f"{NUM_ELEMENTS} elements x {DIMENSION} dims, exhaustive search: {baseline_ms:.2f} ms/query")
+    print(f"{'first pass':<22} {'shortlist':>9} {'ms/query':>9} {'coarse':>8} {'exact':>8} {'recall@' + str(TOP_K):>9}")
+    for label, snapshot, coarse_dimensions in [
+        ('prefix 128 dims', exact_snapshot, 128),
+        ('prefix 256 dims', exact_snapshot, 256),
+        ('prefix 512 dims', exact_snapshot, 512),
+        ('int8 full dims', int8_snapshot, None),
+    ]:
+        selector = ElementSelector(embedder, coarse_dimensions=coarse_dimensions)
+        # Warm up cached coarse views
+        run(selector, snapshot, 50)
+        for shortlist_size in (20, 50, 200, 1000):
+            results, ms, coarse_ms, exact_ms = run(selector, snapshot, shortlist_size)
+            recall = sum(len(a & b) for a, b in zip(results, reference)) / (NUM_QUERIES * TOP_K)
+            print(f"{label:<22} {shortlist_size:>9} {ms:>9.2f} {coarse_ms:>8.2f} {exact_ms:>8.2f} {recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
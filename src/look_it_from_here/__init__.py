@@ -1,17 +1,62 @@
 # Look It from Here: Reverse Tree Embeddings for Web Automation
+#
+# Exports are imported on first access so that `import look_it_from_here` (or
+# any of its submodules) does not pay for playwright, numpy or the OpenAI
+# client until they are actually used.
 
-from .core.transform import create_html_tree, create_semantic_tree
-from .adapter.playwright_implementation import PlaywrightPage, PlaywrightElement
-from .core.snapshot import WebSnapshot
-from .core.interfaces import WebPage, WebElement, Snapshot
-
-__all__ = [
-    'create_html_tree',
-    'create_semantic_tree',
-    'PlaywrightPage',
-    'PlaywrightElement',
-    'WebSnapshot',
-    'WebPage',
-    'WebElement',
-    'Snapshot'
-]
\ No newline at end of file
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .core.transform import create_html_tree, create_semantic_tree
+    from .adapter.playwright_implementation import PlaywrightPage, PlaywrightElement
+    from .adapter.playwright_pool import PlaywrightPagePool
+    from .core.snapshot import WebSnapshot
+    from .core.snapshot_archive import SharedSnapshot
+    from .core.interfaces import WebPage, WebElement, Snapshot
+    from .core.embedding_store import EmbeddingStore, EmbeddingStorageConfig
+    from .core.capture_region import CaptureRegion
+    from .core.retention import RetentionPolicy
+    from .core.hierarchical_embeddings import HierarchicalEmbeddingConfig
+    from .core.embedding_batcher import EmbeddingBatcher
+    from .core.hashing_embeddings import HashingEmbeddingProvider
+    from .core.embeddings import RateLimitError
+    from .core.rate_limited_provider import RateLimitedEmbeddingProvider
+
+# Exported name -> module defining it
+_EXPORTS = {
+    'create_html_tree': '.core.transform',
+    'create_semantic_tree': '.core.transform',
+    'PlaywrightPage': '.adapter.playwright_implementation',
+    'PlaywrightElement': '.adapter.playwright_implementation',
+    'PlaywrightPagePool': '.adapter.playwright_pool',
+    'WebSnapshot': '.core.snapshot',
+    'SharedSnapshot': '.core.snapshot_archive',
+    'WebPage': '.core.interfaces',
+    'WebElement': '.core.interfaces',
+    'Snapshot': '.core.interfaces',
+    'EmbeddingStore': '.core.embedding_store',
+    'EmbeddingStorageConfig': '.core.embedding_store',
+    'CaptureRegion': '.core.capture_region',
+    'RetentionPolicy': '.core.retention',
+    'HierarchicalEmbeddingConfig': '.core.hierarchical_embeddings',
+    'EmbeddingBatcher': '.core.embedding_batcher',
+    'HashingEmbeddingProvider': '.core.hashing_embeddings',
+    'RateLimitError': '.core.embeddings',
+    'RateLimitedEmbeddingProvider': '.core.rate_limited_provider'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,320 @@
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+from playwright.async_api import ElementHandle, Frame, Page
+from ..core.dom_node import DOMElementNode, DOMTextNode
+from ..core.capture_region import RegionCapture
+from ..core.constants import EXCLUDED_TAGS, SEMANTIC_ATTRIBUTES
+from ..core.budget import (
+    SnapshotBudget, SKIP_HIDDEN_SUBTREES, CAP_DEPTH, STOP_CAPTURE,
+    SKIP_HIDDEN_SUBTREES_BELOW, CAP_DEPTH_BELOW, DEGRADED_MAX_DEPTH
+)
+
+
+# Walks the composed tree below an element in a single evaluation.
+# Open shadow roots are entered and flattened through their slots; iframes
+# are left as placeholders and captured through their own Frame.
+# Visibility and geometry are computed on the way, from one bounding rect and
+# one computed style per element: `box` is [x, y, width, height] in viewport
+# coordinates and `inView` whether any of it survives clipping by the viewport
+# and by ancestors that clip their overflow.
+# With pruning options, excluded tags, subtrees without anything visible and
+# attributes outside the allowed set are dropped before anything is returned.
+CAPTURE_SCRIPT = """
+(root, options) => {
+    const elements = [];
+    const frames = [];
+    let skipped = 0;
+    let cappedDepth = false;
+    let skippedHidden = false;
+
+    const intersect = (a, b) => {
+        const x = Math.max(a.x, b.x);
+        const y = Math.max(a.y, b.y);
+        const right = Math.min(a.x + a.width, b.x + b.width);
+        const bottom = Math.min(a.y + a.height, b.y + b.height);
+        return {x, y, width: Math.max(0, right - x), height: Math.max(0, bottom - y)};
+    };
+
+    const inRegion = (box) => {
+        const rect = options.rect;
+        if (!rect || (box.width === 0 && box.height === 0)) {
+            return true;
+        }
+        return box.x < rect.x + rect.width && rect.x < box.x + box.width &&
+            box.y < rect.y + rect.height && rect.y < box.y + box.height;
+    };
+
+    const renderedChildren = (el) => {
+        const source = el.shadowRoot ? el.shadowRoot.childNodes : el.childNodes;
+        const result = [];
+        for (const node of source) {
+            if (node.nodeType === Node.ELEMENT_NODE && node.tagName === 'SLOT') {
+                // A slot renders its assigned light DOM nodes, or its fallback content
+                result.push(...node.assignedNodes({flatten: true}));
+            } else {
+                result.push(node);
+            }
+        }
+        return result;
+    };
+
+    const excludedTags = new Set(options.excludedTags || []);
+    const keptAttributes = options.attributes ? new Set(options.attributes) : null;
+
+    const visit = (el, box, clip, depth) => {
+        const attributes = {};
+        for (const attr of el.attributes) {
+            if (keptAttributes && (!keptAttributes.has(attr.name) || !attr.value.trim())) {
+                continue;
+            }
+            attributes[attr.name] = attr.value;
+        }
+        const style = getComputedStyle(el);
+        const shown = style.visibility !== 'hidden' && style.visibility !== 'collapse';
+        const visibleBox = intersect(box, clip);
+        const node = {
+            index: elements.length,
+            tag: el.tagName.toLowerCase(),
+            attributes,
+            visible: shown && box.width > 0 && box.height > 0,
+            box: [Math.round(box.x), Math.round(box.y), Math.round(box.width), Math.round(box.height)],
+            inView: visibleBox.width > 0 && visibleBox.height > 0,
+            children: []
+        };
+        elements.push(el);
+
+        if (node.tag === 'iframe' || node.tag === 'frame') {
+            node.frame = frames.length;
+            frames.push(el);
+            return node;
+        }
+        if (options.skipHiddenSubtrees && !node.visible && style.display !== 'contents') {
+            skippedHidden = true;
+            return node;
+        }
+        if (options.maxDepth !== null && depth >= options.maxDepth) {
+            cappedDepth = true;
+            return node;
+        }
+
+        // Descendants are cut off where this element clips its overflow
+        const clipsOverflow = style.overflowX !== 'visible' || style.overflowY !== 'visible';
+        const childClip = clipsOverflow && style.display !== 'contents' ? intersect(clip, box) : clip;
+
+        for (const child of renderedChildren(el)) {
+            if (child.nodeType === Node.TEXT_NODE) {
+                const text = child.textContent;
+                if (text && text.trim()) {
+                    node.children.push(text);
+                }
+            } else if (child.nodeType === Node.ELEMENT_NODE) {
+                if (excludedTags.has(child.tagName.toLowerCase())) {
+                    continue;
+                }
+                const childBox = child.getBoundingClientRect();
+                if (!inRegion(childBox)) {
+                    skipped++;
+                    continue;
+                }
+                const elementCount = elements.length;
+                const frameCount = frames.length;
+                const childNode = visit(child, childBox, childClip, depth + 1);
+                if (options.pruneHidden && !childNode.visible && childNode.children.length === 0) {
+                    // Same outcome as visibility propagation followed by hidden filtering:
+                    // children kept so far are text or subtrees with something visible
+                    elements.length = elementCount;
+                    frames.length = frameCount;
+                    continue;
+                }
+                node.children.push(childNode);
+            }
+        }
+
+        // display: contents generates no box of its own; it shows what its children show
+        if (shown && style.display === 'contents') {
+            node.visible = node.children.some(child => typeof child === 'string' || child.visible);
+            node.inView = node.children.some(child => typeof child !== 'string' && child.inView);
+        }
+        return node;
+    };
+
+    const viewport = {x: 0, y: 0, width: window.innerWidth, height: window.innerHeight};
+    const tree = visit(root, root.getBoundingClientRect(), viewport, 0);
+    return {info: {tree, skipped, cappedDepth, skippedHidden}, elements, frames};
+}
+"""
+
+
+async def capture_page_dom(
+    page: Page,
+    budget: Optional[SnapshotBudget] = None,
+    region: Optional[RegionCapture] = None,
+    prune: bool = True,
+    root: Optional[ElementHandle] = None
+) -> Optional[Tuple[DOMElementNode, Dict[str, ElementHandle]]]:
+    """
+    Capture the DOM of a page, its shadow roots and its frames in bulk.
+
+    Each frame is captured with one in-page evaluation and child frames are
+    captured concurrently, then stitched below their iframe elements. Elements
+    are addressed by ElementHandles, which stay valid inside shadow roots and
+    frames where index-based locators cannot reach.
+
+    Args:
+        page: Playwright page to capture
+        budget: Optional time budget; capture degrades as it runs out
+        region: Optional region to capture instead of the whole document
+        prune: Drop EXCLUDED_TAGS, subtrees with nothing visible and attributes
+            outside SEMANTIC_ATTRIBUTES in the browser, so they are never transferred.
+            The Python passes would discard them anyway.
+        root: Capture only the subtree below this element, e.g. an item appended
+            to a list. Its frame is found from the handle.
+
+    Returns:
+        Tuple of (tree_root, DOM node id -> ElementHandle), or None if there is no root element
+    """
+    budget = budget or SnapshotBudget()
+
+    frame = page.main_frame
+    offset = (0.0, 0.0)
+    if root is not None:
+        frame = await root.owner_frame()
+        if frame is None:
+            return None
+        offset = await _frame_offset(frame)
+    elif region and region.region.root_selector:
+        locator = page.locator(region.region.root_selector).first
+        if await locator.count() == 0:
+            return None
+        root = await locator.element_handle()
+
+    id_to_handle: Dict[str, ElementHandle] = {}
+    options = {
+        'rect': region.rect if region else None,
+        'skipHiddenSubtrees': budget.below(SKIP_HIDDEN_SUBTREES_BELOW),
+        'maxDepth': DEGRADED_MAX_DEPTH if budget.below(CAP_DEPTH_BELOW) else None,
+        'excludedTags': sorted(EXCLUDED_TAGS) if prune else None,
+        'attributes': sorted(SEMANTIC_ATTRIBUTES) if prune else None,
+        'pruneHidden': prune
+    }
+    tree = await _capture_frame(frame, root, options, budget, region, id_to_handle, offset)
+    if tree is None:
+        return None
+    return tree, id_to_handle
+
+
+async def _frame_offset(frame: Frame) -> Tuple[float, float]:
+    """Position of a frame's viewport in the top-level viewport."""
+    if frame.parent_frame is None:
+        return 0.0, 0.0
+    iframe = await frame.frame_element()
+    try:
+        # Relative to the main frame; the iframe's border and padding are not accounted for
+        box = await iframe.bounding_box()
+    finally:
+        await iframe.dispose()
+    return (box['x'], box['y']) if box else (0.0, 0.0)
+
+
+async def _capture_frame(
+    frame: Frame,
+    root: Optional[ElementHandle],
+    options: Dict[str, Any],
+    budget: SnapshotBudget,
+    region: Optional[RegionCapture],
+    id_to_handle: Dict[str, ElementHandle],
+    offset: Tuple[float, float] = (0.0, 0.0),
+    frame_in_viewport: bool = True
+) -> Optional[DOMElementNode]:
+    """
+    Capture one frame and, concurrently, the frames nested in it.
+
+    Geometry of nested frames is shifted by `offset`, the position of their
+    iframe element, so all bounds share the top-level viewport's coordinates.
+    """
+    if root is None:
+        root = await frame.query_selector('html')
+        if root is None:
+            return None
+
+    result = await root.evaluate_handle(CAPTURE_SCRIPT, options)
+    try:
+        info_handle, elements_handle, frames_handle = await asyncio.gather(
+            result.get_property('info'), result.get_property('elements'), result.get_property('frames')
+        )
+        info, element_handles, frame_handles = await asyncio.gather(
+            info_handle.json_value(), elements_handle.get_properties(), frames_handle.get_properties()
+        )
+        # The element handles are separate objects and outlive their arrays
+        await asyncio.gather(info_handle.dispose(), elements_handle.dispose(), frames_handle.dispose())
+    finally:
+        await result.dispose()
+
+    if region is not None:
+        region.skipped_elements += info['skipped']
+    if info['skippedHidden']:
+        budget.degrade(SKIP_HIDDEN_SUBTREES)
+    if info['cappedDepth']:
+        budget.degrade(CAP_DEPTH)
+
+    frame_nodes: List[Tuple[DOMElementNode, ElementHandle]] = []
+    offset_x, offset_y = offset
+
+    def build(data: Dict[str, Any]) -> DOMElementNode:
+        x, y, width, height = data['box']
+        node = DOMElementNode(
+            tag=data['tag'],
+            attributes=data['attributes'],
+            is_visible=data['visible'],
+            bounds=(x + offset_x, y + offset_y, width, height),
+            in_viewport=data['inView'] and frame_in_viewport
+        )
+        id_to_handle[node.id] = element_handles[str(data['index'])].as_element()
+
+        for child in data['children']:
+            if isinstance(child, str):
+                node.add_child(DOMTextNode(text=child))
+            else:
+                node.add_child(build(child))
+
+        if 'frame' in data:
+            frame_nodes.append((node, frame_handles[str(data['frame'])].as_element()))
+        return node
+
+    tree = build(info['tree'])
+
+    if frame_nodes:
+        if budget.expired():
+            budget.degrade(STOP_CAPTURE)
+        else:
+            # Frames are laid out in their own viewport, so the region rectangle does not apply
+            frame_options = dict(options, rect=None)
+            await asyncio.gather(*(
+                _capture_child_frame(node, handle, frame_options, budget, id_to_handle)
+                for node, handle in frame_nodes
+            ))
+    return tree
+
+
+async def _capture_child_frame(
+    iframe_node: DOMElementNode,
+    iframe_handle: ElementHandle,
+    options: Dict[str, Any],
+    budget: SnapshotBudget,
+    id_to_handle: Dict[str, ElementHandle]
+) -> None:
+    """Capture the document of an iframe and attach it below the iframe element."""
+    try:
+        child_frame = await iframe_handle.content_frame()
+        if child_frame is None:
+            return
+        # Approximate: the iframe's border and padding are not accounted for
+        x, y = iframe_node.bounds[0], iframe_node.bounds[1]
+        subtree = await _capture_frame(
+            child_frame, None, options, budget, None, id_to_handle, (x, y), bool(iframe_node.in_viewport)
+        )
+    except Exception:
+        # Frames can navigate or detach while being captured
+        return
+    if subtree is not None:
+        iframe_node.add_child(subtree)
@@ -1,13 +1,48 @@
-from typing import List, Optional, Dict, Union
-from playwright.async_api import Page, Locator
+from typing import AsyncIterator, Iterable, List, Optional, Dict, Union, Tuple
+import asyncio
+import weakref
+from playwright.async_api import Page, Locator, ElementHandle, Error as PlaywrightError
 from ..core.interfaces import WebElement, WebPage, Snapshot
-from ..core.snapshot import WebSnapshot
-from ..core.transform import create_html_tree, create_semantic_tree, create_embeddings_from_semantic_tree
+from ..core.snapshot import WebSnapshot, AppendStats, RegionSearchStats
+from ..core.transform import create_html_tree, create_semantic_tree
+from ..core.transform.dom_extraction import create_html_subtree
+from ..core.dom_node import DOMElementNode
+from ..core.semantic_node import SemanticElementNode
+from ..core.attribute_index import is_actionable_element
+from .playwright_capture import capture_page_dom
+from ..core.transform.embedding_generation import select_elements_to_embed, prioritize_elements
 from ..core.embeddings import Embedder
+from ..core.embedding_store import EmbeddingStorageConfig
+from ..core.retention import RetentionPolicy
+from ..core.string_table import StringTable
+from ..core.hierarchical_embeddings import HierarchicalEmbeddingConfig
+from ..core.lexical_index import LexicalIndex
+from ..core.constants import CAPTURE_KEY_ATTRIBUTE
+from ..core.capture_region import CaptureRegion, RegionCapture
+from ..core.budget import SnapshotBudget, EMBED_ACTIONABLE_ONLY, EMBED_ACTIONABLE_ONLY_BELOW
+
+
+# Gives an element a page-unique key attribute unless it already has one
+STAMP_KEY_SCRIPT = """
+(el, attr) => {
+    if (!el.hasAttribute(attr)) {
+        window.__lifhNextKey = (window.__lifhNextKey || 0) + 1;
+        el.setAttribute(attr, String(window.__lifhNextKey));
+    }
+    return el.getAttribute(attr);
+}
+"""
 
 
 class PlaywrightElement(WebElement):
-    def __init__(self, locator: Locator):
+    def __init__(self, locator: Union[Locator, ElementHandle]):
+        """
+        Wrap a Playwright element.
+
+        Args:
+            locator: Locator of the element, or an ElementHandle for elements
+                captured in bulk (these also reach into shadow roots and frames)
+        """
         self.locator = locator
 
     async def click(self) -> bool:
@@ -78,7 +113,12 @@ class PlaywrightElement(WebElement):
 
             # Build mixed list of WebElements and strings
             result = []
-            element_locators = self.locator.locator("xpath=./*")
+            if isinstance(self.locator, ElementHandle):
+                child_handles = await self._child_handles()
+                element_at = lambda index: PlaywrightElement(child_handles[index])
+            else:
+                element_locators = self.locator.locator("xpath=./*")
+                element_at = lambda index: PlaywrightElement(element_locators.nth(index))
 
             for child_info in children_info:
                 if child_info['type'] == 'text':
@@ -86,16 +126,110 @@ class PlaywrightElement(WebElement):
                 elif child_info['type'] == 'element':
                     index = child_info['index']
                     if index >= 0:
-                        result.append(PlaywrightElement(element_locators.nth(index)))
+                        result.append(element_at(index))
 
             return result
         except Exception:
             return []
 
+    async def get_bounding_box(self) -> Optional[Dict[str, float]]:
+        try:
+            return await self.locator.bounding_box()
+        except Exception:
+            return None
+
+    async def get_key(self) -> Optional[str]:
+        try:
+            return await self.locator.evaluate(f"el => ({STAMP_KEY_SCRIPT})(el, '{CAPTURE_KEY_ATTRIBUTE}')")
+        except Exception:
+            return None
+
+    async def get_keyed_children(self) -> Optional[List[Tuple[str, WebElement]]]:
+        """Stamp every element child with a key and return children addressed by key."""
+        try:
+            keys = await self.locator.evaluate(
+                f"el => [...el.children].map(child => ({STAMP_KEY_SCRIPT})(child, '{CAPTURE_KEY_ATTRIBUTE}'))"
+            )
+        except Exception:
+            return None
+
+        if isinstance(self.locator, ElementHandle):
+            try:
+                child_handles = await self._child_handles()
+            except Exception:
+                return None
+            return [(key, PlaywrightElement(handle)) for key, handle in zip(keys, child_handles)]
+
+        # Locating by key rather than by index survives insertions and recycling
+        return [
+            (key, PlaywrightElement(self.locator.locator(f':scope > [{CAPTURE_KEY_ATTRIBUTE}="{key}"]')))
+            for key in keys
+        ]
+
+    async def dispose(self) -> None:
+        """Release the ElementHandle behind the element; locators hold nothing in the browser."""
+        if isinstance(self.locator, ElementHandle):
+            try:
+                await self.locator.dispose()
+            except Exception:
+                pass
+
+    async def _child_handles(self) -> List[ElementHandle]:
+        """ElementHandles of the element children, in order (handle-based elements only)."""
+        children = await self.locator.evaluate_handle("el => [...el.children]")
+        try:
+            properties = await children.get_properties()
+        finally:
+            await children.dispose()
+        return [properties[str(index)].as_element() for index in range(len(properties))]
+
 
 class PlaywrightPage(WebPage):
-    def __init__(self, page: Page):
+    def __init__(
+        self,
+        page: Page,
+        embedding_storage: Optional[EmbeddingStorageConfig] = None,
+        embedding_policy: str = 'actionable',
+        prune_capture: bool = True,
+        embedder: Optional[Embedder] = None,
+        retention: Optional[RetentionPolicy] = None,
+        hierarchical_embeddings: Optional[HierarchicalEmbeddingConfig] = None
+    ):
+        """
+        Wrap a Playwright page.
+
+        Args:
+            page: Playwright page to automate
+            embedding_storage: How snapshot embeddings are stored (precision, truncation)
+            embedding_policy: Elements embedded when a snapshot is taken: 'actionable'
+                (the rest are embedded on demand by selection) or 'all'
+            prune_capture: Drop non-visual tags, hidden subtrees and non-semantic
+                attributes in the browser during capture. Disable to keep the full
+                DOM (e.g. every attribute) in `WebSnapshot.html_tree`.
+            embedder: Embedder for snapshots of this page, e.g. one shared by a pool
+                or EmbeddingBatcher.shared() to coalesce requests with other pages.
+                Created on first snapshot if None.
+            retention: What snapshots keep once built, e.g. RetentionPolicy.lean().
+                Incremental capture (append_snapshot) needs the default policy.
+            hierarchical_embeddings: Compose element vectors from short descriptions
+                and once-embedded ancestor regions instead of embedding a full
+                reverse tree per element. None embeds full reverse trees.
+        """
         self.page = page
+        self.embedding_storage = embedding_storage
+        self.embedding_policy = embedding_policy
+        self.prune_capture = prune_capture
+        self.embedder = embedder
+        self.retention = retention
+        self.hierarchical_embeddings = hierarchical_embeddings
+        # Snapshots taken on this page, closed by close_snapshots
+        self._snapshots: 'weakref.WeakSet[WebSnapshot]' = weakref.WeakSet()
+
+    async def close_snapshots(self) -> None:
+        """Close every snapshot taken on this page, releasing the element handles they hold."""
+        snapshots = list(self._snapshots)
+        self._snapshots.clear()
+        await asyncio.gather(*(snapshot.close() for snapshot in snapshots), return_exceptions=True)
 
     async def find(self, selector: str) -> Optional[WebElement]:
         try:
@@ -125,10 +259,89 @@ class PlaywrightPage(WebPage):
         except Exception:
             return None
 
-    async def get_snapshot(self) -> Snapshot:
-        """Create a snapshot of the current page state."""
-        # Build the trees
-        html_tree, element_mapping = await create_html_tree(self)
+    async def get_viewport(self) -> Optional[Dict[str, float]]:
+        try:
+            size = await self.page.evaluate("() => ({width: window.innerWidth, height: window.innerHeight})")
+            return {'x': 0.0, 'y': 0.0, 'width': size['width'], 'height': size['height']}
+        except Exception:
+            return None
+
+    async def capture_dom(
+        self,
+        budget: Optional[SnapshotBudget] = None,
+        region: Optional[RegionCapture] = None,
+        root: Optional[WebElement] = None
+    ) -> Optional[Tuple[DOMElementNode, Dict[str, WebElement]]]:
+        """
+        Capture the page (or the subtree below `root`), its open shadow roots
+        and its frames in one evaluation per frame.
+        """
+        if root is not None and not isinstance(root, PlaywrightElement):
+            return None
+        root_handle = None
+        try:
+            if root is not None:
+                root_handle = root.locator
+                if not isinstance(root_handle, ElementHandle):
+                    # Locator-based elements are resolved for the capture only
+                    root_handle = await root_handle.element_handle()
+            captured = await capture_page_dom(self.page, budget, region, self.prune_capture, root_handle)
+        except PlaywrightError as error:
+            # E.g. the frame navigated or detached during the evaluation
+            print(f"⚠️ Bulk DOM capture failed, walking elements one by one: {error}")
+            return None
+        finally:
+            if root_handle is not None and root_handle is not root.locator:
+                await asyncio.gather(root_handle.dispose(), return_exceptions=True)
+        if captured is None:
+            return None
+
+        tree, id_to_handle = captured
+        return tree, {dom_id: PlaywrightElement(handle) for dom_id, handle in id_to_handle.items()}
+
+    async def get_snapshot(
+        self,
+        budget: Optional[float] = None,
+        region: Optional[CaptureRegion] = None
+    ) -> Snapshot:
+        """
+        Create a snapshot of the current page state.
+
+        Args:
+            budget: Seconds the snapshot may take. When time runs low capture and
+                embedding degrade step by step; see `WebSnapshot.degradations`.
+            region: Capture only this part of the page (e.g. `CaptureRegion.for_viewport()`)
+        """
+        snapshot = await self.start_snapshot(budget, region)
+        await snapshot.wait_for_embeddings()
+        return snapshot
+
+    async def start_snapshot(
+        self,
+        budget: Optional[float] = None,
+        region: Optional[CaptureRegion] = None
+    ) -> WebSnapshot:
+        """
+        Create a snapshot that is usable as soon as the semantic tree exists.
+
+        Embeddings are generated in background batches, actionable elements
+        first. Lexical and filtered selection work immediately; embedding
+        selection searches what is ready, or waits via
+        `WebSnapshot.wait_for_embeddings` / `select_elements_async`.
+
+        Args:
+            budget: Seconds the snapshot may take, capture and embedding included
+            region: Capture only this part of the page
+        """
+        if self.embedder is None:
+            self.embedder = Embedder()
+
+        snapshot_budget = SnapshotBudget(budget)
+        region_capture = await RegionCapture.resolve(region, self) if region else None
+
+        # Build the trees, interning strings in a table the snapshot keeps for incremental capture
+        strings = StringTable()
+        html_tree, element_mapping = await create_html_tree(self, snapshot_budget, region_capture, strings)
 
         # Only create semantic tree if html_tree exists
         if html_tree:
@@ -136,11 +349,225 @@ class PlaywrightPage(WebPage):
         else:
             semantic_tree, node_mapping = None, {}
 
-        # Generate embeddings for semantic tree
-        semantic_to_embedding = None
+        # Index element text right away so lexical selection needs no embeddings
+        lexical_index = LexicalIndex.from_semantic_tree(semantic_tree) if semantic_tree else LexicalIndex()
+
+        snapshot = WebSnapshot(
+            html_tree, semantic_tree, element_mapping, node_mapping,
+            embedder=self.embedder, embedding_storage=self.embedding_storage, lexical_index=lexical_index,
+            retention=self.retention, strings=strings, hierarchical_embeddings=self.hierarchical_embeddings
+        )
+        snapshot.budget = snapshot_budget
+        self._snapshots.add(snapshot)
+        # Handles of elements the retention policy did not keep
+        await snapshot.release_dropped_elements()
+        if region_capture:
+            snapshot.region = region
+            snapshot.region_truncated = region_capture.truncated
+
+        # Generate embeddings for semantic tree in the background
         if semantic_tree:
-            embedder = Embedder()
-            semantic_to_embedding = create_embeddings_from_semantic_tree(semantic_tree, embedder)
+            policy = self.embedding_policy
+            if policy != 'actionable' and snapshot_budget.below(EMBED_ACTIONABLE_ONLY_BELOW):
+                policy = 'actionable'
+                snapshot_budget.degrade(EMBED_ACTIONABLE_ONLY)
+            nodes = prioritize_elements(select_elements_to_embed(semantic_tree, policy))
+            snapshot.start_background_embedding(nodes, budget=snapshot_budget)
+
+        return snapshot
+
+    async def stream_snapshot(
+        self,
+        budget: Optional[float] = None,
+        region: Optional[CaptureRegion] = None
+    ) -> AsyncIterator[WebSnapshot]:
+        """
+        Yield a snapshot as soon as it is usable, then again after each embedded batch.
+
+        The same WebSnapshot object is yielded every time, with more elements searchable.
+
+        Args:
+            budget: Seconds the snapshot may take, capture and embedding included
+            region: Capture only this part of the page
+        """
+        snapshot = await self.start_snapshot(budget, region)
+        async for update in snapshot.embedding_updates():
+            yield update
+
+    async def select_elements_in_region(
+        self,
+        query: str,
+        region: Optional[CaptureRegion] = None,
+        top_k: int = 5,
+        threshold: float = 0.5,
+        mode: str = 'embedding',
+        where: Optional[Dict[str, Union[str, bool]]] = None
+    ) -> Tuple[WebSnapshot, List[Tuple[str, WebElement, float]], RegionSearchStats]:
+        """
+        Select elements from a region-scoped snapshot, expanding the region lazily.
+
+        The region (the viewport by default) is captured and searched first. Only
+        when its best match scores below `threshold` and elements were left out is
+        the region grown, ending with the whole document. Each expansion merges
+        just the newly covered elements into the same snapshot and embeds them;
+        elements already captured keep their embeddings.
+
+        Args:
+            query: Natural language query
+            region: Region to start from (defaults to the viewport)
+            top_k: Maximum number of results to return
+            threshold: Minimum similarity score a match must reach
+            mode: Selection mode (see ElementSelector.select_elements)
+            where: Attribute filter (see ElementSelector.select_elements)
+
+        Returns:
+            Tuple of (snapshot searched last, list of (semantic_id, webelement, score),
+            RegionSearchStats of the expansions)
+        """
+        stats = RegionSearchStats()
+        snapshot = await self.get_snapshot(region=region or CaptureRegion.for_viewport())
+        while True:
+            results = await snapshot.select_elements_async(query, top_k, threshold, mode=mode, where=where)
+            if results or snapshot.region is None or not snapshot.region_truncated:
+                return snapshot, results, stats
+
+            next_region = snapshot.region.expanded(await self.get_viewport())
+            stats.expansions += 1
+            stats.whole_document = next_region is None
+            snapshot = await self._expand_snapshot(snapshot, next_region, stats)
+
+    async def _expand_snapshot(
+        self,
+        snapshot: WebSnapshot,
+        region: Optional[CaptureRegion],
+        stats: RegionSearchStats
+    ) -> WebSnapshot:
+        """Grow a region-scoped snapshot to a larger region (None for the whole document)."""
+        region_capture = await RegionCapture.resolve(region, self) if region else None
+        html_tree, element_mapping = await create_html_tree(self, None, region_capture, snapshot.strings)
+        if html_tree is None:
+            await _dispose_elements(element_mapping.values())
+            added, kept = [], 0
+        else:
+            try:
+                added, kept = snapshot.merge_capture(html_tree, element_mapping)
+            except ValueError:
+                # No DOM tree kept (lean retention) or the page changed: capture afresh
+                await _dispose_elements(element_mapping.values())
+                await snapshot.close()
+                return await self.get_snapshot(region=region)
+        await snapshot.release_dropped_elements()
+
+        snapshot.region = region
+        snapshot.region_truncated = region_capture.truncated if region_capture else False
+        stats.kept_elements += kept
+        stats.added_elements += len(added)
+        stats.embedded += await self._embed_added(snapshot, added)
+        return snapshot
+
+    async def append_snapshot(
+        self,
+        snapshot: WebSnapshot,
+        container_selector: str,
+        evict: bool = False
+    ) -> AppendStats:
+        """
+        Capture only the items newly inserted into a scrolling container and merge them into a snapshot.
+
+        Every element child of the container is an item. Items are stamped with
+        a key in the page, so items seen before are recognised without capturing
+        them again; new ones are captured, merged into the snapshot's trees,
+        indexes and id mappings, and embedded according to the embedding policy.
+        Existing elements keep their embeddings.
+
+        Args:
+            snapshot: Snapshot of this page to extend in place
+            container_selector: Selector of the container items are appended to
+            evict: Remove items that are no longer in the DOM (e.g. recycled by a
+                virtualized list), keeping snapshot memory bounded
+
+        Returns:
+            AppendStats with the number of added, kept and evicted items
+        """
+        container = await self.find(container_selector)
+        if container is None:
+            raise ValueError(f"Container '{container_selector}' not found")
+
+        keyed_children = await container.get_keyed_children()
+        if keyed_children is None:
+            raise RuntimeError("Page does not support incremental capture")
+
+        container_id = snapshot.containers.get(container_selector)
+        if container_id is None or container_id not in snapshot.container_items:
+            container_id = await self._adopt_container(snapshot, container, container_selector)
+        items = snapshot.container_items[container_id]
+
+        stats = AppendStats()
+        new_children = [(key, element) for key, element in keyed_children if key not in items]
+        stats.kept_items = len(keyed_children) - len(new_children)
+
+        # Capture new items concurrently, then merge them in page order
+        captures = await asyncio.gather(*(
+            create_html_subtree(element, strings=snapshot.strings, page=self) for _, element in new_children
+        ))
+        added = []
+        for (key, _), (html_subtree, element_mapping) in zip(new_children, captures):
+            if html_subtree is None:
+                # Not rendered yet; captured on a later append once visible
+                continue
+            semantic_subtree, node_mapping = create_semantic_tree(html_subtree)
+            added.extend(
+                snapshot.merge_subtree(container_id, html_subtree, element_mapping, semantic_subtree, node_mapping)
+            )
+            items[key] = html_subtree.id
+            stats.added_items += 1
+
+        if evict:
+            current_keys = {key for key, _ in keyed_children}
+            for key in [key for key in items if key not in current_keys]:
+                snapshot.remove_dom_subtree(items.pop(key))
+                stats.evicted_items += 1
+            await snapshot.release_dropped_elements()
+
+        stats.embedded = await self._embed_added(snapshot, added)
+
+        print(f"➕ Appended {stats.added_items} items, kept {stats.kept_items}, evicted {stats.evicted_items}")
+        return stats
+
+    async def _embed_added(self, snapshot: WebSnapshot, added: List[SemanticElementNode]) -> int:
+        """Embed merged elements as the initial snapshot would have; the rest stays on demand."""
+        nodes = [
+            node for node in added
+            if self.embedding_policy == 'all' or is_actionable_element(node.tag, node.attributes)
+        ]
+        return await snapshot.aensure_embeddings(node.id for node in prioritize_elements(nodes))
+
+    async def _adopt_container(self, snapshot: WebSnapshot, container: WebElement, container_selector: str) -> str:
+        """Find the container in the snapshot and key the items captured with it."""
+        tag, attributes = await asyncio.gather(container.get_tag(), container.get_attributes())
+        candidates = snapshot.find_dom_nodes(tag, attributes)
+        if len(candidates) > 1:
+            # Same tag and attributes: tell them apart by the key stamped on the live element
+            container_key = await container.get_key()
+            candidate_keys = await asyncio.gather(
+                *(snapshot.dom_id_to_webelement[node.id].get_key() for node in candidates)
+            )
+            candidates = [node for node, key in zip(candidates, candidate_keys) if key == container_key]
+        if not candidates:
+            raise ValueError(f"Container '{container_selector}' is not part of the snapshot")
+
+        container_node = candidates[0]
+        children = container_node.get_element_children()
+        child_keys = await asyncio.gather(
+            *(snapshot.dom_id_to_webelement[child.id].get_key() for child in children)
+        )
+        snapshot.containers[container_selector] = container_node.id
+        snapshot.container_items[container_node.id] = {
+            key: child.id for child, key in zip(children, child_keys) if key is not None
+        }
+        return container_node.id
+
 
-        # Create and return snapshot
-        return WebSnapshot(html_tree, semantic_tree, element_mapping, node_mapping, semantic_to_embedding)
\ No newline at end of file
+async def _dispose_elements(elements: Iterable[WebElement]) -> None:
+    """Dispose elements that never made it into a snapshot."""
+    await asyncio.gather(*(element.dispose() for element in elements), return_exceptions=True)
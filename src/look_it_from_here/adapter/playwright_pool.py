@@ -0,0 +1,327 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+from playwright.async_api import Browser, BrowserContext
+from .playwright_implementation import PlaywrightPage
+from ..core.snapshot import WebSnapshot
+from ..core.embeddings import Embedder, EmbeddingCache
+from ..core.embedding_batcher import EmbeddingBatcher
+from ..core.embedding_store import EmbeddingStorageConfig
+from ..core.retention import RetentionPolicy
+from ..core.hierarchical_embeddings import HierarchicalEmbeddingConfig
+
+
+T = TypeVar('T')
+
+
+class PlaywrightPagePool:
+    """
+    Bounded pool of browser pages shared by many concurrent automations.
+
+    Each page lives in its own browser context. Jobs (snapshots, actions, or
+    any coroutine taking a PlaywrightPage) are queued per client and served
+    round-robin across clients as pages free up, so one busy client cannot
+    starve the others. The number of queued jobs is bounded per client:
+    submitting more waits until that client's queue drains (backpressure),
+    while other clients keep queueing and taking turns.
+
+    Pages that crash or are closed by a job are replaced. When opening the
+    replacement fails, the pool carries on with fewer pages, counts the
+    failure in `replacement_failures`, and tries again when a job has to
+    wait; once no page is left, waiting jobs fail with RuntimeError.
+
+    Snapshots taken during a job are closed when its page is released, so
+    their element handles do not pile up in the browser.
+
+    All pages share one EmbeddingBatcher and one EmbeddingCache: embedding
+    requests of concurrent snapshots and queries are coalesced into large
+    provider batches, and identical elements across pages are embedded once.
+    """
+
+    def __init__(
+        self,
+        browser: Browser,
+        size: int = 4,
+        max_queued: int = 256,
+        embedder: Optional[Embedder] = None,
+        cache_size: int = 10000,
+        embedding_storage: Optional[EmbeddingStorageConfig] = None,
+        embedding_policy: str = 'actionable',
+        context_options: Optional[Dict[str, Any]] = None,
+        retention: Optional[RetentionPolicy] = None,
+        hierarchical_embeddings: Optional[HierarchicalEmbeddingConfig] = None
+    ):
+        """
+        Initialize pool. Pages are opened by `start` (or `async with`).
+
+        Args:
+            browser: Playwright browser to open contexts in
+            size: Number of pages (and contexts) in the pool
+            max_queued: Jobs one client may have waiting for a page before its
+                submitters are held back
+            embedder: Embedder shared by all pages. If None, an EmbeddingBatcher is
+                created with an EmbeddingCache of `cache_size` entries.
+            cache_size: Entries of the shared embedding cache
+            embedding_storage: How snapshot embeddings are stored (see PlaywrightPage)
+            embedding_policy: Elements embedded when a snapshot is taken (see PlaywrightPage)
+            context_options: Keyword arguments for browser.new_context
+            retention: What snapshots keep once built (see PlaywrightPage)
+            hierarchical_embeddings: Compose element vectors per region (see PlaywrightPage)
+        """
+        if size <= 0:
+            raise ValueError("Pool size must be positive")
+        if max_queued <= 0:
+            raise ValueError("max_queued must be positive")
+
+        self.browser = browser
+        self.size = size
+        self.embedder = embedder
+        self.cache_size = cache_size
+        self.embedding_storage = embedding_storage
+        self.embedding_policy = embedding_policy
+        self.context_options = context_options or {}
+        self.retention = retention
+        self.hierarchical_embeddings = hierarchical_embeddings
+        self.max_queued = max_queued
+
+        self._contexts: Dict[int, BrowserContext] = {}
+        self._idle: List[PlaywrightPage] = []
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+        self._rotation: Deque[str] = deque()
+        # Per client: queue slots, and the jobs holding or waiting for one
+        self._queue_slots: Dict[str, asyncio.Semaphore] = {}
+        self._queue_users: Dict[str, int] = {}
+        self._started = False
+        # Pages open (idle or in use); below `size` after a crashed page could not be replaced
+        self._live = 0
+        self.completed_jobs = 0
+        self.replacement_failures = 0
+        self.last_replacement_error: Optional[BaseException] = None
+
+    async def __aenter__(self) -> 'PlaywrightPagePool':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Open the pool's contexts and pages."""
+        if self._started:
+            return
+        if self.embedder is None:
+            self.embedder = EmbeddingBatcher(Embedder(cache=EmbeddingCache(self.cache_size)))
+
+        pages = await asyncio.gather(*(self._open_page() for _ in range(self.size)))
+        self._idle.extend(pages)
+        self._live = len(pages)
+        self._started = True
+        print(f"🌐 Page pool ready with {self.size} pages")
+
+    async def close(self) -> None:
+        """Close every context of the pool. Queued jobs fail with RuntimeError."""
+        self._started = False
+        self._live = 0
+        self._fail_waiters(RuntimeError("Page pool closed"))
+
+        contexts = list(self._contexts.values())
+        self._contexts.clear()
+        self._idle.clear()
+        await asyncio.gather(*(context.close() for context in contexts), return_exceptions=True)
+
+    async def run(self, job: Callable[[PlaywrightPage], Awaitable[T]], client: str = 'default') -> T:
+        """
+        Run a job on the next free page.
+
+        Args:
+            job: Coroutine function receiving the page to work on
+            client: Name used for fair queueing; jobs of different clients take turns
+
+        Returns:
+            Whatever the job returns
+        """
+        async with self.page(client) as page:
+            return await job(page)
+
+    async def snapshot(self, url: Optional[str] = None, client: str = 'default', **snapshot_options) -> WebSnapshot:
+        """
+        Take a snapshot on the next free page, navigating to `url` first if given.
+
+        Keyword arguments are passed to PlaywrightPage.get_snapshot (budget, region).
+        The snapshot is closed when the page goes back to the pool: it can be
+        searched, but to act on its elements take it inside `page()` instead.
+        """
+        async def take(page: PlaywrightPage) -> WebSnapshot:
+            if url is not None:
+                await page.page.goto(url)
+            return await page.get_snapshot(**snapshot_options)
+
+        return await self.run(take, client)
+
+    @asynccontextmanager
+    async def page(self, client: str = 'default') -> AsyncIterator[PlaywrightPage]:
+        """
+        Hold a page for several steps, e.g. a snapshot followed by actions on it.
+
+        Args:
+            client: Name used for fair queueing
+        """
+        if not self._started:
+            raise RuntimeError("Page pool is not started")
+
+        async with self._queue_slot(client):
+            page = await self._acquire(client)
+        try:
+            yield page
+        finally:
+            await self._release(page)
+            self.completed_jobs += 1
+
+    @property
+    def idle_pages(self) -> int:
+        return len(self._idle)
+
+    @property
+    def queued_jobs(self) -> Dict[str, int]:
+        """Jobs waiting for a page, per client."""
+        return {client: len(queue) for client, queue in self._waiters.items() if queue}
+
+    @asynccontextmanager
+    async def _queue_slot(self, client: str) -> AsyncIterator[None]:
+        """Hold one of the client's `max_queued` queue slots, waiting while they are all taken."""
+        slots = self._queue_slots.get(client)
+        if slots is None:
+            slots = self._queue_slots[client] = asyncio.Semaphore(self.max_queued)
+        self._queue_users[client] = self._queue_users.get(client, 0) + 1
+        try:
+            async with slots:
+                yield
+        finally:
+            self._queue_users[client] -= 1
+            if not self._queue_users[client]:
+                # Nobody queued for this client: forget it
+                del self._queue_users[client]
+                del self._queue_slots[client]
+
+    async def _open_page(self) -> PlaywrightPage:
+        context = await self.browser.new_context(**self.context_options)
+        page = await context.new_page()
+        pooled = PlaywrightPage(
+            page,
+            embedding_storage=self.embedding_storage,
+            embedding_policy=self.embedding_policy,
+            embedder=self.embedder,
+            retention=self.retention,
+            hierarchical_embeddings=self.hierarchical_embeddings
+        )
+        self._contexts[id(pooled)] = context
+        return pooled
+
+    async def _acquire(self, client: str) -> PlaywrightPage:
+        if self._idle and not self._rotation:
+            return self._idle.pop()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(client, deque()).append(waiter)
+        if client not in self._rotation:
+            self._rotation.append(client)
+        try:
+            if self._live < self.size:
+                # A crashed page could not be replaced earlier: try again
+                await self._restore_page()
+            return await waiter
+        except asyncio.CancelledError:
+            if not waiter.done():
+                waiter.cancel()
+            elif not waiter.cancelled() and waiter.exception() is None:
+                # Handed a page just as we were cancelled: pass it on
+                await self._release(waiter.result())
+            raise
+
+    async def _release(self, page: PlaywrightPage) -> None:
+        if not self._started:
+            return
+
+        if page.page.is_closed():
+            # Crashed or closed by the job: replace it with a fresh page
+            context = self._contexts.pop(id(page), None)
+            if context is not None:
+                await asyncio.gather(context.close(), return_exceptions=True)
+            self._live -= 1
+            await self._restore_page()
+            return
+
+        # The next job may navigate away: release the handles of this job's snapshots
+        try:
+            await page.close_snapshots()
+        finally:
+            self._hand_off(page)
+
+    async def _restore_page(self) -> None:
+        """
+        Open a page in place of a lost one and hand it to the next waiter.
+
+        A failure is recorded rather than raised, so it never masks the result
+        of the job releasing the page; the slot is retried by the next job
+        that has to wait. With no page left at all, waiting jobs fail.
+        """
+        # Reserve the slot before awaiting, so concurrent restores stay within `size`
+        self._live += 1
+        try:
+            page = await self._open_page()
+        except asyncio.CancelledError:
+            if self._started:
+                self._live -= 1
+            raise
+        except Exception as error:
+            if not self._started:
+                return
+            self._live -= 1
+            self.replacement_failures += 1
+            self.last_replacement_error = error
+            print(f"⚠️ Could not replace a pool page ({self._live}/{self.size} left): {error}")
+            if self._live == 0:
+                failure = RuntimeError("Page pool has no pages left: opening a replacement page failed")
+                failure.__cause__ = error
+                self._fail_waiters(failure)
+            return
+
+        if not self._started:
+            # Closed while the page was opening
+            context = self._contexts.pop(id(page), None)
+            if context is not None:
+                await asyncio.gather(context.close(), return_exceptions=True)
+            return
+        self._hand_off(page)
+
+    def _fail_waiters(self, error: BaseException) -> None:
+        """Fail every queued job with `error`."""
+        for queue in self._waiters.values():
+            for waiter in queue:
+                if not waiter.done():
+                    waiter.set_exception(error)
+        self._waiters.clear()
+        self._rotation.clear()
+
+    def _hand_off(self, page: PlaywrightPage) -> None:
+        """Give a free page to the next waiting client, or make it idle."""
+        # Serve clients round-robin, skipping waiters that gave up
+        while self._rotation:
+            client = self._rotation.popleft()
+            queue = self._waiters.get(client)
+            while queue and queue[0].done():
+                queue.popleft()
+            if not queue:
+                self._waiters.pop(client, None)
+                continue
+
+            waiter = queue.popleft()
+            if queue:
+                self._rotation.append(client)
+            else:
+                del self._waiters[client]
+            waiter.set_result(page)
+            return
+
+        self._idle.append(page)
@@ -0,0 +1,174 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from .semantic_node import SemanticElementNode
+from .constants import INTERACTIVE_ELEMENTS, INTERACTIVE_ROLES, IMPLICIT_ROLES, INPUT_TYPE_ROLES
+
+
+# Fields a `where` filter can constrain
+FILTER_FIELDS = ('tag', 'role', 'type', 'interactive')
+
+# Attributes that name an element for users (and make it a likely action target)
+LABEL_ATTRIBUTES = {'aria-label', 'title', 'placeholder', 'alt'}
+
+
+def element_roles(tag: str, attributes: List[tuple]) -> List[str]:
+    """
+    Get the ARIA roles of an element: explicit roles if set, otherwise the implicit one.
+
+    Args:
+        tag: Element tag name
+        attributes: Element attributes as (key, value) tuples
+
+    Returns:
+        List of lowercase role names (possibly empty)
+    """
+    attribute_map = dict(attributes)
+    explicit = attribute_map.get('role', '').lower().split()
+    if explicit:
+        return explicit
+
+    tag = tag.lower()
+    if tag == 'input':
+        role = INPUT_TYPE_ROLES.get(attribute_map.get('type', 'text').lower())
+    else:
+        role = IMPLICIT_ROLES.get(tag)
+    return [role] if role else []
+
+
+def element_fields(tag: str, attributes: List[tuple]) -> List[Tuple[str, Any]]:
+    """Get the (field, value) pairs an element is indexed under."""
+    tag = tag.lower()
+    roles = element_roles(tag, attributes)
+
+    fields: List[Tuple[str, Any]] = [('tag', tag)]
+    fields.extend(('role', role) for role in roles)
+    for key, value in attributes:
+        if key == 'type':
+            fields.append(('type', value.lower()))
+
+    interactive = tag in INTERACTIVE_ELEMENTS or any(role in INTERACTIVE_ROLES for role in roles)
+    fields.append(('interactive', interactive))
+    return fields
+
+
+def is_actionable_element(tag: str, attributes: List[tuple]) -> bool:
+    """
+    Whether an element is a likely action target: interactive, role-bearing or labelled.
+
+    Args:
+        tag: Element tag name
+        attributes: Element attributes as (key, value) tuples
+
+    Returns:
+        True for buttons, inputs, links, elements with a role and labelled elements
+    """
+    if tag.lower() in INTERACTIVE_ELEMENTS:
+        return True
+    return any(key == 'role' or key in LABEL_ATTRIBUTES for key, _ in attributes)
+
+
+def _interactive_value(value: Any) -> bool:
+    """Parse an 'interactive' filter value: a bool, or 'true'/'false' in any case."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ('true', 'false'):
+        return value.lower() == 'true'
+    raise ValueError(f"'interactive' filter expects True, False, 'true' or 'false', got {value!r}")
+
+
+class AttributeIndex:
+    """
+    Index from structured element properties to semantic ids.
+
+    Elements are indexed by tag, role (explicit or implicit ARIA role),
+    `type` attribute and interactivity, so filters like
+    {'role': 'textbox'} or {'tag': ['a', 'button'], 'interactive': True}
+    resolve to a candidate set without scoring anything.
+    """
+
+    def __init__(self):
+        self.postings: Dict[Tuple[str, Any], Set[str]] = {}
+        self._element_fields: Dict[str, List[Tuple[str, Any]]] = {}
+
+    @classmethod
+    def from_semantic_tree(cls, semantic_tree: SemanticElementNode) -> 'AttributeIndex':
+        """
+        Build an index over every element of a semantic tree.
+
+        Args:
+            semantic_tree: Root of the semantic tree
+
+        Returns:
+            AttributeIndex over every SemanticElementNode in the tree
+        """
+        index = cls()
+        index.add_semantic_tree(semantic_tree)
+        return index
+
+    def add_semantic_tree(self, semantic_tree: SemanticElementNode) -> None:
+        """Add every element of a (sub)tree to the index."""
+        stack = [semantic_tree]
+        while stack:
+            node = stack.pop()
+            self.add_element(node.id, node.tag, node.attributes)
+            stack.extend(node.get_element_children())
+
+    def add_element(self, semantic_id: str, tag: str, attributes: List[tuple]) -> None:
+        """
+        Add an element to the index.
+
+        Args:
+            semantic_id: Id of the semantic element
+            tag: Element tag name
+            attributes: Element attributes as (key, value) tuples
+        """
+        if semantic_id in self._element_fields:
+            self.remove_element(semantic_id)
+
+        fields = element_fields(tag, attributes)
+        for field in fields:
+            self.postings.setdefault(field, set()).add(semantic_id)
+        self._element_fields[semantic_id] = fields
+
+    def remove_element(self, semantic_id: str) -> None:
+        """Remove an element from the index if present."""
+        for field in self._element_fields.pop(semantic_id, []):
+            ids = self.postings[field]
+            ids.discard(semantic_id)
+            if not ids:
+                del self.postings[field]
+
+    def lookup(self, where: Dict[str, Any]) -> Set[str]:
+        """
+        Find elements matching every condition of a filter.
+
+        Args:
+            where: Mapping of field ('tag', 'role', 'type', 'interactive') to a value
+                or a list of accepted values. Conditions are combined with AND,
+                values within one condition with OR. 'interactive' takes a bool
+                or the string 'true' or 'false'.
+
+        Returns:
+            Set of matching semantic ids
+
+        Raises:
+            ValueError: On an unknown field or an 'interactive' value that is not a boolean
+        """
+        result: Optional[Set[str]] = None
+        for field, accepted in where.items():
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Unknown filter field '{field}', expected one of {list(FILTER_FIELDS)}")
+
+            values: Iterable[Any] = accepted if isinstance(accepted, (list, tuple, set, frozenset)) else [accepted]
+            matches: Set[str] = set()
+            for value in values:
+                key = _interactive_value(value) if field == 'interactive' else str(value).lower()
+                matches |= self.postings.get((field, key), set())
+
+            result = matches if result is None else result & matches
+            if not result:
+                return set()
+
+        return result if result is not None else set(self._element_fields)
+
+    def __len__(self) -> int:
+        return len(self._element_fields)
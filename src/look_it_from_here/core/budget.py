@@ -0,0 +1,79 @@
+from typing import List, Optional
+import math
+import time
+
+
+# Degradations a SnapshotBudget can record, in the order they kick in
+SKIP_HIDDEN_SUBTREES = 'skip_hidden_subtrees'
+CAP_DEPTH = 'cap_depth'
+STOP_CAPTURE = 'stop_capture'
+EMBED_ACTIONABLE_ONLY = 'embed_actionable_only'
+SHRINK_REVERSE_TREES = 'shrink_reverse_trees'
+DEFER_REMAINING_EMBEDDINGS = 'defer_remaining_embeddings'
+
+# Share of the budget left below which each degradation applies
+SKIP_HIDDEN_SUBTREES_BELOW = 0.5
+CAP_DEPTH_BELOW = 0.25
+EMBED_ACTIONABLE_ONLY_BELOW = 0.5
+SHRINK_REVERSE_TREES_BELOW = 0.25
+
+# Limits used once a degradation applies
+DEGRADED_MAX_DEPTH = 12
+DEGRADED_REVERSE_TREE_NODES = 40
+
+
+class SnapshotBudget:
+    """
+    Wall-clock budget for building a snapshot.
+
+    Capture, transform and embedding stages check the budget and degrade in
+    defined steps as it runs out (skip hidden subtrees, cap depth, embed only
+    actionable elements, shrink reverse trees, defer remaining embeddings).
+    Every degradation applied is recorded once in `degradations`.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, deadline: Optional[float] = None):
+        """
+        Initialize budget.
+
+        Args:
+            seconds: Budget relative to now
+            deadline: Absolute deadline on the time.monotonic() clock. Takes precedence over seconds.
+                With neither, the budget is unlimited and never degrades anything.
+        """
+        self.started = time.monotonic()
+        if deadline is None and seconds is not None:
+            deadline = self.started + seconds
+        self.deadline = deadline
+        self.degradations: List[str] = []
+
+    @property
+    def unlimited(self) -> bool:
+        return self.deadline is None
+
+    def remaining(self) -> float:
+        """Seconds left (infinite for an unlimited budget)."""
+        if self.deadline is None:
+            return math.inf
+        return max(0.0, self.deadline - time.monotonic())
+
+    def fraction_remaining(self) -> float:
+        """Share of the budget left, from 1.0 down to 0.0."""
+        if self.deadline is None:
+            return 1.0
+        total = self.deadline - self.started
+        if total <= 0:
+            return 0.0
+        return self.remaining() / total
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def below(self, fraction: float) -> bool:
+        """Whether less than `fraction` of the budget is left."""
+        return self.fraction_remaining() < fraction
+
+    def degrade(self, degradation: str) -> None:
+        """Record that a degradation was applied."""
+        if degradation not in self.degradations:
+            self.degradations.append(degradation)
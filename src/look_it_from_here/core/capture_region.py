@@ -0,0 +1,143 @@
+from typing import Dict, Optional
+from dataclasses import dataclass, replace
+from .interfaces import WebPage, WebElement
+
+
+# Rectangles are dicts with x, y, width and height, in viewport coordinates
+BoundingBox = Dict[str, float]
+
+# Number of times a region grows before capture falls back to the whole document
+MAX_REGION_EXPANSIONS = 2
+
+
+@dataclass
+class CaptureRegion:
+    """
+    Part of a page a snapshot captures instead of the whole document.
+
+    Attributes:
+        root_selector: Start capture at the first element matching this selector
+            instead of <html>
+        bbox: Only capture elements intersecting this rectangle
+        viewport: Only capture elements intersecting the viewport. Ignored when bbox is set.
+        margin: Pixels the rectangle is grown by on every side
+        expansions: How many times the region has been expanded already
+    """
+    root_selector: Optional[str] = None
+    bbox: Optional[BoundingBox] = None
+    viewport: bool = False
+    margin: float = 0.0
+    expansions: int = 0
+
+    @classmethod
+    def for_viewport(cls, margin: float = 0.0) -> 'CaptureRegion':
+        """Region covering what is on screen, plus `margin` pixels around it."""
+        return cls(viewport=True, margin=margin)
+
+    @property
+    def has_rect(self) -> bool:
+        return self.bbox is not None or self.viewport
+
+    def expanded(self, viewport: Optional[BoundingBox] = None) -> Optional['CaptureRegion']:
+        """
+        Next larger region to capture when this one did not contain a good match.
+
+        Rectangles grow by one screen on every side; a region without a rectangle,
+        or one expanded MAX_REGION_EXPANSIONS times already, gives way to the
+        whole document.
+
+        Args:
+            viewport: Current viewport rectangle, used as the growth step
+
+        Returns:
+            Larger CaptureRegion, or None when the next step is the whole document
+        """
+        if not self.has_rect or self.expansions >= MAX_REGION_EXPANSIONS:
+            return None
+
+        step = max(
+            (viewport or {}).get('height', 0.0),
+            (self.bbox or {}).get('height', 0.0)
+        )
+        if step <= 0:
+            return None
+        # Growing outward keeps the root: going back up the tree means capturing everything
+        return replace(self, margin=self.margin + step, expansions=self.expansions + 1)
+
+
+def _intersects(box: BoundingBox, rect: BoundingBox) -> bool:
+    return (
+        box['x'] < rect['x'] + rect['width'] and rect['x'] < box['x'] + box['width'] and
+        box['y'] < rect['y'] + rect['height'] and rect['y'] < box['y'] + box['height']
+    )
+
+
+class RegionCapture:
+    """
+    A CaptureRegion resolved against a page for one capture.
+
+    Holds the rectangle in viewport coordinates and counts the elements left out,
+    so callers know whether expanding the region could find more.
+    """
+
+    def __init__(self, region: CaptureRegion, rect: Optional[BoundingBox] = None, viewport: Optional[BoundingBox] = None):
+        self.region = region
+        self.rect = rect
+        self.viewport = viewport
+        self.skipped_elements = 0
+
+    @classmethod
+    async def resolve(cls, region: CaptureRegion, page: WebPage) -> 'RegionCapture':
+        """
+        Work out the rectangle a region covers on the page.
+
+        Args:
+            region: Region to capture
+            page: Page the capture runs against
+
+        Returns:
+            RegionCapture for a single capture of the region
+        """
+        viewport = await page.get_viewport()
+
+        rect = region.bbox
+        if rect is None and region.viewport:
+            rect = viewport
+
+        if rect is not None and region.margin:
+            rect = {
+                'x': rect['x'] - region.margin,
+                'y': rect['y'] - region.margin,
+                'width': rect['width'] + 2 * region.margin,
+                'height': rect['height'] + 2 * region.margin
+            }
+        return cls(region, rect, viewport)
+
+    async def get_root(self, page: WebPage) -> Optional[WebElement]:
+        """Element capture starts from: the root selector's match or the document root."""
+        if self.region.root_selector:
+            return await page.find(self.region.root_selector)
+        return await page.get_root()
+
+    def contains(self, box: Optional[BoundingBox]) -> bool:
+        """
+        Whether an element with this bounding box belongs to the region.
+
+        Elements without a box (not rendered, or a page that cannot report
+        geometry) are kept; the visibility passes deal with them.
+        """
+        if self.rect is None or box is None:
+            return True
+        if _intersects(box, self.rect):
+            return True
+        self.skipped_elements += 1
+        return False
+
+    @property
+    def truncated(self) -> bool:
+        """Whether anything was left out of the capture."""
+        return self.skipped_elements > 0 or bool(self.region.root_selector)
+
+    def expanded(self) -> Optional[CaptureRegion]:
+        """Next larger region to try, or None for the whole document (see CaptureRegion.expanded)."""
+        return self.region.expanded(self.viewport)
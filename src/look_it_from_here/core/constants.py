@@ -12,6 +12,9 @@ SEMANTIC_ATTRIBUTES = {
     'type', 'value', 'placeholder',
 }
 
+# Tags that are never displayed; dropped during capture (in the browser when possible)
+EXCLUDED_TAGS = {'script', 'style', 'meta', 'link', 'head', 'noscript', 'title'}
+
 # Interactive HTML elements that should NEVER be collapsed
 # These elements have inherent semantic meaning even without attributes
 INTERACTIVE_ELEMENTS = {
@@ -32,4 +35,52 @@ INTERACTIVE_ELEMENTS = {
 }
 
 # Non-semantic role values that indicate elements should be skipped
-NON_SEMANTIC_ROLES = {'none', 'presentation'}
\ No newline at end of file
+NON_SEMANTIC_ROLES = {'none', 'presentation'}
+
+# Attributes whose values are indexed as visible/accessible text for lexical search
+LEXICAL_ATTRIBUTES = ('aria-label', 'title', 'placeholder', 'alt', 'value')
+
+
+# ARIA widget roles that make any element interactive
+INTERACTIVE_ROLES = {
+    'button', 'link', 'checkbox', 'radio', 'switch', 'tab', 'menuitem',
+    'menuitemcheckbox', 'menuitemradio', 'option', 'textbox', 'searchbox',
+    'combobox', 'listbox', 'slider', 'spinbutton', 'treeitem',
+}
+
+# Implicit ARIA roles of HTML elements (used when no explicit role is set)
+IMPLICIT_ROLES = {
+    'a': 'link', 'button': 'button', 'textarea': 'textbox', 'select': 'combobox',
+    'option': 'option', 'nav': 'navigation', 'form': 'form', 'img': 'img',
+    'ul': 'list', 'ol': 'list', 'li': 'listitem', 'table': 'table',
+    'header': 'banner', 'footer': 'contentinfo', 'main': 'main',
+    'aside': 'complementary', 'dialog': 'dialog', 'fieldset': 'group',
+    'details': 'group', 'h1': 'heading', 'h2': 'heading', 'h3': 'heading',
+    'h4': 'heading', 'h5': 'heading', 'h6': 'heading',
+}
+
+# Implicit roles of <input> by type (inputs without a type are text fields)
+INPUT_TYPE_ROLES = {
+    'text': 'textbox', 'email': 'textbox', 'tel': 'textbox', 'url': 'textbox',
+    'password': 'textbox', 'search': 'searchbox', 'checkbox': 'checkbox',
+    'radio': 'radio', 'range': 'slider', 'number': 'spinbutton',
+    'submit': 'button', 'button': 'button', 'reset': 'button', 'image': 'button',
+}
+
+# Attribute stamped on list items so incremental capture can tell new items from seen ones
+CAPTURE_KEY_ATTRIBUTE = 'data-lifh-key'
+
+# ARIA roles (explicit or implicit) of page regions: landmarks, forms, lists and
+# other widgets grouping many elements. Hierarchical selection scores a region
+# before deciding whether to score its content.
+REGION_ROLES = {
+    'banner', 'navigation', 'main', 'complementary', 'contentinfo', 'form', 'search',
+    'region', 'dialog', 'alertdialog', 'group', 'list', 'listbox', 'menu', 'menubar',
+    'tablist', 'toolbar', 'table', 'grid', 'tree', 'radiogroup',
+}
+
+# Region tags without an implicit region role
+REGION_TAGS = {'section', 'article', 'menu'}
+
+# Generic containers with at least this many descendant elements are regions too
+LARGE_REGION_ELEMENTS = 50
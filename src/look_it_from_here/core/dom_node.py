@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import uuid
 from abc import ABC
 
@@ -24,13 +24,19 @@ class DOMElementNode(DOMNode):
         tag: str,
         attributes: Optional[Dict[str, str]] = None,
         children: Optional[List[DOMNode]] = None,
-        is_visible: bool = True
+        is_visible: bool = True,
+        bounds: Optional[Tuple[float, float, float, float]] = None,
+        in_viewport: Optional[bool] = None
     ):
         super().__init__()
         self.tag = tag
         self.attributes = attributes or {}
         self.children: List[DOMNode] = children or []
         self.is_visible = is_visible
+        # Geometry from in-page capture: (x, y, width, height) in viewport coordinates,
+        # and whether any of it is on screen. None when the page could not report it.
+        self.bounds = bounds
+        self.in_viewport = in_viewport
 
     def add_child(self, child: DOMNode) -> None:
         self.children.append(child)
@@ -51,19 +57,25 @@ class DOMElementNode(DOMNode):
             elif isinstance(child, DOMTextNode):
                 children_data.append({'type': 'text', 'content': child.text})
 
-        return {
+        data = {
             'id': self.id,
             'tag': self.tag,
             'attributes': self.attributes,
             'is_visible': self.is_visible,
             'children': children_data
         }
+        if self.bounds is not None:
+            data['bounds'] = list(self.bounds)
+            data['in_viewport'] = self.in_viewport
+        return data
 
     def copy(self, include_children: bool = True) -> 'DOMElementNode':
         new_node = DOMElementNode(
             tag=self.tag,
             attributes=self.attributes.copy(),
-            is_visible=self.is_visible
+            is_visible=self.is_visible,
+            bounds=self.bounds,
+            in_viewport=self.in_viewport
         )
         new_node.id = self.id
 
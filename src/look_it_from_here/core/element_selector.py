@@ -1,19 +1,99 @@
-from typing import List, Optional, Tuple, Dict, Any
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from dataclasses import dataclass
+import time
 import numpy as np
 from .interfaces import WebElement, Snapshot
 from .embeddings import Embedder
+from .embedding_store import EmbeddingStore
+
+
+# How select_elements scores candidates
+SELECTION_MODES = {'embedding', 'lexical', 'hybrid', 'hierarchical'}
+
+# Best-scoring embedded elements whose deferred parents and children are embedded on demand
+ON_DEMAND_SEEDS = 5
+
+
+@dataclass
+class SearchStats:
+    """Work done by the most recent selection query."""
+    candidates: int = 0
+    coarse_scored: int = 0
+    exact_scored: int = 0
+    coarse_seconds: float = 0.0
+    exact_seconds: float = 0.0
+    embedded_on_demand: int = 0
+    # Hierarchical mode: regions scored (their time counts as coarse), and
+    # selectable elements skipped with their region
+    regions_scored: int = 0
+    pruned: int = 0
+
+    @property
+    def nodes_scored(self) -> int:
+        """Regions and elements given any score, coarse or exact."""
+        return self.regions_scored + max(self.coarse_scored, self.exact_scored)
 
 
 class ElementSelector:
-    def __init__(self, embedder: Optional[Embedder] = None):
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        rescore_multiplier: int = 4,
+        shortlist_size: Optional[int] = None,
+        coarse_dimensions: Optional[int] = None,
+        lexical_prefilter: bool = False,
+        lexical_weight: float = 0.3,
+        lazy_candidates: int = 20,
+        beam_width: int = 3
+    ):
+        """
+        Initialize selector.
+
+        Args:
+            embedder: Embedder used for query embeddings. If None, creates a new one.
+            rescore_multiplier: When the snapshot stores compact (truncated or quantized)
+                embeddings with a full-precision copy, this many candidates per requested
+                result are rescored exactly.
+            shortlist_size: Enable two-stage search: a cheap first pass keeps this many
+                candidates, which are then rescored with exact cosine similarity.
+                None scores every element exactly.
+            coarse_dimensions: Number of leading dimensions the first pass scores on.
+                None uses the snapshot's search matrix as stored.
+            lexical_prefilter: Use BM25 matches as the first pass of two-stage search,
+                falling back to the vector first pass when nothing matches lexically.
+            lexical_weight: Weight of the BM25 score in 'hybrid' mode (0.0 to 1.0)
+            lazy_candidates: Snapshots created with a lazy embedding policy leave some
+                elements unembedded; up to this many of them are embedded per query,
+                picked by BM25 match (or all of them if a `where` filter leaves no more),
+                and up to as many again among the parents and children of the
+                best-scoring embedded elements
+            beam_width: Regions kept at each level of 'hierarchical' search
+        """
+        if beam_width < 1:
+            raise ValueError("beam_width must be at least 1")
+        if shortlist_size is not None and shortlist_size < 1:
+            raise ValueError("shortlist_size must be at least 1")
         self.embedder = embedder or Embedder()
+        self.rescore_multiplier = rescore_multiplier
+        self.shortlist_size = shortlist_size
+        self.coarse_dimensions = coarse_dimensions
+        self.lexical_prefilter = lexical_prefilter
+        self.lexical_weight = lexical_weight
+        self.lazy_candidates = lazy_candidates
+        self.beam_width = beam_width
+        self.last_stats = SearchStats()
 
     def select_elements(
         self,
         snapshot: Snapshot,
         query: str,
         top_k: int = 5,
-        threshold: float = 0.5
+        threshold: float = 0.5,
+        shortlist_size: Optional[int] = None,
+        mode: str = 'embedding',
+        where: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None,
+        beam_width: Optional[int] = None
     ) -> List[Tuple[str, WebElement, float]]:
         """
         Select elements using natural language query with similarity scoring.
@@ -23,35 +103,132 @@ class ElementSelector:
             query: Natural language description of desired elements
             top_k: Maximum number of elements to return
             threshold: Minimum similarity score (0.0 to 1.0)
+            shortlist_size: Override the selector's two-stage shortlist size for this query
+            mode: 'embedding' (cosine similarity), 'lexical' (BM25 over element text,
+                no embedding request), 'hybrid' (weighted sum of both) or 'hierarchical'
+                (cosine similarity within the best-scoring page regions only)
+            where: Only consider elements matching this filter on 'tag', 'role', 'type'
+                or 'interactive', e.g. {'role': 'textbox'} or {'tag': ['a', 'button']}
+            query_embedding: Embedding of the query if already computed, e.g. by an async caller
+            beam_width: Override the selector's beam width for this query ('hierarchical' mode)
+
+        Returns:
+            List of (semantic_id, element, similarity_score) tuples, sorted by score
+        """
+        allowed = self._start_query(snapshot, mode, where)
+
+        # Deferred elements this query is likely to need get embedded now
+        if mode != 'lexical' and _pending_ids(snapshot):
+            if query_embedding is None and snapshot.semantic_id_to_embedding:
+                query_embedding = self.embedder.create_embedding(query)
+            needed = self._on_demand_ids(snapshot, query, allowed, query_embedding)
+            self.last_stats.embedded_on_demand = snapshot.ensure_embeddings(needed)
+
+        return self._select(
+            snapshot, query, top_k, threshold, shortlist_size, mode, allowed, query_embedding, beam_width
+        )
+
+    async def aselect_elements(
+        self,
+        snapshot: Snapshot,
+        query: str,
+        top_k: int = 5,
+        threshold: float = 0.5,
+        shortlist_size: Optional[int] = None,
+        mode: str = 'embedding',
+        where: Optional[Dict[str, Any]] = None,
+        beam_width: Optional[int] = None
+    ) -> List[Tuple[str, WebElement, float]]:
+        """
+        Async variant of select_elements.
+
+        The query and deferred elements are embedded with the embedder's async
+        calls, so the event loop is never blocked on the provider and the
+        requests can be batched with concurrent ones.
 
         Returns:
             List of (semantic_id, element, similarity_score) tuples, sorted by score
         """
-        if not snapshot.semantic_id_to_embedding:
+        allowed = self._start_query(snapshot, mode, where)
+
+        query_embedding = None
+        pending = _pending_ids(snapshot)
+        if mode != 'lexical' and (snapshot.semantic_id_to_embedding or pending):
+            query_embedding = await self.embedder.acreate_embedding(query)
+            if pending:
+                needed = self._on_demand_ids(snapshot, query, allowed, query_embedding)
+                self.last_stats.embedded_on_demand = await snapshot.aensure_embeddings(needed)
+
+        return self._select(
+            snapshot, query, top_k, threshold, shortlist_size, mode, allowed, query_embedding, beam_width
+        )
+
+    def _start_query(self, snapshot: Snapshot, mode: str, where: Optional[Dict[str, Any]]) -> Optional[Set[str]]:
+        """Validate the mode, reset the stats and resolve the structured filter to candidate ids."""
+        if mode not in SELECTION_MODES:
+            raise ValueError(f"Unknown selection mode '{mode}', expected one of {sorted(SELECTION_MODES)}")
+
+        self.last_stats = SearchStats()
+        # Structured filter narrows the candidates before anything is scored
+        return snapshot.attribute_index.lookup(where) if where else None
+
+    def _select(
+        self,
+        snapshot: Snapshot,
+        query: str,
+        top_k: int,
+        threshold: float,
+        shortlist_size: Optional[int],
+        mode: str,
+        allowed: Optional[Set[str]],
+        query_embedding: Optional[List[float]],
+        beam_width: Optional[int]
+    ) -> List[Tuple[str, WebElement, float]]:
+        """Score and rank the snapshot's embedded elements once on-demand embedding is done."""
+        store = snapshot.semantic_id_to_embedding
+        if mode == 'lexical':
+            return self._select_lexical(snapshot, query, top_k, threshold, allowed)
+        if mode == 'hybrid' and not store:
+            return self._select_lexical(snapshot, query, top_k, threshold, allowed)
+        if not store:
+            return []
+
+        # Only elements that can be interacted with are candidates
+        rows = self._selectable_rows(snapshot, allowed)
+        if len(rows) == 0:
             return []
 
         # Get query embedding
-        query_embedding = self.embedder.create_embedding(query)
+        if query_embedding is None:
+            query_embedding = self.embedder.create_embedding(query)
+
+        lexical_scores = None
+        if mode == 'hybrid' or self.lexical_prefilter:
+            lexical_scores = snapshot.lexical_index.scores(query)
+
+        if mode == 'hierarchical':
+            if beam_width is None:
+                beam_width = self.beam_width
+            rows = self._search_regions(snapshot, query_embedding, rows, beam_width)
+            if len(rows) == 0:
+                return []
 
-        # Calculate similarities for all elements
-        similarities = []
-        for semantic_id, element_embedding in snapshot.semantic_id_to_embedding.items():
-            similarity = self._cosine_similarity(query_embedding, element_embedding)
+        rows, scores = self._score(store, query_embedding, rows, top_k, shortlist_size, lexical_scores)
+        semantic_ids = [store.ids[row] for row in rows]
 
-            # Only include if above threshold and element exists
-            if similarity >= threshold and semantic_id in snapshot.semantic_id_to_webelement:
-                element = snapshot.semantic_id_to_webelement[semantic_id]
-                similarities.append((semantic_id, element, similarity))
+        if mode == 'hybrid':
+            lexical = np.array([lexical_scores.get(semantic_id, 0.0) for semantic_id in semantic_ids])
+            scores = (1 - self.lexical_weight) * np.clip(scores, 0.0, 1.0) + self.lexical_weight * lexical
 
-        # Sort by similarity (descending) and return top_k
-        similarities.sort(key=lambda x: x[2], reverse=True)
-        return similarities[:top_k]
+        return self._rank(snapshot, semantic_ids, scores, top_k, threshold)
 
     def select_element(
         self,
         snapshot: Snapshot,
         query: str,
-        threshold: float = 0.5
+        threshold: float = 0.5,
+        mode: str = 'embedding',
+        where: Optional[Dict[str, Any]] = None
     ) -> Optional[Tuple[str, WebElement, float]]:
         """
         Select the single best matching element using natural language query.
@@ -60,37 +237,289 @@ class ElementSelector:
             snapshot: WebSnapshot containing semantic tree and embeddings
             query: Natural language description of desired element
             threshold: Minimum similarity score (0.0 to 1.0)
+            mode: 'embedding', 'lexical', 'hybrid' or 'hierarchical' (see select_elements)
+            where: Structured filter on 'tag', 'role', 'type' or 'interactive'
 
         Returns:
             Tuple of (semantic_id, element, similarity_score) or None if no match
         """
-        results = self.select_elements(snapshot, query, top_k=1, threshold=threshold)
+        results = self.select_elements(snapshot, query, top_k=1, threshold=threshold, mode=mode, where=where)
         return results[0] if results else None
 
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
+    def _score(
+        self,
+        store: EmbeddingStore,
+        query_embedding: List[float],
+        rows: np.ndarray,
+        top_k: int,
+        shortlist_size: Optional[int],
+        lexical_scores: Optional[Dict[str, float]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Calculate cosine similarity between two embedding vectors.
+        Score candidate rows, coarse-to-fine when a shortlist applies.
+
+        A shortlist applies when one is requested, or implicitly when the store
+        keeps full-precision vectors behind a compact search matrix.
+
+        Returns:
+            Tuple of (rows, exact scores) for the rows that survived the first pass
+
+        Raises:
+            ValueError: If `shortlist_size` is not positive
+        """
+        stats = self.last_stats
+        stats.candidates = len(rows)
+
+        if shortlist_size is None:
+            shortlist_size = self.shortlist_size
+        elif shortlist_size < 1:
+            raise ValueError("shortlist_size must be at least 1")
+        if shortlist_size is None and store.has_full_precision:
+            shortlist_size = max(top_k, 1) * self.rescore_multiplier
+        elif shortlist_size is not None:
+            # A shortlist shorter than top_k would cut the results short
+            shortlist_size = max(shortlist_size, top_k)
+
+        if shortlist_size is None or shortlist_size >= len(rows):
+            # Single pass: every candidate scored exactly
+            start = time.perf_counter()
+            scores = store.exact_scores(query_embedding, rows)
+            stats.exact_scored = len(rows)
+            stats.exact_seconds = time.perf_counter() - start
+            return rows, scores
+
+        # First pass: cheap approximate scores over all candidates
+        start = time.perf_counter()
+        shortlist_rows = None
+        if self.lexical_prefilter and lexical_scores:
+            shortlist_rows = self._lexical_shortlist(store, rows, lexical_scores, shortlist_size)
+
+        if shortlist_rows is not None:
+            rows = shortlist_rows
+            stats.coarse_scored = len(lexical_scores)
+        else:
+            if self.coarse_dimensions:
+                coarse = store.coarse_scores(query_embedding, self.coarse_dimensions, rows)
+            else:
+                coarse = store.scores(query_embedding, rows)
+            stats.coarse_scored = len(rows)
+            shortlist = np.argpartition(-coarse, shortlist_size - 1)[:shortlist_size]
+            rows = rows[shortlist]
+        stats.coarse_seconds += time.perf_counter() - start
+
+        # Second pass: exact cosine similarity on the shortlist only
+        start = time.perf_counter()
+        scores = store.exact_scores(query_embedding, rows)
+        stats.exact_scored = len(rows)
+        stats.exact_seconds = time.perf_counter() - start
+        return rows, scores
+
+    def _search_regions(
+        self,
+        snapshot: Snapshot,
+        query_embedding: List[float],
+        rows: np.ndarray,
+        beam_width: int
+    ) -> np.ndarray:
+        """
+        Narrow candidate rows to the elements of the best-scoring regions.
+
+        Top-level regions are scored by their own embedding and the best
+        `beam_width` are kept; the regions nested in those are scored next,
+        level by level. Elements outside every region are always kept.
+        Regions without an embedding are opened unscored, so their content
+        competes one level up.
+
+        Returns:
+            Ascending array of the candidate rows inside visited regions, or
+            `rows` unchanged when the snapshot has no region index
+        """
+        if beam_width < 1:
+            raise ValueError("beam_width must be at least 1")
+        regions = snapshot.region_index
+        if regions is None:
+            return rows
+
+        store = snapshot.semantic_id_to_embedding
+        stats = self.last_stats
+        visited_members: List[str] = list(regions.members[None])
+        frontier = list(regions.children[None])
+        start = time.perf_counter()
+        while frontier:
+            scored: List[Tuple[int, str]] = []
+            while frontier:
+                region_id = frontier.pop()
+                row = store.row(region_id)
+                if row is None:
+                    visited_members.extend(regions.members[region_id])
+                    frontier.extend(regions.children[region_id])
+                else:
+                    scored.append((row, region_id))
+            if not scored:
+                break
+
+            scored.sort()
+            scores = store.exact_scores(query_embedding, np.array([row for row, _ in scored], dtype=np.int64))
+            stats.regions_scored += len(scored)
+            if len(scored) > beam_width:
+                kept = np.argpartition(-scores, beam_width - 1)[:beam_width]
+            else:
+                kept = range(len(scored))
+            for position in kept:
+                region_id = scored[position][1]
+                visited_members.extend(regions.members[region_id])
+                frontier.extend(regions.children[region_id])
+        stats.coarse_seconds += time.perf_counter() - start
+
+        visited = [store.row(semantic_id) for semantic_id in visited_members]
+        visited_rows = np.array([row for row in visited if row is not None], dtype=np.int64)
+        kept_rows = rows[np.isin(rows, visited_rows)]
+        stats.pruned = len(rows) - len(kept_rows)
+        return kept_rows
+
+    def _on_demand_ids(
+        self,
+        snapshot: Snapshot,
+        query: str,
+        allowed: Optional[Set[str]],
+        query_embedding: Optional[List[float]]
+    ) -> List[str]:
+        """
+        Deferred elements that are candidates for this query and should be embedded first.
+
+        BM25 matches come first. Elements sharing no words with the query are
+        reached through their neighbours: the deferred parents and children of
+        the best-scoring embedded elements are added too.
+        """
+        pending = _pending_ids(snapshot)
+        candidates = pending if allowed is None else pending & allowed
+        candidates = [semantic_id for semantic_id in candidates if semantic_id in snapshot.semantic_id_to_webelement]
+        if not candidates:
+            return []
+
+        if allowed is not None and len(candidates) <= self.lazy_candidates:
+            return candidates
+        matches = snapshot.lexical_index.search(query, top_k=self.lazy_candidates, candidates=candidates)
+        needed = [semantic_id for semantic_id, _ in matches]
+
+        if query_embedding is not None:
+            candidate_set = set(candidates)
+            chosen = set(needed)
+            limit = len(needed) + self.lazy_candidates
+            for semantic_id in self._neighbors_of_best(snapshot, query_embedding):
+                if len(needed) >= limit:
+                    break
+                if semantic_id in candidate_set and semantic_id not in chosen:
+                    chosen.add(semantic_id)
+                    needed.append(semantic_id)
+        return needed
+
+    def _neighbors_of_best(self, snapshot: Snapshot, query_embedding: List[float]) -> List[str]:
+        """Parents and children of the ON_DEMAND_SEEDS embedded elements scoring best, best first."""
+        store = snapshot.semantic_id_to_embedding
+        if not store:
+            return []
+
+        if self.coarse_dimensions:
+            scores = store.coarse_scores(query_embedding, self.coarse_dimensions)
+        else:
+            scores = store.scores(query_embedding)
+        seeds = min(ON_DEMAND_SEEDS, len(scores))
+        best = np.argpartition(-scores, seeds - 1)[:seeds]
+        neighbors = []
+        for row in best[np.argsort(-scores[best], kind='stable')]:
+            neighbors.extend(snapshot.neighbor_ids(store.ids[row]))
+        return neighbors
+
+    def _lexical_shortlist(
+        self,
+        store: EmbeddingStore,
+        rows: np.ndarray,
+        lexical_scores: Dict[str, float],
+        shortlist_size: int
+    ) -> Optional[np.ndarray]:
+        """Best BM25 matches among candidate rows, or None if none match."""
+        candidates = set(rows.tolist())
+        matches = []
+        for semantic_id, score in lexical_scores.items():
+            row = store.row(semantic_id)
+            if row is not None and row in candidates:
+                matches.append((score, row))
+        if not matches:
+            return None
+
+        matches.sort(reverse=True)
+        return np.array(sorted(row for _, row in matches[:shortlist_size]), dtype=np.int64)
+
+    def _select_lexical(
+        self,
+        snapshot: Snapshot,
+        query: str,
+        top_k: int,
+        threshold: float,
+        allowed: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, WebElement, float]]:
+        """Rank elements by BM25 alone, without embedding the query."""
+        start = time.perf_counter()
+        candidates = snapshot.semantic_id_to_webelement
+        if allowed is not None:
+            candidates = [semantic_id for semantic_id in allowed if semantic_id in candidates]
+        lexical_scores = snapshot.lexical_index.scores(query, candidates)
+        self.last_stats.candidates = len(candidates)
+        self.last_stats.exact_scored = len(lexical_scores)
+        self.last_stats.exact_seconds = time.perf_counter() - start
+
+        semantic_ids = list(lexical_scores)
+        scores = np.array([lexical_scores[semantic_id] for semantic_id in semantic_ids])
+        return self._rank(snapshot, semantic_ids, scores, top_k, threshold)
+
+    def _selectable_rows(self, snapshot: Snapshot, allowed: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Matrix rows of embedded elements that map to a WebElement.
 
         Args:
-            vec1: First embedding vector
-            vec2: Second embedding vector
+            snapshot: Snapshot to select from
+            allowed: Optional semantic ids to restrict the rows to
 
         Returns:
-            Cosine similarity score (0.0 to 1.0)
+            Ascending array of row indices
+        """
+        store = snapshot.semantic_id_to_embedding
+        webelements = snapshot.semantic_id_to_webelement
+        if allowed is None:
+            rows = [row for row, semantic_id in enumerate(store.ids) if semantic_id in webelements]
+        else:
+            rows = sorted(
+                store.row(semantic_id) for semantic_id in allowed
+                if semantic_id in webelements and semantic_id in store
+            )
+        return np.array(rows, dtype=np.int64)
+
+    def _rank(
+        self,
+        snapshot: Snapshot,
+        semantic_ids: List[str],
+        scores: np.ndarray,
+        top_k: int,
+        threshold: float
+    ) -> List[Tuple[str, WebElement, float]]:
+        """
+        Turn scored elements into sorted result tuples.
+
+        Similarities are clamped to the [0, 1] range before thresholding.
         """
-        # Convert to numpy arrays for efficient computation
-        a = np.array(vec1)
-        b = np.array(vec2)
+        scores = np.clip(scores, 0.0, 1.0)
 
-        # Calculate cosine similarity
-        dot_product = np.dot(a, b)
-        norm_a = np.linalg.norm(a)
-        norm_b = np.linalg.norm(b)
+        # Sort by similarity (descending) and return top_k above threshold
+        results = []
+        for i in np.argsort(-scores, kind='stable'):
+            if len(results) >= top_k or scores[i] < threshold:
+                break
+            semantic_id = semantic_ids[i]
+            results.append((semantic_id, snapshot.semantic_id_to_webelement[semantic_id], float(scores[i])))
+        return results
 
-        # Avoid division by zero
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
 
-        # Return similarity clamped to [0, 1] range
-        similarity = dot_product / (norm_a * norm_b)
-        return max(0.0, min(1.0, similarity))
\ No newline at end of file
+def _pending_ids(snapshot: Snapshot) -> Set[str]:
+    """Elements a snapshot deferred embedding for; snapshots without lazy embedding have none."""
+    return getattr(snapshot, 'pending_embedding_ids', None) or set()
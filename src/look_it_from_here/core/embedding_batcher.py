@@ -0,0 +1,188 @@
+from typing import Dict, List, Optional, Set
+from dataclasses import dataclass
+import asyncio
+import threading
+import weakref
+from .embeddings import Embedder, EmbeddingProvider
+
+
+@dataclass
+class BatcherStats:
+    """Counters of an EmbeddingBatcher."""
+    requested_texts: int = 0
+    cached_texts: int = 0
+    coalesced_texts: int = 0
+    sent_texts: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.sent_texts / self.batches if self.batches else 0.0
+
+
+class _LoopQueue:
+    """Queued and in-flight texts of one event loop; futures never cross loops."""
+
+    def __init__(self):
+        self.queued: List[str] = []
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.dispatches: Set[asyncio.Task] = set()
+
+
+class EmbeddingBatcher(Embedder):
+    """
+    Embedder that coalesces concurrent async requests into large provider batches.
+
+    Texts requested through `acreate_embeddings` (snapshots, background
+    embedding, async queries) are queued instead of being sent right away. The
+    queue is flushed as one provider request when it holds `max_batch_size`
+    texts or `linger` seconds after the first text arrived, whichever comes
+    first. A text already queued or in flight is not sent again: every caller
+    waiting for it gets the same vector.
+
+    Synchronous calls bypass the queue and go straight to the provider.
+    Each event loop has its own queue, so one batcher (e.g. `shared()`) can
+    serve successive `asyncio.run` calls.
+    """
+
+    _shared: Optional['EmbeddingBatcher'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, embedder: Optional[Embedder] = None, max_batch_size: int = 256, linger: float = 0.01):
+        """
+        Initialize batcher.
+
+        Args:
+            embedder: Embedder whose provider and cache are used. If None, creates a new one.
+            max_batch_size: Texts per provider request
+            linger: Seconds to wait for more texts before sending a partial batch
+        """
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be positive")
+        if linger < 0:
+            raise ValueError("linger must not be negative")
+
+        self._embedder = embedder or Embedder()
+        self.cache = self._embedder.cache
+        self.max_batch_size = max_batch_size
+        self.linger = linger
+        self.stats = BatcherStats()
+
+        self._queues: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopQueue]' = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def provider(self) -> EmbeddingProvider:
+        """Provider of the wrapped embedder."""
+        return self._embedder.provider
+
+    @classmethod
+    def shared(cls) -> 'EmbeddingBatcher':
+        """Process-wide batcher, created on first use, for pages and pools that should coalesce together."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    async def acreate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Create embedding vectors for several texts, coalesced with concurrent requests.
+
+        Args:
+            texts: Input texts to embed
+
+        Returns:
+            Embedding vectors in the same order as the texts
+        """
+        vectors, missing = self._from_cache(texts)
+        self.stats.requested_texts += len(texts)
+        self.stats.cached_texts += len(texts) - len(missing)
+        if not missing:
+            return vectors
+
+        futures = [self._enqueue(texts[i]) for i in missing]
+        # Shielded: a caller giving up must not cancel a vector other callers wait for
+        created = await asyncio.gather(*(asyncio.shield(future) for future in futures))
+        for i, vector in zip(missing, created):
+            vectors[i] = vector
+        return vectors
+
+    async def acreate_embedding(self, text: str) -> List[float]:
+        """Create one embedding vector, coalesced with concurrent requests."""
+        return (await self.acreate_embeddings([text]))[0]
+
+    async def flush(self) -> None:
+        """Send whatever is queued now and wait for all requests in flight."""
+        queue = self._queue()
+        self._flush(queue)
+        if queue.dispatches:
+            await asyncio.gather(*queue.dispatches, return_exceptions=True)
+
+    def _queue(self) -> _LoopQueue:
+        """Queue of the running event loop, created on first use."""
+        loop = asyncio.get_running_loop()
+        queue = self._queues.get(loop)
+        if queue is None:
+            # Queues of closed loops hold futures nobody can await any more
+            for closed in [other for other in self._queues if other.is_closed()]:
+                del self._queues[closed]
+            queue = self._queues[loop] = _LoopQueue()
+        return queue
+
+    def _enqueue(self, text: str) -> asyncio.Future:
+        queue = self._queue()
+        future = queue.in_flight.get(text)
+        if future is not None:
+            self.stats.coalesced_texts += 1
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue.in_flight[text] = future
+        queue.queued.append(text)
+
+        if len(queue.queued) >= self.max_batch_size:
+            self._flush(queue)
+        elif queue.timer is None:
+            queue.timer = loop.call_later(self.linger, self._flush, queue)
+        return future
+
+    def _flush(self, queue: _LoopQueue) -> None:
+        if queue.timer is not None:
+            queue.timer.cancel()
+            queue.timer = None
+
+        while queue.queued:
+            batch = queue.queued[:self.max_batch_size]
+            del queue.queued[:self.max_batch_size]
+            futures = [queue.in_flight[text] for text in batch]
+            task = asyncio.get_running_loop().create_task(self._dispatch(queue, batch, futures))
+            queue.dispatches.add(task)
+            task.add_done_callback(queue.dispatches.discard)
+
+    async def _dispatch(self, queue: _LoopQueue, batch: List[str], futures: List[asyncio.Future]) -> None:
+        self.stats.batches += 1
+        self.stats.sent_texts += len(batch)
+        error: BaseException = RuntimeError("Embedding batch was cancelled before it completed")
+        try:
+            created = await asyncio.to_thread(self.provider.create_embeddings, batch)
+            if len(created) != len(batch):
+                raise RuntimeError(f"Provider returned {len(created)} embeddings for {len(batch)} texts")
+            for text, vector, future in zip(batch, created, futures):
+                if self.cache is not None:
+                    self.cache.put(text, vector)
+                if not future.done():
+                    future.set_result(vector)
+        except Exception as e:
+            self.stats.failed_batches += 1
+            error = e
+        finally:
+            # Every future of the batch is settled, even when the dispatch is cancelled
+            for text, future in zip(batch, futures):
+                if not future.done():
+                    future.set_exception(error)
+                if queue.in_flight.get(text) is future:
+                    del queue.in_flight[text]
@@ -0,0 +1,425 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+import numpy as np
+
+
+# Precisions an EmbeddingStore can hold its vectors in
+STORAGE_DTYPES = {'float32', 'float16', 'int8'}
+
+# Rows decoded to float32 at a time when scoring a float16 or int8 matrix
+SCORE_BLOCK_ROWS = 256
+
+
+@dataclass
+class EmbeddingStorageConfig:
+    """
+    How element embeddings are stored on a snapshot.
+
+    Attributes:
+        dtype: Storage precision of the search matrix ('float32', 'float16' or 'int8')
+        dimensions: Keep only the first N dimensions of every vector (Matryoshka-style
+            truncation, meaningful for the text-embedding-3 models). None keeps all.
+        keep_full_precision: Also keep full-dimension float32 vectors so that
+            candidates found on the compact matrix can be rescored exactly
+    """
+    dtype: str = 'float32'
+    dimensions: Optional[int] = None
+    keep_full_precision: bool = False
+
+    def __post_init__(self):
+        if self.dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype '{self.dtype}', expected one of {sorted(STORAGE_DTYPES)}")
+        if self.dimensions is not None and self.dimensions <= 0:
+            raise ValueError("dimensions must be a positive integer")
+
+    @property
+    def is_lossy(self) -> bool:
+        """Whether the search matrix loses information compared to the original vectors."""
+        return self.dtype != 'float32' or self.dimensions is not None
+
+
+def _append_rows(buffer: Optional[np.ndarray], count: int, rows: np.ndarray) -> np.ndarray:
+    """
+    Write rows after the first `count` rows of a buffer, growing it when full.
+
+    Capacity doubles on growth, so appending n rows in batches copies O(n)
+    rows in total. Read-only buffers (memory-mapped archives) are copied.
+
+    Returns:
+        The buffer holding the rows, possibly a new one
+    """
+    needed = count + len(rows)
+    if buffer is None or needed > len(buffer) or not buffer.flags.writeable:
+        capacity = max(needed, 2 * count)
+        grown = np.empty((capacity, *rows.shape[1:]), dtype=rows.dtype)
+        if buffer is not None:
+            grown[:count] = buffer[:count]
+        buffer = grown
+    buffer[count:needed] = rows
+    return buffer
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row, leaving all-zero rows untouched."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class EmbeddingStore:
+    """
+    Row-major matrix of unit-length element embeddings keyed by semantic id.
+
+    Vectors are normalized on insertion, so cosine similarity is a single
+    matrix-vector product. The search matrix may be truncated and/or stored
+    as float16 or int8 (one scale per row); when `keep_full_precision` is set
+    an additional float32 copy is kept for exact rescoring of candidates.
+
+    Rows live in buffers that double in capacity as vectors are appended,
+    so embedding in many small batches costs no more than one large batch.
+
+    The store behaves like a read-only mapping of semantic_id -> vector so it
+    can stand in for the plain dict snapshots used to carry.
+    """
+
+    def __init__(self, config: Optional[EmbeddingStorageConfig] = None):
+        self.config = config or EmbeddingStorageConfig()
+        self.ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        # Buffers with spare rows at the end; the first len(ids) rows are in use
+        self._matrix_buffer: Optional[np.ndarray] = None
+        self._scales_buffer: Optional[np.ndarray] = None
+        self._full_buffer: Optional[np.ndarray] = None
+        self._coarse: Dict[int, np.ndarray] = {}
+        self.full_dimension: Optional[int] = None
+
+    @property
+    def _matrix(self) -> Optional[np.ndarray]:
+        """Search matrix rows in use (a view of the buffer)."""
+        return None if self._matrix_buffer is None else self._matrix_buffer[:len(self.ids)]
+
+    @property
+    def _scales(self) -> Optional[np.ndarray]:
+        """Per-row scales of an int8 matrix, rows in use."""
+        return None if self._scales_buffer is None else self._scales_buffer[:len(self.ids)]
+
+    @property
+    def _full(self) -> Optional[np.ndarray]:
+        """Full-precision rows in use, if kept."""
+        return None if self._full_buffer is None else self._full_buffer[:len(self.ids)]
+
+    @classmethod
+    def from_vectors(
+        cls,
+        vectors: Dict[str, Sequence[float]],
+        config: Optional[EmbeddingStorageConfig] = None
+    ) -> 'EmbeddingStore':
+        """
+        Build a store from a mapping of semantic_id -> embedding vector.
+
+        Args:
+            vectors: Embedding vectors keyed by semantic id
+            config: Storage configuration (defaults to float32, all dimensions)
+
+        Returns:
+            EmbeddingStore holding the encoded vectors
+        """
+        store = cls(config)
+        store.add_many(vectors)
+        return store
+
+    @classmethod
+    def from_arrays(
+        cls,
+        ids: List[str],
+        matrix: np.ndarray,
+        scales: Optional[np.ndarray] = None,
+        full: Optional[np.ndarray] = None,
+        config: Optional[EmbeddingStorageConfig] = None,
+        full_dimension: Optional[int] = None
+    ) -> 'EmbeddingStore':
+        """
+        Wrap already encoded arrays, e.g. memory-mapped from a snapshot archive, without copying them.
+
+        Args:
+            ids: Semantic id of every matrix row
+            matrix: Encoded search matrix, one row per id
+            scales: Per-row scales of an int8 matrix
+            full: Full-precision float32 rows, if kept
+            config: Storage configuration the arrays were encoded with
+            full_dimension: Dimension of the original vectors. None uses the matrix width.
+
+        Returns:
+            EmbeddingStore over the given arrays
+        """
+        if len(matrix) != len(ids):
+            raise ValueError(f"Matrix has {len(matrix)} rows for {len(ids)} ids")
+
+        store = cls(config)
+        if ids:
+            store.ids = list(ids)
+            store._index = {semantic_id: row for row, semantic_id in enumerate(store.ids)}
+            store._matrix_buffer = matrix
+            store._scales_buffer = scales
+            store._full_buffer = full
+            store.full_dimension = full_dimension or matrix.shape[1]
+        return store
+
+    def add_many(self, vectors: Dict[str, Sequence[float]]) -> None:
+        """
+        Encode and append vectors. Ids already in the store are overwritten in place.
+
+        Args:
+            vectors: Embedding vectors keyed by semantic id
+        """
+        if not vectors:
+            return
+
+        # Cached coarse views are rebuilt on next use
+        self._coarse.clear()
+
+        new_ids = [semantic_id for semantic_id in vectors if semantic_id not in self._index]
+        existing_ids = [semantic_id for semantic_id in vectors if semantic_id in self._index]
+
+        if new_ids:
+            raw = np.asarray([vectors[semantic_id] for semantic_id in new_ids], dtype=np.float32)
+            compact, scales, full = self._encode(raw)
+            offset = len(self.ids)
+            self._matrix_buffer = _append_rows(self._matrix_buffer, offset, compact)
+            if scales is not None:
+                self._scales_buffer = _append_rows(self._scales_buffer, offset, scales)
+            if full is not None:
+                self._full_buffer = _append_rows(self._full_buffer, offset, full)
+            for i, semantic_id in enumerate(new_ids):
+                self._index[semantic_id] = offset + i
+            self.ids.extend(new_ids)
+
+        if existing_ids:
+            raw = np.asarray([vectors[semantic_id] for semantic_id in existing_ids], dtype=np.float32)
+            compact, scales, full = self._encode(raw)
+            rows = np.array([self._index[semantic_id] for semantic_id in existing_ids])
+            if not self._matrix_buffer.flags.writeable:
+                # Read-only arrays (a shared or memory-mapped snapshot) are copied on first overwrite
+                self._matrix_buffer = self._matrix.copy()
+                self._scales_buffer = None if self._scales is None else self._scales.copy()
+                self._full_buffer = None if self._full is None else self._full.copy()
+            self._matrix_buffer[rows] = compact
+            if scales is not None:
+                self._scales_buffer[rows] = scales
+            if full is not None:
+                self._full_buffer[rows] = full
+
+    def remove_many(self, semantic_ids: Iterable[str]) -> int:
+        """
+        Drop the vectors of the given ids, compacting the arrays.
+
+        Args:
+            semantic_ids: Ids to remove; ids without a vector are ignored
+
+        Returns:
+            Number of vectors removed
+        """
+        rows = [self._index[semantic_id] for semantic_id in semantic_ids if semantic_id in self._index]
+        if not rows:
+            return 0
+
+        keep = np.ones(len(self.ids), dtype=bool)
+        keep[rows] = False
+        self._matrix_buffer = self._matrix[keep]
+        if self._scales_buffer is not None:
+            self._scales_buffer = self._scales[keep]
+        if self._full_buffer is not None:
+            self._full_buffer = self._full[keep]
+        self._coarse.clear()
+
+        self.ids = [semantic_id for semantic_id, kept in zip(self.ids, keep) if kept]
+        self._index = {semantic_id: row for row, semantic_id in enumerate(self.ids)}
+        return len(rows)
+
+    def _encode(self, raw: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+        """Turn raw vectors into (search matrix, int8 scales, full-precision matrix)."""
+        if self.full_dimension is None:
+            self.full_dimension = raw.shape[1]
+        elif raw.shape[1] != self.full_dimension:
+            raise ValueError(f"Embedding dimension {raw.shape[1]} does not match store dimension {self.full_dimension}")
+
+        full = _normalize_rows(raw)
+
+        compact = full
+        if self.config.dimensions is not None and self.config.dimensions < full.shape[1]:
+            # Matryoshka truncation: keep the leading dimensions and re-normalize
+            compact = _normalize_rows(full[:, :self.config.dimensions])
+
+        scales = None
+        if self.config.dtype == 'int8':
+            # Symmetric per-row scalar quantization
+            max_abs = np.abs(compact).max(axis=1)
+            max_abs[max_abs == 0] = 1.0
+            scales = (max_abs / 127.0).astype(np.float32)
+            compact = np.round(compact / scales[:, None]).astype(np.int8)
+        elif self.config.dtype == 'float16':
+            compact = compact.astype(np.float16)
+        else:
+            compact = np.ascontiguousarray(compact, dtype=np.float32)
+
+        keep_full = self.config.keep_full_precision and self.config.is_lossy
+        return compact, scales, (full if keep_full else None)
+
+    @property
+    def dimension(self) -> Optional[int]:
+        """Dimension of the search matrix."""
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    @property
+    def has_full_precision(self) -> bool:
+        """Whether exact rescoring vectors are available."""
+        return self._full is not None
+
+    def row(self, semantic_id: str) -> Optional[int]:
+        """Get the matrix row of a semantic id, or None if it has no embedding."""
+        return self._index.get(semantic_id)
+
+    def prepare_query(self, query: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Normalize a query vector for this store.
+
+        Returns:
+            Tuple of (query for the search matrix, query for full-precision rescoring)
+        """
+        full = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(full)
+        if norm > 0:
+            full = full / norm
+
+        compact = full
+        if self.dimension is not None and self.dimension < full.shape[0]:
+            compact = full[:self.dimension]
+            norm = np.linalg.norm(compact)
+            if norm > 0:
+                compact = compact / norm
+        return compact, full
+
+    def scores(self, query: Sequence[float], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Cosine similarity of a query against the (possibly compact) search matrix.
+
+        Args:
+            query: Query embedding vector
+            rows: Optional row indices to restrict scoring to
+
+        Returns:
+            Array of similarities aligned with `rows` (or with all rows)
+        """
+        if self._matrix is None:
+            return np.zeros(0, dtype=np.float32)
+
+        compact_query, _ = self.prepare_query(query)
+        matrix = self._take(self._matrix, rows)
+
+        if matrix.dtype == np.float32:
+            result = matrix @ compact_query
+        else:
+            # Decode a cache-sized block at a time instead of a float32 copy of the whole matrix
+            result = np.empty(len(matrix), dtype=np.float32)
+            decoded = np.empty((min(SCORE_BLOCK_ROWS, len(matrix)), matrix.shape[1]), dtype=np.float32)
+            for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+                block = matrix[start:start + SCORE_BLOCK_ROWS]
+                np.copyto(decoded[:len(block)], block, casting='unsafe')
+                result[start:start + len(block)] = decoded[:len(block)] @ compact_query
+        if self._scales is not None:
+            result *= self._take(self._scales, rows)
+        return result
+
+    def coarse_scores(self, query: Sequence[float], dimensions: int, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Approximate cosine similarity on the first `dimensions` dimensions only.
+
+        The truncated, re-normalized view is built once and cached, so a
+        first-pass scan touches a fraction of the memory of the search matrix.
+
+        Args:
+            query: Query embedding vector
+            dimensions: Number of leading dimensions to score on
+            rows: Optional row indices to restrict scoring to
+
+        Returns:
+            Array of approximate similarities aligned with `rows` (or with all rows)
+        """
+        if self._matrix is None:
+            return np.zeros(0, dtype=np.float32)
+        if dimensions >= self.dimension:
+            return self.scores(query, rows)
+
+        view = self._coarse.get(dimensions)
+        if view is None:
+            prefix = self._matrix[:, :dimensions].astype(np.float32)
+            view = np.ascontiguousarray(_normalize_rows(prefix))
+            self._coarse[dimensions] = view
+
+        compact_query, _ = self.prepare_query(query)
+        prefix_query = compact_query[:dimensions]
+        norm = np.linalg.norm(prefix_query)
+        if norm > 0:
+            prefix_query = prefix_query / norm
+
+        return self._take(view, rows) @ prefix_query
+
+    def exact_scores(self, query: Sequence[float], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Cosine similarity using full-precision vectors when they are kept.
+
+        Falls back to `scores` when the store has no full-precision copy.
+        """
+        if self._full is None:
+            return self.scores(query, rows)
+
+        _, full_query = self.prepare_query(query)
+        return self._take(self._full, rows) @ full_query
+
+    @staticmethod
+    def _take(array: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Select rows of an array, avoiding a copy when all rows are requested.
+
+        `rows` are expected to be unique and ascending, as produced by callers.
+        """
+        if rows is None:
+            return array
+        if len(rows) == len(array) and (len(rows) == 0 or (rows[0] == 0 and rows[-1] == len(array) - 1)):
+            return array
+        return array[rows]
+
+    def nbytes(self) -> int:
+        """Memory held by the vector arrays in bytes, spare buffer rows included."""
+        total = 0
+        for array in (self._matrix_buffer, self._scales_buffer, self._full_buffer, *self._coarse.values()):
+            if array is not None:
+                total += array.nbytes
+        return total
+
+    def _vector(self, row: int) -> np.ndarray:
+        if self._full is not None:
+            return self._full[row]
+        vector = self._matrix[row].astype(np.float32)
+        if self._scales is not None:
+            vector *= self._scales[row]
+        return vector
+
+    def __getitem__(self, semantic_id: str) -> np.ndarray:
+        return self._vector(self._index[semantic_id])
+
+    def __contains__(self, semantic_id: object) -> bool:
+        return semantic_id in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def keys(self) -> List[str]:
+        return list(self.ids)
+
+    def items(self) -> Iterator[Tuple[str, np.ndarray]]:
+        for row, semantic_id in enumerate(self.ids):
+            yield semantic_id, self._vector(row)
@@ -1,13 +1,89 @@
-from typing import List, Optional
+from typing import Dict, List, Mapping, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import hashlib
 import os
+import re
+import zlib
 from abc import ABC, abstractmethod
 
-# Try to load .env file if available
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass  # dotenv not available, use environment variables only
+_environment_loaded = False
+
+
+def load_environment() -> None:
+    """Load a .env file into the environment once, if python-dotenv is installed."""
+    global _environment_loaded
+    if _environment_loaded:
+        return
+    _environment_loaded = True
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass  # dotenv not available, use environment variables only
+
+
+class TransientEmbeddingError(RuntimeError):
+    """Provider failure worth retrying: overloaded, unreachable or timed out."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitError(TransientEmbeddingError):
+    """Provider rejected a request because a request or token rate limit was hit."""
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse rate limit reset durations such as '20ms', '1s' or '6m0.5s' into seconds."""
+    total = 0.0
+    for amount, unit in re.findall(r'(\d+(?:\.\d+)?)(ms|s|m|h)', value):
+        total += float(amount) * {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}[unit]
+    if total == 0.0:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return total
+
+
+def parse_rate_limit_headers(headers: Mapping[str, str]) -> Dict[str, float]:
+    """
+    Read OpenAI-style x-ratelimit-* response headers.
+
+    Args:
+        headers: Response headers
+
+    Returns:
+        Dict with any of limit_requests, remaining_requests, reset_requests,
+        limit_tokens, remaining_tokens and reset_tokens (resets in seconds)
+    """
+    limits = {}
+    for kind in ('requests', 'tokens'):
+        for field in ('limit', 'remaining', 'reset'):
+            value = headers.get(f'x-ratelimit-{field}-{kind}')
+            if value is None:
+                continue
+            parsed = _parse_duration(value) if field == 'reset' else float(value)
+            if parsed is not None:
+                limits[f'{field}_{kind}'] = parsed
+    return limits
+
+
+def _retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    if not headers:
+        return None
+    for name in ('retry-after-ms', 'retry-after'):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            seconds = float(value)
+        except ValueError:
+            continue
+        return seconds / 1000.0 if name == 'retry-after-ms' else seconds
+    return None
 
 
 class EmbeddingProvider(ABC):
@@ -18,6 +94,10 @@ class EmbeddingProvider(ABC):
         """Create embedding vector from text."""
         pass
 
+    def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Create embedding vectors for several texts. Providers with a batch API override this."""
+        return [self.create_embedding(text) for text in texts]
+
     @abstractmethod
     def get_dimension(self) -> int:
         """Get the dimension of embeddings from this provider."""
@@ -27,9 +107,34 @@ class EmbeddingProvider(ABC):
 class OpenAIEmbeddingProvider(EmbeddingProvider):
     """OpenAI embedding provider using text-embedding-3-large."""
 
-    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        dimensions: Optional[int] = None,
+        base_url: Optional[str] = None,
+        max_retries: Optional[int] = None
+    ):
+        """
+        Initialize provider.
+
+        Args:
+            api_key: OpenAI API key. Defaults to OPENAI_API_KEY.
+            model: Embedding model. Defaults to OPENAI_EMBEDDING_MODEL or text-embedding-3-large.
+            dimensions: Ask the API for shortened (Matryoshka) embeddings.
+                Only supported by the text-embedding-3 models.
+            base_url: API endpoint, e.g. a proxy or a local stand-in server.
+                Defaults to OPENAI_BASE_URL or the OpenAI API.
+            max_retries: Retries of the OpenAI client itself. Set to 0 when wrapping
+                the provider in a RateLimitedEmbeddingProvider, which retries instead.
+        """
+        load_environment()
         self.model = model or os.getenv('OPENAI_EMBEDDING_MODEL', 'text-embedding-3-large')
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.dimensions = dimensions
+        self.base_url = base_url or os.getenv('OPENAI_BASE_URL')
+        # x-ratelimit-* values of the last response (see parse_rate_limit_headers)
+        self.rate_limits: Dict[str, float] = {}
 
         # Model dimensions
         self._dimensions = {
@@ -38,10 +143,16 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
             "text-embedding-ada-002": 1536
         }
 
+        if dimensions is not None and not self.model.startswith("text-embedding-3"):
+            raise ValueError(f"Model {self.model} does not support shortened embeddings")
+
         # Try to import OpenAI
         try:
             from openai import OpenAI
-            self.client = OpenAI(api_key=self.api_key) if self.api_key else None
+            client_args = {"base_url": self.base_url} if self.base_url else {}
+            if max_retries is not None:
+                client_args["max_retries"] = max_retries
+            self.client = OpenAI(api_key=self.api_key, **client_args) if self.api_key else None
             self._openai_available = True
         except ImportError:
             self.client = None
@@ -49,6 +160,16 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
 
     def create_embedding(self, text: str) -> List[float]:
         """Create embedding using OpenAI API."""
+        return self._request(text).data[0].embedding
+
+    def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Create embeddings for several texts in a single API request."""
+        if not texts:
+            return []
+        response = self._request(texts)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def _request(self, embedding_input):
         if not self._openai_available:
             raise RuntimeError("OpenAI package not available. Install with: pip install openai")
 
@@ -56,17 +177,38 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
             raise RuntimeError("OpenAI API key not provided. Set OPENAI_API_KEY environment variable.")
 
         try:
-            response = self.client.embeddings.create(
+            extra_args = {"dimensions": self.dimensions} if self.dimensions else {}
+            raw = self.client.embeddings.with_raw_response.create(
                 model=self.model,
-                input=text,
-                encoding_format="float"
+                input=embedding_input,
+                encoding_format="float",
+                **extra_args
             )
-            return response.data[0].embedding
         except Exception as e:
-            raise RuntimeError(f"OpenAI API error: {e}")
+            raise self._translate_error(e)
+
+        self.rate_limits = parse_rate_limit_headers(raw.headers)
+        return raw.parse()
+
+    @staticmethod
+    def _translate_error(error: Exception) -> RuntimeError:
+        """Map OpenAI client errors to RateLimitError, TransientEmbeddingError or RuntimeError."""
+        from openai import APIConnectionError
+
+        status = getattr(error, 'status_code', None)
+        response = getattr(error, 'response', None)
+        retry_after = _retry_after(getattr(response, 'headers', None))
+
+        if status == 429:
+            return RateLimitError(f"OpenAI rate limit: {error}", retry_after)
+        if (status is not None and status >= 500) or isinstance(error, APIConnectionError):
+            return TransientEmbeddingError(f"OpenAI API unavailable: {error}", retry_after)
+        return RuntimeError(f"OpenAI API error: {error}")
 
     def get_dimension(self) -> int:
         """Get embedding dimension for the current model."""
+        if self.dimensions:
+            return self.dimensions
         return self._dimensions.get(self.model, 3072)
 
 
@@ -78,8 +220,8 @@ class DummyEmbeddingProvider(EmbeddingProvider):
 
     def create_embedding(self, text: str) -> List[float]:
         """Create dummy embedding vector."""
-        # Simple hash-based pseudo-embedding for consistent results
-        hash_val = hash(text) % 1000000
+        # Simple hash-based pseudo-embedding for consistent results (crc32, unlike hash(), is stable across processes)
+        hash_val = zlib.crc32(text.encode('utf-8')) % 1000000
         base_val = hash_val / 1000000.0
         return [base_val + (i * 0.001) for i in range(self.dimension)]
 
@@ -88,29 +230,86 @@ class DummyEmbeddingProvider(EmbeddingProvider):
         return self.dimension
 
 
+class EmbeddingCache:
+    """
+    Bounded LRU cache of embeddings keyed by a digest of the embedded text.
+
+    Shared by the pages of a pool, so elements that look the same on many
+    pages (navigation, headers, repeated widgets) are embedded once.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[bytes, List[float]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = self.key(text)
+        vector = self._entries.get(key)
+        if vector is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return vector
+
+    def put(self, text: str, vector: List[float]) -> None:
+        key = self.key(text)
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class Embedder:
     """Main class for creating embeddings with different providers."""
 
-    def __init__(self, provider: Optional[EmbeddingProvider] = None):
+    def __init__(self, provider: Optional[EmbeddingProvider] = None, cache: Optional[EmbeddingCache] = None):
         """
         Initialize embedder.
 
         Args:
-            provider: Embedding provider to use. If None, will auto-select based on availability.
+            provider: Embedding provider to use. If None, will auto-select based on
+                availability when first needed.
+            cache: Optional cache consulted before the provider for batch requests
         """
-        if provider:
-            self.provider = provider
-        else:
-            # Auto-select provider
-            try:
-                self.provider = OpenAIEmbeddingProvider()
-                # Test if OpenAI is actually available
-                if not self.provider._openai_available or not self.provider.client:
-                    raise RuntimeError("OpenAI not available")
-                print("✅ Using OpenAI embedding provider")
-            except (ImportError, RuntimeError):
-                print("⚠️ OpenAI not available, using dummy embeddings")
-                self.provider = DummyEmbeddingProvider()
+        self.cache = cache
+        self._provider = provider
+
+    @property
+    def provider(self) -> EmbeddingProvider:
+        """Embedding provider, auto-selected on first use when none was given."""
+        if self._provider is None:
+            self._provider = self._select_provider()
+        return self._provider
+
+    @provider.setter
+    def provider(self, provider: EmbeddingProvider) -> None:
+        self._provider = provider
+
+    @staticmethod
+    def _select_provider() -> EmbeddingProvider:
+        try:
+            openai_provider = OpenAIEmbeddingProvider(max_retries=0)
+            # Test if OpenAI is actually available
+            if not openai_provider._openai_available or not openai_provider.client:
+                raise RuntimeError("OpenAI not available")
+            # Retries and pacing happen in the wrapper, so a 429 does not abort a snapshot
+            from .rate_limited_provider import RateLimitedEmbeddingProvider
+            print("✅ Using OpenAI embedding provider")
+            return RateLimitedEmbeddingProvider(openai_provider)
+        except (ImportError, RuntimeError):
+            print("⚠️ OpenAI not available, using local hashing embeddings")
+            from .hashing_embeddings import HashingEmbeddingProvider
+            return HashingEmbeddingProvider()
 
     def create_embedding(self, text: str) -> List[float]:
         """
@@ -124,6 +323,68 @@ class Embedder:
         """
         return self.provider.create_embedding(text)
 
+    async def acreate_embedding(self, text: str) -> List[float]:
+        """
+        Create embedding vector from text without blocking the event loop.
+
+        Args:
+            text: Input text to embed
+
+        Returns:
+            Embedding vector
+        """
+        return await asyncio.to_thread(self.provider.create_embedding, text)
+
+    def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Create embedding vectors for several texts, batched by the provider.
+
+        Args:
+            texts: Input texts to embed
+
+        Returns:
+            Embedding vectors in the same order as the texts
+        """
+        vectors, missing = self._from_cache(texts)
+        if missing:
+            self._fill(vectors, texts, missing, self.provider.create_embeddings([texts[i] for i in missing]))
+        return vectors
+
+    async def acreate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Create embedding vectors for several texts without blocking the event loop.
+
+        Args:
+            texts: Input texts to embed
+
+        Returns:
+            Embedding vectors in the same order as the texts
+        """
+        vectors, missing = self._from_cache(texts)
+        if missing:
+            created = await asyncio.to_thread(self.provider.create_embeddings, [texts[i] for i in missing])
+            self._fill(vectors, texts, missing, created)
+        return vectors
+
+    def _from_cache(self, texts: List[str]) -> Tuple[List[Optional[List[float]]], List[int]]:
+        """Look texts up in the cache; returns (vectors with None for misses, indices of misses)."""
+        if self.cache is None:
+            return [None] * len(texts), list(range(len(texts)))
+        vectors = [self.cache.get(text) for text in texts]
+        return vectors, [i for i, vector in enumerate(vectors) if vector is None]
+
+    def _fill(
+        self,
+        vectors: List[Optional[List[float]]],
+        texts: List[str],
+        missing: List[int],
+        created: List[List[float]]
+    ) -> None:
+        for i, vector in zip(missing, created):
+            vectors[i] = vector
+            if self.cache is not None:
+                self.cache.put(texts[i], vector)
+
     def get_dimension(self) -> int:
         """Get the dimension of embeddings from current provider."""
         return self.provider.get_dimension()
@@ -0,0 +1,263 @@
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+from .embeddings import EmbeddingProvider
+
+
+# Polynomial hashing of byte spans modulo 2**32 (uint32 arithmetic wraps):
+# hash(b[s:e]) = sum(b[j] * P**(e-1-j)). With prefix sums of b[j] * P**-j, any
+# span hashes in O(1), so every n-gram and word is hashed without a Python loop.
+_HASH_BASE = 0x01000193
+_HASH_BASE_INVERSE = pow(_HASH_BASE, -1, 2 ** 32)
+_WORD_SALT = 0x9E3779B9
+# Bytes that belong to words: ASCII letters, digits, underscore and all non-ASCII bytes
+_WORD_BYTES = np.array([byte >= 128 or chr(byte).isalnum() or chr(byte) == '_' for byte in range(256)])
+# Occurrence positions are packed below the feature key when sorting
+_POSITION_BITS = 20
+_KEY_BITS = 63 - _POSITION_BITS
+# Characters embedded per vectorized pass: keeps the working arrays small enough to stay in CPU cache
+_CHUNK_CHARACTERS = 1 << 16
+# With a position half-life, text further than this many half-lives in is not hashed
+_HALF_LIVES_KEPT = 10
+
+
+def _powers(base: int, count: int) -> np.ndarray:
+    powers = np.full(count, base, dtype=np.uint32)
+    if count:
+        powers[0] = 1
+    return np.cumprod(powers, dtype=np.uint32)
+
+
+def _mix(hashes: np.ndarray, seed: int) -> np.ndarray:
+    """Scramble 32-bit hashes (murmur3 finalizer) so bucket indices use all their bits."""
+    hashes = hashes ^ np.uint32(seed & 0xFFFFFFFF)
+    hashes ^= hashes >> np.uint32(16)
+    hashes *= np.uint32(0x85EBCA6B)
+    hashes ^= hashes >> np.uint32(13)
+    hashes *= np.uint32(0xC2B2AE35)
+    hashes ^= hashes >> np.uint32(16)
+    return hashes
+
+
+def _group_starts(sorted_keys: np.ndarray) -> np.ndarray:
+    """Indices where a new value starts in a sorted array."""
+    if len(sorted_keys) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]]))
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Local CPU embedding provider: hashed n-gram features, TF-IDF weighted, randomly projected.
+
+    Texts are lowercased and broken into character n-grams (over UTF-8 bytes,
+    padded with spaces so n-grams at word edges are distinct) and word unigrams
+    and bigrams. Features are hashed into `n_features` buckets and weighted by
+    sublinear term frequency times inverse document frequency, then projected
+    to `dimension` with a fixed sparse random projection (each feature adds to
+    `projection_density` coordinates with random signs; with 1 this is the
+    signed hashing trick) and L2-normalized.
+
+    Everything is vectorized over a batch and seeded, so vectors are identical
+    across processes and machines. Without `fit`, all features have an IDF of 1.
+    """
+
+    def __init__(
+        self,
+        dimension: int = 384,
+        char_ngrams: Tuple[int, ...] = (3, 4, 5),
+        word_ngrams: Tuple[int, ...] = (1, 2),
+        n_features: int = 2 ** 18,
+        projection_density: int = 1,
+        position_half_life: Optional[float] = 500.0,
+        seed: int = 0
+    ):
+        """
+        Initialize provider.
+
+        Args:
+            dimension: Dimension of the embeddings
+            char_ngrams: Lengths of character n-grams
+            word_ngrams: Lengths of word n-grams
+            n_features: Number of hashed feature buckets (IDF is kept per bucket)
+            projection_density: Output coordinates every feature contributes to
+            position_half_life: Characters after which an occurrence counts half as much.
+                Reverse trees describe the target element first, so this favours it
+                over distant context. None weighs all positions equally.
+            seed: Seed of the random projection
+        """
+        if dimension <= 0 or projection_density <= 0:
+            raise ValueError("dimension and projection_density must be positive")
+        if not 0 < n_features <= 2 ** 31:
+            raise ValueError("n_features must be between 1 and 2**31")
+
+        self.dimension = dimension
+        self.char_ngrams = tuple(char_ngrams)
+        self.word_ngrams = tuple(word_ngrams)
+        self.n_features = n_features
+        self.projection_density = projection_density
+        self.position_half_life = position_half_life
+        self.seed = seed
+
+        rng = np.random.default_rng(seed)
+        self._buckets = rng.integers(0, dimension, size=(n_features, projection_density), dtype=np.int64)
+        self._signs = (rng.integers(0, 2, size=(n_features, projection_density)) * 2 - 1).astype(np.float32)
+        self._signs /= np.sqrt(projection_density)
+        self.idf = np.ones(n_features, dtype=np.float32)
+        self._forward_powers = np.ones(0, dtype=np.uint32)
+        self._inverse_powers = np.ones(0, dtype=np.uint32)
+
+    def fit(self, texts: List[str]) -> 'HashingEmbeddingProvider':
+        """
+        Learn inverse document frequencies from a corpus, e.g. the texts of a site's pages.
+
+        Args:
+            texts: Corpus texts
+
+        Returns:
+            The provider itself
+        """
+        document_frequency = np.zeros(self.n_features, dtype=np.int64)
+        for chunk in self._chunks(texts):
+            docs, features, _ = self._features(chunk)
+            keys = np.sort(docs * self.n_features + features)
+            pairs = keys[_group_starts(keys)]
+            document_frequency += np.bincount(pairs % self.n_features, minlength=self.n_features)
+        self.idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+        return self
+
+    def create_embedding(self, text: str) -> List[float]:
+        """Create embedding vector from text."""
+        return self.embed([text])[0].tolist()
+
+    def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Create embedding vectors for several texts in one vectorized pass."""
+        if not texts:
+            return []
+        return self.embed(texts).tolist()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts into a float32 matrix, one unit-length row per text.
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            Array of shape (len(texts), dimension)
+        """
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        row = 0
+        for chunk in self._chunks(texts):
+            matrix[row:row + len(chunk)] = self._embed_chunk(chunk)
+            row += len(chunk)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def get_dimension(self) -> int:
+        """Get embedding dimension."""
+        return self.dimension
+
+    def _chunks(self, texts: List[str]) -> Iterator[List[str]]:
+        """Split a batch so each vectorized pass holds a bounded number of characters and keys."""
+        max_texts = max(1, (1 << _KEY_BITS) // self.n_features)
+        chunk: List[str] = []
+        characters = 0
+        for text in texts:
+            if chunk and (characters + len(text) > _CHUNK_CHARACTERS or len(chunk) >= max_texts):
+                yield chunk
+                chunk, characters = [], 0
+            chunk.append(text)
+            characters += len(text)
+        if chunk:
+            yield chunk
+
+    def _embed_chunk(self, texts: List[str]) -> np.ndarray:
+        docs, features, positions = self._features(texts)
+        keys = docs * self.n_features + features
+
+        if self.position_half_life:
+            # Sort keys with positions packed below them, then sum decayed occurrences per key
+            packed = np.sort((keys << _POSITION_BITS) | np.minimum(positions, (1 << _POSITION_BITS) - 1))
+            keys = packed >> _POSITION_BITS
+            occurrences = np.exp2(-(packed & ((1 << _POSITION_BITS) - 1)) / self.position_half_life)
+            starts = _group_starts(keys)
+            frequencies = np.add.reduceat(occurrences, starts) if len(starts) else occurrences
+        else:
+            keys = np.sort(keys)
+            starts = _group_starts(keys)
+            frequencies = np.diff(np.append(starts, len(keys))).astype(np.float64)
+
+        keys = keys[starts]
+        docs, features = keys // self.n_features, keys % self.n_features
+        weights = np.log1p(frequencies).astype(np.float32) * self.idf[features]
+
+        flat = (docs[:, None] * self.dimension + self._buckets[features]).ravel()
+        values = (self._signs[features] * weights[:, None]).ravel()
+        matrix = np.bincount(flat, weights=values, minlength=len(texts) * self.dimension)
+        return matrix.reshape(len(texts), self.dimension)
+
+    def _features(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Hashed features of a batch as parallel arrays of (text index, feature bucket, offset in text)."""
+        limit = None
+        if self.position_half_life:
+            # Beyond ten half-lives an occurrence weighs less than 0.1%
+            limit = int(self.position_half_life * _HALF_LIVES_KEPT)
+        # Texts padded with spaces and joined with NUL separators; n-grams spanning a separator are dropped
+        encoded = [b' ' + text[:limit].lower().encode('utf-8') + b' ' for text in texts]
+        buffer = np.frombuffer(b'\x00'.join(encoded), dtype=np.uint8)
+        lengths = np.array([len(chunk) for chunk in encoded], dtype=np.int64)
+        doc_of = np.repeat(np.arange(len(texts), dtype=np.int64), lengths + 1)[:len(buffer)]
+        position_of = np.arange(len(buffer), dtype=np.int64) - np.repeat(np.cumsum(lengths + 1) - lengths - 1, lengths + 1)[:len(buffer)]
+
+        forward, inverse = self._hash_powers(len(buffer))
+        prefix = np.zeros(len(buffer) + 1, dtype=np.uint32)
+        np.cumsum((buffer.astype(np.uint32) + 1) * inverse, dtype=np.uint32, out=prefix[1:])
+        separators = np.zeros(len(buffer) + 1, dtype=np.int32)
+        np.cumsum(buffer == 0, dtype=np.int32, out=separators[1:])
+
+        all_docs, all_hashes, all_positions = [], [], []
+        for n in self.char_ngrams:
+            count = len(buffer) - n + 1
+            if count <= 0:
+                continue
+            # N-grams start at every byte, so spans are slices rather than gathers
+            hashes = (prefix[n:n + count] - prefix[:count]) * forward[n - 1:n - 1 + count]
+            valid = separators[n:n + count] == separators[:count]
+            all_docs.append(doc_of[:count][valid])
+            all_hashes.append(hashes[valid] ^ np.uint32(n))
+            all_positions.append(position_of[:count][valid])
+
+        is_word = _WORD_BYTES[buffer]
+        edges = np.diff(np.concatenate([[False], is_word, [False]]).astype(np.int8))
+        word_starts, word_ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        words = (prefix[word_ends] - prefix[word_starts]) * forward[word_ends - 1]
+        word_docs = doc_of[word_starts]
+        word_positions = position_of[word_starts]
+        for n in self.word_ngrams:
+            count = len(words) - n + 1
+            if count <= 0:
+                continue
+            # Salted so word features never collide systematically with character n-grams
+            hashes = np.full(count, (_WORD_SALT * n) & 0xFFFFFFFF, dtype=np.uint32)
+            for offset in range(n):
+                hashes = (hashes ^ words[offset:offset + count]) * np.uint32(_HASH_BASE)
+            valid = word_docs[n - 1:n - 1 + count] == word_docs[:count]
+            all_docs.append(word_docs[:count][valid])
+            all_hashes.append(hashes[valid])
+            all_positions.append(word_positions[:count][valid])
+
+        if not all_docs:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        hashes = _mix(np.concatenate(all_hashes), self.seed)
+        features = (hashes % np.uint32(self.n_features)).astype(np.int64)
+        return np.concatenate(all_docs), features, np.concatenate(all_positions)
+
+    def _hash_powers(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Powers of the hash base and of its inverse, cached and grown as longer batches come in."""
+        if len(self._forward_powers) < count:
+            size = max(count, 2 * len(self._forward_powers))
+            self._forward_powers = _powers(_HASH_BASE, size)
+            self._inverse_powers = _powers(_HASH_BASE_INVERSE, size)
+        return self._forward_powers[:count], self._inverse_powers[:count]
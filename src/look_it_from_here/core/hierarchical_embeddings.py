@@ -0,0 +1,180 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass
+import numpy as np
+from .semantic_node import SemanticElementNode
+from .embeddings import Embedder
+from .transform.embedding_generation.reverse_tree_text import ReverseTreeWriter
+
+# Parent map under which a description stops at the element itself
+_NO_PARENTS: Dict[str, Optional[SemanticElementNode]] = {}
+
+
+@dataclass
+class HierarchicalEmbeddingConfig:
+    """
+    Embed elements by composition instead of one full reverse tree each.
+
+    Every element's own description (its subtree, without the parent chain)
+    is embedded, every ancestor region once per snapshot, and the element's
+    vector is the weighted sum of its description vector and the vectors of
+    its nearest ancestor regions. Sibling elements share their regions, so
+    the page's context is embedded once rather than once per element.
+
+    Attributes:
+        local_weight: Weight of the element's own description, in (0, 1];
+            the ancestors share the rest
+        ancestor_decay: Weight of each ancestor relative to the one below it, in (0, 1]
+        max_ancestors: Nearest ancestor regions composed into each element
+        local_context_nodes: Cap on content nodes in an element's description
+        region_context_nodes: Cap on content nodes in a region's description
+    """
+    local_weight: float = 0.5
+    ancestor_decay: float = 0.5
+    max_ancestors: int = 3
+    local_context_nodes: int = 20
+    region_context_nodes: int = 40
+
+    def __post_init__(self):
+        if not 0 < self.local_weight <= 1:
+            raise ValueError("local_weight must be in (0, 1]")
+        if not 0 < self.ancestor_decay <= 1:
+            raise ValueError("ancestor_decay must be in (0, 1]")
+        if self.max_ancestors < 0:
+            raise ValueError("max_ancestors must not be negative")
+        if self.local_context_nodes <= 0 or self.region_context_nodes <= 0:
+            raise ValueError("Context node caps must be positive")
+
+    def ancestor_weights(self, count: int) -> List[float]:
+        """Weights of the nearest `count` ancestors, nearest first, summing to 1 - local_weight."""
+        if count == 0:
+            return []
+        decayed = [self.ancestor_decay ** level for level in range(count)]
+        total = sum(decayed)
+        return [(1 - self.local_weight) * weight / total for weight in decayed]
+
+
+class HierarchicalEmbedder:
+    """
+    Builds composed element vectors for one snapshot.
+
+    Region vectors are cached by semantic id, so elements embedded later
+    (on demand, or added by incremental capture) reuse the regions already
+    embedded. A cached region is not re-embedded when content is added below
+    it later.
+    """
+
+    def __init__(self, config: HierarchicalEmbeddingConfig):
+        self.config = config
+        self.region_vectors: Dict[str, np.ndarray] = {}
+        # Characters sent to the embedder so far, descriptions and regions together
+        self.embedded_characters = 0
+        self._writer = ReverseTreeWriter(indent=None, include_prompt=False)
+
+    def embed(
+        self,
+        nodes: List[SemanticElementNode],
+        parent_map: Dict[str, Optional[SemanticElementNode]],
+        embedder: Embedder,
+        max_context_nodes: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Compose the vectors of the given elements, embedding what is missing in one batch.
+
+        Args:
+            nodes: Elements to embed
+            parent_map: Parent mapping of their semantic tree
+            embedder: Embedder instance to use
+            max_context_nodes: Further cap on the elements' own descriptions
+                (e.g. when the snapshot budget runs low)
+
+        Returns:
+            Unit-length vectors keyed by semantic id
+        """
+        if not nodes:
+            return {}
+        texts, regions, ancestors = self._plan(nodes, parent_map, max_context_nodes)
+        return self._compose(nodes, ancestors, regions, embedder.create_embeddings(texts))
+
+    async def aembed(
+        self,
+        nodes: List[SemanticElementNode],
+        parent_map: Dict[str, Optional[SemanticElementNode]],
+        embedder: Embedder,
+        max_context_nodes: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """Async variant of embed."""
+        if not nodes:
+            return {}
+        texts, regions, ancestors = self._plan(nodes, parent_map, max_context_nodes)
+        return self._compose(nodes, ancestors, regions, await embedder.acreate_embeddings(texts))
+
+    def forget(self, semantic_ids: Iterable[str]) -> None:
+        """Drop the cached vectors of regions that left the snapshot."""
+        for semantic_id in semantic_ids:
+            self.region_vectors.pop(semantic_id, None)
+
+    def _plan(
+        self,
+        nodes: List[SemanticElementNode],
+        parent_map: Dict[str, Optional[SemanticElementNode]],
+        max_context_nodes: Optional[int]
+    ) -> Tuple[List[str], List[str], List[List[str]]]:
+        """
+        Texts to embed (element descriptions first, then uncached regions),
+        the region ids in that order, and each element's ancestor ids.
+        """
+        local_nodes = self.config.local_context_nodes
+        if max_context_nodes is not None:
+            local_nodes = min(local_nodes, max_context_nodes)
+
+        texts = [self._writer.write(node, _NO_PARENTS, local_nodes) for node in nodes]
+        regions: List[str] = []
+        planned = set()
+        ancestors = []
+        for node in nodes:
+            node_ancestors = []
+            parent = parent_map.get(node.id)
+            while parent is not None and len(node_ancestors) < self.config.max_ancestors:
+                node_ancestors.append(parent.id)
+                if parent.id not in self.region_vectors and parent.id not in planned:
+                    planned.add(parent.id)
+                    regions.append(parent.id)
+                    texts.append(self._writer.write(parent, _NO_PARENTS, self.config.region_context_nodes))
+                parent = parent_map.get(parent.id)
+            ancestors.append(node_ancestors)
+
+        self.embedded_characters += sum(len(text) for text in texts)
+        return texts, regions, ancestors
+
+    def _compose(
+        self,
+        nodes: List[SemanticElementNode],
+        ancestors: List[List[str]],
+        regions: List[str],
+        vectors: List[List[float]]
+    ) -> Dict[str, np.ndarray]:
+        matrix = _unit_rows(np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1))
+        for position, region_id in enumerate(regions, start=len(nodes)):
+            self.region_vectors[region_id] = matrix[position].copy()
+
+        composed = {}
+        for position, (node, node_ancestors) in enumerate(zip(nodes, ancestors)):
+            # Regions removed while the embedding request was pending are left out
+            regions_above = [
+                self.region_vectors[region_id] for region_id in node_ancestors if region_id in self.region_vectors
+            ]
+            if not regions_above:
+                # The root has no context; its description is all there is
+                composed[node.id] = matrix[position].copy()
+                continue
+            vector = self.config.local_weight * matrix[position]
+            for region_vector, weight in zip(regions_above, self.config.ancestor_weights(len(regions_above))):
+                vector = vector + weight * region_vector
+            composed[node.id] = _unit_rows(vector[np.newaxis])[0]
+        return composed
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row, leaving all-zero rows untouched."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
@@ -1,5 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any, Union
+from typing import TYPE_CHECKING, List, Optional, Dict, Any, Union, Tuple
+
+if TYPE_CHECKING:
+    from .dom_node import DOMElementNode
+    from .budget import SnapshotBudget
+    from .capture_region import RegionCapture
 
 
 class WebElement(ABC):
@@ -28,6 +33,22 @@ class WebElement(ABC):
         """Get child nodes - returns WebElements for element nodes and strings for text nodes."""
         pass
 
+    async def get_bounding_box(self) -> Optional[Dict[str, float]]:
+        """Get x, y, width and height in viewport coordinates, or None if unknown."""
+        return None
+
+    async def get_key(self) -> Optional[str]:
+        """Get a key that stays with this element while it is in the DOM, assigning one if needed. None if unsupported."""
+        return None
+
+    async def get_keyed_children(self) -> Optional[List[Tuple[str, 'WebElement']]]:
+        """Get (key, element) for every element child, keys as in get_key. None if unsupported."""
+        return None
+
+    async def dispose(self) -> None:
+        """Release what the browser holds for this element. It can no longer be acted on afterwards."""
+        return None
+
 class Snapshot(ABC):
     @abstractmethod
     def to_dict(self) -> Optional[Dict[str, Any]]:
@@ -50,3 +71,19 @@ class WebPage(ABC):
     async def get_snapshot(self) -> Snapshot:
         pass
 
+    async def get_viewport(self) -> Optional[Dict[str, float]]:
+        """Get the visible area as x, y, width and height in viewport coordinates, or None if unknown."""
+        return None
+
+    async def capture_dom(
+        self,
+        budget: Optional['SnapshotBudget'] = None,
+        region: Optional['RegionCapture'] = None,
+        root: Optional[WebElement] = None
+    ) -> Optional[Tuple['DOMElementNode', Dict[str, WebElement]]]:
+        """
+        Capture the DOM tree (or the subtree below `root`) in bulk.
+        None means the tree is walked element by element instead.
+        """
+        return None
+
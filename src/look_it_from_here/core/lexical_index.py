@@ -0,0 +1,223 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import math
+import re
+from .semantic_node import SemanticElementNode, SemanticTextNode
+from .constants import LEXICAL_ATTRIBUTES
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Descendant text beyond this many tokens is not indexed for an element;
+# the element's own labels and text always come first
+MAX_DOCUMENT_TOKENS = 64
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class LexicalIndex:
+    """
+    Inverted index with BM25 scoring over the text of semantic elements.
+
+    Each element is indexed by its lexical attributes (aria-label, title,
+    placeholder, alt, value), its own text and the text of its descendants.
+    Lookups need no embedding provider, so exact-label queries such as
+    "Sign in" can be answered without a network round trip.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.document_lengths: Dict[str, int] = {}
+        self._document_terms: Dict[str, List[str]] = {}
+        self._total_length = 0
+
+    @classmethod
+    def from_semantic_tree(cls, semantic_tree: SemanticElementNode) -> 'LexicalIndex':
+        """
+        Build an index with one document per element of a semantic tree.
+
+        Args:
+            semantic_tree: Root of the semantic tree
+
+        Returns:
+            LexicalIndex over every SemanticElementNode in the tree
+        """
+        index = cls()
+        index.add_semantic_tree(semantic_tree)
+        return index
+
+    def add_semantic_tree(self, semantic_tree: SemanticElementNode) -> List[str]:
+        """
+        Add one document per element of a (sub)tree.
+
+        Args:
+            semantic_tree: Root of the tree or subtree to index
+
+        Returns:
+            Tokens of the root's document
+        """
+        def visit(node: SemanticElementNode) -> List[str]:
+            """Index node and return its tokens for the parent document."""
+            tokens = _document_tokens(node, [visit(child) for child in node.get_element_children()])
+            self.add_document(node.id, tokens)
+            return tokens
+
+        return visit(semantic_tree)
+
+    def update_element(self, node: SemanticElementNode) -> None:
+        """
+        Re-index one element from its own text and its children's current documents.
+
+        Call it for every ancestor of a place where elements were added or
+        removed, deepest first, so containers stop matching text that left
+        them and match text that arrived (e.g. appended list items).
+
+        Args:
+            node: Element whose document should be rebuilt
+        """
+        # A child's document terms, in order, contribute exactly what its token list did
+        children_tokens = [self._document_terms.get(child.id, []) for child in node.get_element_children()]
+        self.add_document(node.id, _document_tokens(node, children_tokens))
+
+    def add_document(self, semantic_id: str, tokens: Iterable[str]) -> None:
+        """
+        Add a document to the index.
+
+        Args:
+            semantic_id: Id of the element the document describes
+            tokens: Tokens of the document
+        """
+        frequencies: Dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+        self.add_term_frequencies(semantic_id, frequencies)
+
+    def add_term_frequencies(self, semantic_id: str, frequencies: Dict[str, int]) -> None:
+        """
+        Add a document given as term -> frequency, e.g. as read back from a snapshot archive.
+
+        Args:
+            semantic_id: Id of the element the document describes
+            frequencies: Number of occurrences of every term of the document
+        """
+        if semantic_id in self.document_lengths:
+            self.remove_document(semantic_id)
+
+        for term, frequency in frequencies.items():
+            self.postings.setdefault(term, {})[semantic_id] = frequency
+
+        length = sum(frequencies.values())
+        self.document_lengths[semantic_id] = length
+        self._document_terms[semantic_id] = list(frequencies)
+        self._total_length += length
+
+    def term_frequencies(self, semantic_id: str) -> Dict[str, int]:
+        """Term -> frequency of an indexed document (empty if not indexed)."""
+        return {term: self.postings[term][semantic_id] for term in self._document_terms.get(semantic_id, [])}
+
+    def remove_document(self, semantic_id: str) -> None:
+        """Remove a document from the index if present."""
+        length = self.document_lengths.pop(semantic_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+
+        for term in self._document_terms.pop(semantic_id):
+            postings = self.postings[term]
+            del postings[semantic_id]
+            if not postings:
+                del self.postings[term]
+
+    def scores(self, query: str, candidates: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        BM25 scores of all documents matching at least one query term.
+
+        Scores are divided by the highest score the query could reach, so they
+        fall in [0, 1] and are comparable across queries.
+
+        Args:
+            query: Query text
+            candidates: Optional ids to restrict scoring to
+
+        Returns:
+            Dictionary mapping semantic_id -> normalized BM25 score
+        """
+        terms = set(tokenize(query))
+        num_documents = len(self.document_lengths)
+        if not terms or not num_documents:
+            return {}
+
+        allowed = set(candidates) if candidates is not None else None
+        average_length = self._total_length / num_documents or 1.0
+
+        scores: Dict[str, float] = {}
+        max_score = 0.0
+        for term in terms:
+            postings = self.postings.get(term)
+            # Unknown terms still count towards the attainable maximum
+            document_frequency = len(postings) if postings else 0
+            idf = math.log(1 + (num_documents - document_frequency + 0.5) / (document_frequency + 0.5))
+            max_score += idf * (self.k1 + 1)
+            if not postings:
+                continue
+
+            for semantic_id, frequency in postings.items():
+                if allowed is not None and semantic_id not in allowed:
+                    continue
+                length_norm = 1 - self.b + self.b * self.document_lengths[semantic_id] / average_length
+                term_score = idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+                scores[semantic_id] = scores.get(semantic_id, 0.0) + term_score
+
+        if max_score > 0:
+            for semantic_id in scores:
+                scores[semantic_id] /= max_score
+        return scores
+
+    def search(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        candidates: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank documents for a query.
+
+        Args:
+            query: Query text
+            top_k: Maximum number of results. None returns every match.
+            candidates: Optional ids to restrict the search to
+
+        Returns:
+            List of (semantic_id, score) tuples, sorted by score
+        """
+        ranked = sorted(self.scores(query, candidates).items(), key=lambda item: item[1], reverse=True)
+        return ranked if top_k is None else ranked[:top_k]
+
+    def __len__(self) -> int:
+        return len(self.document_lengths)
+
+
+def _document_tokens(node: SemanticElementNode, children_tokens: List[List[str]]) -> List[str]:
+    """Tokens of an element's document: its labels and own text, then new terms of its children's documents."""
+    tokens: List[str] = []
+    for key, value in node.attributes:
+        if key in LEXICAL_ATTRIBUTES:
+            tokens.extend(tokenize(value))
+    for child in node.content:
+        if isinstance(child, SemanticTextNode):
+            tokens.extend(tokenize(child.text))
+
+    # Descendant text adds each new term once, so a container never
+    # outranks the element that actually carries the label
+    seen = set(tokens)
+    for child_tokens in children_tokens:
+        for token in child_tokens:
+            if token not in seen:
+                seen.add(token)
+                tokens.append(token)
+
+    return tokens[:MAX_DOCUMENT_TOKENS]
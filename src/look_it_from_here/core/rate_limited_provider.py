@@ -0,0 +1,288 @@
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import math
+import random
+import threading
+import time
+from .embeddings import EmbeddingProvider, RateLimitError, TransientEmbeddingError
+
+
+@dataclass
+class ProviderMetrics:
+    """Throughput counters of a RateLimitedEmbeddingProvider."""
+    requests: int = 0
+    texts: int = 0
+    tokens: int = 0
+    retries: int = 0
+    throttled: int = 0
+    failures: int = 0
+    request_seconds: float = 0.0
+    first_request_at: Optional[float] = None
+    last_response_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds from the first request to the last successful response."""
+        if self.first_request_at is None or self.last_response_at is None:
+            return 0.0
+        return self.last_response_at - self.first_request_at
+
+    @property
+    def texts_per_second(self) -> float:
+        return self.texts / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.request_seconds / self.requests if self.requests else 0.0
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    Limit on requests in flight that adapts to throttling (AIMD).
+
+    Every successful request raises the limit by `increase / limit`, about
+    `increase` per round of requests; a throttled request multiplies it by
+    `decrease`. Throttled requests sent before the last decrease were sent
+    under the old limit and do not shrink it again, so a burst of 429s is one
+    congestion event.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 32,
+        increase: float = 1.0,
+        decrease: float = 0.5
+    ):
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError("Concurrency limits must satisfy 1 <= minimum <= initial <= maximum")
+        if not 0.0 < decrease < 1.0:
+            raise ValueError("decrease must be between 0 and 1")
+
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.limit = float(initial)
+        self.in_flight = 0
+        self._last_decrease = -math.inf
+        self._condition = threading.Condition()
+
+    def acquire(self) -> float:
+        """Wait for a free slot; returns the time the request is sent, to pass to `release`."""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, sent_at: float, throttled: bool = False) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            if not throttled:
+                self.limit = min(float(self.maximum), self.limit + self.increase / self.limit)
+            elif sent_at >= self._last_decrease:
+                self.limit = max(float(self.minimum), self.limit * self.decrease)
+                self._last_decrease = time.monotonic()
+            self._condition.notify_all()
+
+
+class _RateBucket:
+    """Token bucket refilled continuously at `per_minute / 60` units per second."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.available = per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` units, going into debt if needed; returns seconds to wait before using them."""
+        with self._lock:
+            self._refill()
+            self.available -= amount
+            if self.available >= 0:
+                return 0.0
+            return -self.available / (self.per_minute / 60.0)
+
+    def observe(self, remaining: Optional[float], limit: Optional[float]) -> None:
+        """Align with what the server reports, which also counts other clients of the same key."""
+        with self._lock:
+            self._refill()
+            if limit is not None and limit > 0:
+                self.per_minute = limit
+            if remaining is not None:
+                self.available = min(self.available, remaining)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.per_minute, self.available + (now - self._updated) * self.per_minute / 60.0)
+        self._updated = now
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text (about four characters per token)."""
+    return max(1, math.ceil(len(text) / 4))
+
+
+class RateLimitedEmbeddingProvider(EmbeddingProvider):
+    """
+    Wraps a provider with rate limit tracking, adaptive concurrency and retries.
+
+    Requests and estimated tokens are paced against per-minute limits, either
+    configured or learned from the x-ratelimit-* headers the wrapped provider
+    reports in its `rate_limits` attribute. Large batches are split and sent
+    concurrently under an AdaptiveConcurrencyLimit shared by every thread
+    using the provider. Rate limited and transient failures are retried with
+    jittered exponential backoff, honouring Retry-After.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_batch_size: int = 512,
+        initial_concurrency: int = 4,
+        max_concurrency: int = 32,
+        max_retries: int = 6,
+        base_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize wrapper.
+
+        Args:
+            provider: Provider to send requests through
+            requests_per_minute: Request limit to pace against. None learns it from responses.
+            tokens_per_minute: Token limit to pace against. None learns it from responses.
+            max_batch_size: Texts per request; larger batches are split
+            initial_concurrency: Requests in flight before any feedback
+            max_concurrency: Upper bound of the adaptive limit
+            max_retries: Retries of a request before its error is raised
+            base_backoff: Backoff before the first retry, doubled for each further retry
+            max_backoff: Cap of the backoff
+            seed: Seed of the backoff jitter
+        """
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be positive")
+
+        self.provider = provider
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.concurrency = AdaptiveConcurrencyLimit(initial_concurrency, maximum=max_concurrency)
+        self.metrics = ProviderMetrics()
+
+        self._request_bucket = _RateBucket(requests_per_minute) if requests_per_minute else None
+        self._token_bucket = _RateBucket(tokens_per_minute) if tokens_per_minute else None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def create_embedding(self, text: str) -> List[float]:
+        """Create embedding vector from text."""
+        return self.create_embeddings([text])[0]
+
+    def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Create embedding vectors for several texts, split into concurrent requests if large."""
+        if not texts:
+            return []
+
+        chunks = [texts[i:i + self.max_batch_size] for i in range(0, len(texts), self.max_batch_size)]
+        if len(chunks) == 1:
+            return self._send(chunks[0])
+
+        with ThreadPoolExecutor(max_workers=min(len(chunks), self.concurrency.maximum)) as executor:
+            results = list(executor.map(self._send, chunks))
+        return [vector for chunk_vectors in results for vector in chunk_vectors]
+
+    def get_dimension(self) -> int:
+        """Get the dimension of embeddings from the wrapped provider."""
+        return self.provider.get_dimension()
+
+    @property
+    def concurrency_limit(self) -> int:
+        """Requests currently allowed in flight."""
+        return int(self.concurrency.limit)
+
+    def _send(self, texts: List[str]) -> List[List[float]]:
+        tokens = sum(estimate_tokens(text) for text in texts)
+
+        attempt = 0
+        while True:
+            self._pace(tokens)
+            started = self.concurrency.acquire()
+            with self._lock:
+                if self.metrics.first_request_at is None:
+                    self.metrics.first_request_at = started
+
+            try:
+                vectors = self.provider.create_embeddings(texts)
+            except TransientEmbeddingError as e:
+                self.concurrency.release(started, throttled=True)
+                gave_up = attempt == self.max_retries
+                with self._lock:
+                    self.metrics.throttled += isinstance(e, RateLimitError)
+                    self.metrics.failures += gave_up
+                    self.metrics.retries += not gave_up
+                if gave_up:
+                    raise
+                time.sleep(self._backoff(attempt, e.retry_after))
+                attempt += 1
+                continue
+            except Exception:
+                self.concurrency.release(started)
+                with self._lock:
+                    self.metrics.failures += 1
+                raise
+
+            self.concurrency.release(started)
+            finished = time.monotonic()
+            with self._lock:
+                self.metrics.requests += 1
+                self.metrics.texts += len(texts)
+                self.metrics.tokens += tokens
+                self.metrics.request_seconds += finished - started
+                self.metrics.last_response_at = finished
+            self._observe(getattr(self.provider, 'rate_limits', None))
+            return vectors
+
+    def _pace(self, tokens: int) -> None:
+        """Sleep until the request and its tokens fit the per-minute limits."""
+        wait = 0.0
+        if self._request_bucket is not None:
+            wait = max(wait, self._request_bucket.reserve(1))
+        if self._token_bucket is not None:
+            wait = max(wait, self._token_bucket.reserve(tokens))
+        if wait > 0:
+            time.sleep(wait)
+
+    def _observe(self, limits: Optional[Dict[str, float]]) -> None:
+        """Learn or correct the per-minute limits from the last response's rate limit headers."""
+        if not limits:
+            return
+        with self._lock:
+            if self._request_bucket is None and limits.get('limit_requests'):
+                self._request_bucket = _RateBucket(limits['limit_requests'])
+            if self._token_bucket is None and limits.get('limit_tokens'):
+                self._token_bucket = _RateBucket(limits['limit_tokens'])
+        if self._request_bucket is not None:
+            self._request_bucket.observe(limits.get('remaining_requests'), limits.get('limit_requests'))
+        if self._token_bucket is not None:
+            self._token_bucket.observe(limits.get('remaining_tokens'), limits.get('limit_tokens'))
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+        with self._lock:
+            jittered = self._random.uniform(0.0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+        if retry_after is not None:
+            return min(self.max_backoff, retry_after) + jittered * 0.1
+        return jittered
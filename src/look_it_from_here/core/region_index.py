@@ -0,0 +1,89 @@
+from typing import Dict, List, Optional
+from .semantic_node import SemanticElementNode
+from .attribute_index import element_roles
+from .constants import REGION_ROLES, REGION_TAGS, LARGE_REGION_ELEMENTS
+
+
+def is_region(tag: str, attributes: List[tuple], descendants: int, min_elements: int = LARGE_REGION_ELEMENTS) -> bool:
+    """
+    Whether an element is a page region: a landmark, form, list or similar
+    grouping widget, or a generic container of many elements.
+
+    Args:
+        tag: Element tag name
+        attributes: Element attributes as (key, value) tuples
+        descendants: Number of descendant elements
+        min_elements: Descendants that make any container a region
+
+    Returns:
+        True for regions with at least one descendant element
+    """
+    if descendants == 0:
+        return False
+    if descendants >= min_elements or tag.lower() in REGION_TAGS:
+        return True
+    return any(role in REGION_ROLES for role in element_roles(tag, attributes))
+
+
+class RegionIndex:
+    """
+    Nesting of the page regions of a semantic tree.
+
+    Every element belongs to the innermost region enclosing it; a region
+    element itself belongs to the region around it, and elements outside any
+    region belong to the page (key None). Hierarchical selection scores the
+    top-level regions, descends into the best ones, and scores only the
+    elements of the regions it visited.
+    """
+
+    def __init__(self):
+        # Region -> regions directly nested in it, in document order
+        self.children: Dict[Optional[str], List[str]] = {None: []}
+        # Region -> elements whose innermost enclosing region it is
+        self.members: Dict[Optional[str], List[str]] = {None: []}
+
+    @classmethod
+    def from_semantic_tree(
+        cls,
+        semantic_tree: SemanticElementNode,
+        min_elements: int = LARGE_REGION_ELEMENTS
+    ) -> 'RegionIndex':
+        """
+        Find the regions of a semantic tree.
+
+        Args:
+            semantic_tree: Root of the semantic tree; it stands for the page and is never a region
+            min_elements: Descendants that make a generic container a region
+
+        Returns:
+            RegionIndex over every element of the tree
+        """
+        index = cls()
+        order = []
+        stack = [semantic_tree]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.get_element_children())
+
+        # Descendant counts, children before parents
+        descendants: Dict[str, int] = {}
+        for node in reversed(order):
+            descendants[node.id] = sum(descendants[child.id] + 1 for child in node.get_element_children())
+
+        index.members[None].append(semantic_tree.id)
+        stack = [(child, None) for child in reversed(semantic_tree.get_element_children())]
+        while stack:
+            node, region = stack.pop()
+            index.members[region].append(node.id)
+            if is_region(node.tag, node.attributes, descendants[node.id], min_elements):
+                index.children[region].append(node.id)
+                index.children[node.id] = []
+                index.members[node.id] = []
+                region = node.id
+            stack.extend((child, region) for child in reversed(node.get_element_children()))
+        return index
+
+    def __len__(self) -> int:
+        """Number of regions."""
+        return len(self.children) - 1
@@ -0,0 +1,96 @@
+from typing import Any, Dict, List, Optional, Set
+from dataclasses import dataclass, field
+import sys
+import numpy as np
+from .interfaces import WebElement
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    What a snapshot keeps once it has been built.
+
+    Selection needs only the element handles, the embedding matrix and the
+    indexes; the rest is kept for incremental capture, on-demand embedding
+    and debugging.
+
+    Attributes:
+        keep_html_tree: Keep the captured DOM tree (needed by incremental capture)
+        keep_dom_mappings: Keep the DOM id -> WebElement / semantic id maps
+            (needed by incremental capture)
+        keep_semantic_tree: Keep the semantic tree once background embedding has
+            finished. Without it, elements not embedded by then can no longer be
+            embedded (they remain searchable lexically), and reverse trees and
+            `to_dict` are unavailable.
+    """
+    keep_html_tree: bool = True
+    keep_dom_mappings: bool = True
+    keep_semantic_tree: bool = True
+
+    @classmethod
+    def lean(cls, keep_semantic_tree: bool = True) -> 'RetentionPolicy':
+        """Keep only what selection and interaction need, and optionally the semantic tree."""
+        return cls(keep_html_tree=False, keep_dom_mappings=False, keep_semantic_tree=keep_semantic_tree)
+
+    @property
+    def supports_incremental_capture(self) -> bool:
+        return self.keep_html_tree and self.keep_dom_mappings and self.keep_semantic_tree
+
+
+@dataclass
+class MemoryReport:
+    """Estimated memory held by each part of a snapshot."""
+    components: Dict[str, int] = field(default_factory=dict)
+    dropped: List[str] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return sum(self.components.values())
+
+    def __str__(self) -> str:
+        lines = [f"{name:<18} {size / 1024:>10.1f} KiB" for name, size in self.components.items()]
+        lines.append(f"{'total':<18} {self.total / 1024:>10.1f} KiB")
+        if self.dropped:
+            lines.append(f"dropped: {', '.join(self.dropped)}")
+        return '\n'.join(lines)
+
+
+def deep_sizeof(value: Any, seen: Optional[Set[int]] = None) -> int:
+    """
+    Estimate the memory reachable from a value, counting every object once.
+
+    Containers and object attributes are followed. WebElements count only
+    themselves, since they reference the page and browser connection. NumPy
+    arrays count their data only if they own it, so memory-mapped and shared
+    arrays cost nothing.
+
+    Args:
+        value: Object to measure
+        seen: Ids of objects already counted, to share across calls
+
+    Returns:
+        Size in bytes
+    """
+    if seen is None:
+        seen = set()
+
+    total = 0
+    stack = [value]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+
+        # NumPy counts the data of arrays that own it; views of maps and buffers are not followed
+        total += sys.getsizeof(current)
+        if isinstance(current, (str, bytes, int, float, bool, np.ndarray, WebElement)) or current is None:
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, '__dict__'):
+            stack.append(vars(current))
+    return total
@@ -1,4 +1,4 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uuid
 from abc import ABC
 
@@ -23,12 +23,18 @@ class SemanticElementNode(SemanticNode):
         self,
         tag: str,
         attributes: Optional[List[tuple]] = None,
-        content: Optional[List[SemanticNode]] = None
+        content: Optional[List[SemanticNode]] = None,
+        bounds: Optional[Tuple[float, float, float, float]] = None,
+        in_viewport: Optional[bool] = None,
+        dom_id: Optional[str] = None
     ):
         super().__init__()
         self.tag = tag
         self.attributes = attributes or []  # HTML attributes (aria-label, role, type, etc.)
         self.content: List[SemanticNode] = content or []
+        self.bounds = bounds  # Geometry of the DOM element, see DOMElementNode
+        self.in_viewport = in_viewport
+        self.dom_id = dom_id  # DOM element this node was created from
 
     def add_child(self, child: SemanticNode) -> None:
         self.content.append(child)
@@ -54,7 +60,10 @@ class SemanticElementNode(SemanticNode):
         """
         new_node = SemanticElementNode(
             tag=self.tag,
-            attributes=self.attributes.copy()
+            attributes=self.attributes.copy(),
+            bounds=self.bounds,
+            in_viewport=self.in_viewport,
+            dom_id=self.dom_id
         )
         new_node.id = self.id  # Preserve the ID
 
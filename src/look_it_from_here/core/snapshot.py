@@ -1,9 +1,55 @@
-from typing import Dict, Optional, Any, List, Union, Tuple
+from typing import Dict, Optional, Any, AsyncIterator, Iterable, List, Set, Union, Tuple
+from dataclasses import dataclass
+import asyncio
 from .dom_node import DOMElementNode
 from .semantic_node import SemanticElementNode, SemanticTextNode
 from .interfaces import WebElement, Snapshot
 from .embeddings import Embedder
+from .embedding_store import EmbeddingStore, EmbeddingStorageConfig
 from .element_selector import ElementSelector
+from .lexical_index import LexicalIndex
+from .attribute_index import AttributeIndex, is_actionable_element
+from .region_index import RegionIndex
+from .capture_region import CaptureRegion
+from .retention import MemoryReport, RetentionPolicy, deep_sizeof
+from .string_table import StringTable
+from .hierarchical_embeddings import HierarchicalEmbedder, HierarchicalEmbeddingConfig
+from .constants import SEMANTIC_ATTRIBUTES
+from .budget import (
+    SnapshotBudget, SHRINK_REVERSE_TREES, SHRINK_REVERSE_TREES_BELOW,
+    DEFER_REMAINING_EMBEDDINGS, DEGRADED_REVERSE_TREE_NODES
+)
+from .transform.embedding_generation.pipeline import (
+    EMBEDDING_BATCH_SIZE, aembed_semantic_elements, create_parent_mapping, embed_semantic_elements,
+    generate_reverse_tree
+)
+from .transform.embedding_generation.reverse_tree_node import ReverseTreeElementNode
+from .transform.semantic_conversion import create_semantic_tree
+
+
+# Element classes progressive selection can wait for
+WAIT_CLASSES = {'ready', 'actionable', 'all'}
+
+
+@dataclass
+class AppendStats:
+    """Outcome of appending a container's new items to a snapshot."""
+    added_items: int = 0
+    kept_items: int = 0
+    evicted_items: int = 0
+    embedded: int = 0
+
+
+@dataclass
+class RegionSearchStats:
+    """Work done by a region-first search (see PlaywrightPage.select_elements_in_region)."""
+    # Times the region was grown, and whether the last step captured the whole document
+    expansions: int = 0
+    whole_document: bool = False
+    # DOM elements the expansions found already in the snapshot, and semantic elements they added
+    kept_elements: int = 0
+    added_elements: int = 0
+    embedded: int = 0
 
 
 class WebSnapshot(Snapshot):
@@ -18,14 +64,37 @@ class WebSnapshot(Snapshot):
         semantic_tree: Optional[SemanticElementNode],
         dom_id_to_webelement: Dict[str, WebElement],
         dom_id_to_semantic_id: Dict[str, str],
-        semantic_id_to_embedding: Optional[Dict[str, List[float]]] = None,
-        embedder: Optional[Embedder] = None
+        semantic_id_to_embedding: Optional[Union[Dict[str, List[float]], EmbeddingStore]] = None,
+        embedder: Optional[Embedder] = None,
+        embedding_storage: Optional[EmbeddingStorageConfig] = None,
+        lexical_index: Optional[LexicalIndex] = None,
+        attribute_index: Optional[AttributeIndex] = None,
+        retention: Optional[RetentionPolicy] = None,
+        strings: Optional[StringTable] = None,
+        hierarchical_embeddings: Optional[HierarchicalEmbeddingConfig] = None
     ):
         self.html_tree = html_tree
         self.semantic_tree = semantic_tree
         self.dom_id_to_webelement = dom_id_to_webelement
         self.dom_id_to_semantic_id = dom_id_to_semantic_id
-        self.semantic_id_to_embedding = semantic_id_to_embedding or {}
+
+        # Embeddings are kept as a compact matrix rather than per-element float lists
+        if isinstance(semantic_id_to_embedding, EmbeddingStore):
+            self.semantic_id_to_embedding = semantic_id_to_embedding
+        else:
+            self.semantic_id_to_embedding = EmbeddingStore.from_vectors(
+                semantic_id_to_embedding or {}, embedding_storage
+            )
+
+        # BM25 index over element text, for lexical and hybrid selection
+        if lexical_index is None:
+            lexical_index = LexicalIndex.from_semantic_tree(semantic_tree) if semantic_tree else LexicalIndex()
+        self.lexical_index = lexical_index
+
+        # Tag/role/type/interactivity index, for filtered selection
+        if attribute_index is None:
+            attribute_index = AttributeIndex.from_semantic_tree(semantic_tree) if semantic_tree else AttributeIndex()
+        self.attribute_index = attribute_index
 
         # Build semantic_id_to_webelement mapping
         self.semantic_id_to_webelement: Dict[str, WebElement] = {}
@@ -35,6 +104,77 @@ class WebSnapshot(Snapshot):
 
         # Initialize element selector
         self._element_selector = ElementSelector(embedder)
+        self.embedder = self._element_selector.embedder
+
+        # Elements the embedding policy deferred; embedded on demand by selection
+        self.pending_embedding_ids: Set[str] = set()
+        if semantic_tree:
+            stack = [semantic_tree]
+            while stack:
+                node = stack.pop()
+                if node.id not in self.semantic_id_to_embedding:
+                    self.pending_embedding_ids.add(node.id)
+                stack.extend(node.get_element_children())
+        self._semantic_nodes: Optional[Dict[str, SemanticElementNode]] = None
+        self._parent_map: Optional[Dict[str, Optional[SemanticElementNode]]] = None
+        self._region_index: Optional[RegionIndex] = None
+
+        # Composed element vectors instead of full reverse trees (see HierarchicalEmbeddingConfig)
+        self.hierarchical_embeddings = hierarchical_embeddings
+        self._hierarchical_embedder = (
+            HierarchicalEmbedder(hierarchical_embeddings) if hierarchical_embeddings is not None else None
+        )
+
+        # Background embedding state (see start_background_embedding)
+        self.scheduled_embedding_ids: Set[str] = set()
+        self._scheduled_actionable_ids: Set[str] = set()
+        self.embedded_batches = 0
+        self._embedding_task: Optional[asyncio.Task] = None
+        self._embedding_progress: Optional[asyncio.Condition] = None
+
+        # Deadline the snapshot was built under; its degradations are reported here
+        self.budget: Optional[SnapshotBudget] = None
+
+        # Region the snapshot was captured from (None for the whole document),
+        # and whether elements outside it were left out
+        self.region: Optional[CaptureRegion] = None
+        self.region_truncated = False
+
+        # Incremental capture: selector -> container DOM id, and per container
+        # the DOM id of every item by the key stamped on it in the page
+        self.containers: Dict[str, str] = {}
+        self.container_items: Dict[str, Dict[str, str]] = {}
+        self._dom_nodes: Optional[Dict[str, DOMElementNode]] = None
+        self._dom_parents: Optional[Dict[str, Optional[str]]] = None
+        # Strings interned at capture time, shared with incremental captures
+        self.strings: Optional[StringTable] = strings if strings is not None else StringTable()
+
+        # Elements dropped from the mappings whose browser handles are not released yet
+        self._dropped_elements: List[WebElement] = []
+        self.closed = False
+
+        # Parts dropped by the retention policy; the semantic tree goes once embedding is done
+        self.retention = retention or RetentionPolicy()
+        self.dropped: List[str] = []
+        self._compact(release_semantic_tree=False)
+
+    @property
+    def degradations(self) -> List[str]:
+        """Degradations applied to meet the snapshot budget, in the order they happened."""
+        return list(self.budget.degradations) if self.budget else []
+
+    @property
+    def region_index(self) -> Optional[RegionIndex]:
+        """
+        Page regions of the semantic tree, for hierarchical selection.
+
+        Built on first use and rebuilt after incremental capture changes the
+        tree. An index built before the semantic tree is released is kept;
+        otherwise there is none once the tree is gone.
+        """
+        if self._region_index is None and self.semantic_tree is not None:
+            self._region_index = RegionIndex.from_semantic_tree(self.semantic_tree)
+        return self._region_index
 
     def to_dict(self) -> Optional[Dict[str, Any]]:
         """
@@ -47,11 +187,829 @@ class WebSnapshot(Snapshot):
             return self._semantic_tree_to_dict(self.semantic_tree)
         return None
 
+    def compact(self) -> None:
+        """
+        Drop whatever the retention policy does not keep.
+
+        Runs when the snapshot is built and when background embedding finishes;
+        call it after embedding a snapshot by other means. The semantic tree is
+        kept while background embedding is still running.
+        """
+        self._compact(release_semantic_tree=self.embedding_complete)
+
+    def _compact(self, release_semantic_tree: bool) -> None:
+        if not self.retention.keep_html_tree and self.html_tree is not None:
+            self.html_tree = None
+            self._dom_nodes = None
+            self._dom_parents = None
+            self.dropped.append('html_tree')
+
+        # Only incremental capture interns more strings; the nodes keep theirs
+        if not self.retention.keep_html_tree and self.strings is not None:
+            self.strings = None
+            self.dropped.append('string_table')
+
+        if not self.retention.keep_dom_mappings and (self.dom_id_to_webelement or self.dom_id_to_semantic_id):
+            self._dropped_elements.extend(self.dom_id_to_webelement.values())
+            self.dom_id_to_webelement = {}
+            self.dom_id_to_semantic_id = {}
+            self.dropped.append('dom_mappings')
+
+        if release_semantic_tree and not self.retention.keep_semantic_tree and self.semantic_tree is not None:
+            self.semantic_tree = None
+            self._semantic_nodes = None
+            self._parent_map = None
+            # Nothing left to build their reverse trees from
+            self.pending_embedding_ids.clear()
+            if self._hierarchical_embedder is not None:
+                self._hierarchical_embedder.region_vectors.clear()
+            self.dropped.append('semantic_tree')
+
+    def memory_report(self) -> MemoryReport:
+        """
+        Estimate the memory held by each part of the snapshot.
+
+        Objects shared between parts (ids, WebElements) are counted once, under
+        the first part that references them. WebElements count only their own
+        wrapper, and memory-mapped or shared embedding arrays count nothing.
+
+        Returns:
+            MemoryReport with bytes per part and the parts the retention policy dropped
+        """
+        parts = {
+            'semantic_tree': (self.semantic_tree, self._semantic_nodes, self._parent_map, self._region_index),
+            'element_handles': (self.semantic_id_to_webelement,),
+            'embeddings': (
+                self.semantic_id_to_embedding,
+                self._hierarchical_embedder.region_vectors if self._hierarchical_embedder else None
+            ),
+            'lexical_index': (self.lexical_index,),
+            'attribute_index': (self.attribute_index,),
+            'html_tree': (self.html_tree, self._dom_nodes, self._dom_parents),
+            'dom_mappings': (self.dom_id_to_webelement, self.dom_id_to_semantic_id),
+            'embedding_state': (
+                self.pending_embedding_ids, self.scheduled_embedding_ids, self._scheduled_actionable_ids
+            ),
+            'string_table': (self.strings,)
+        }
+        seen: Set[int] = {id(None)}
+        report = MemoryReport(dropped=list(self.dropped))
+        for name, values in parts.items():
+            report.components[name] = sum(deep_sizeof(value, seen) for value in values)
+        return report
+
+    def reverse_tree(self, semantic_id: str, max_context_nodes: Optional[int] = None) -> ReverseTreeElementNode:
+        """
+        Generate the reverse tree of an element on demand, e.g. to inspect what its embedding was made from.
+
+        Reverse trees are not kept after embedding. Elements embedded while the
+        snapshot budget was running low used a smaller context (see
+        `degradations`).
+
+        Args:
+            semantic_id: Semantic element to build the reverse tree for
+            max_context_nodes: Cap on context nodes (see generate_reverse_tree)
+
+        Returns:
+            Reverse tree rooted at the element
+        """
+        if self.semantic_tree is None:
+            raise RuntimeError("Reverse trees need the semantic tree, which this snapshot does not keep")
+
+        self._index_semantic_nodes()
+        node = self._semantic_nodes.get(semantic_id)
+        if node is None:
+            raise ValueError(f"Semantic element '{semantic_id}' is not part of this snapshot")
+        return generate_reverse_tree(node, self.semantic_tree, self._parent_map, max_context_nodes)
+
+    def save(self, path: str, include_html_tree: bool = True) -> int:
+        """
+        Write the snapshot to a binary archive (see snapshot_archive.save_snapshot).
+
+        Args:
+            path: File to write
+            include_html_tree: Also store the DOM tree (needed for incremental capture)
+
+        Returns:
+            Size of the archive in bytes
+        """
+        from .snapshot_archive import save_snapshot
+        return save_snapshot(self, path, include_html_tree)
+
+    @classmethod
+    def load(cls, path: str, embedder: Optional[Embedder] = None, mmap: bool = True) -> 'WebSnapshot':
+        """
+        Reopen a snapshot archive with memory-mapped embeddings (see snapshot_archive.load_snapshot).
+
+        Args:
+            path: Archive file
+            embedder: Embedder for queries and on-demand embedding. If None, creates a new one.
+            mmap: Map the embeddings instead of reading them into memory
+
+        Returns:
+            The saved snapshot, with ArchivedElements in place of live WebElements
+        """
+        from .snapshot_archive import load_snapshot
+        return load_snapshot(path, embedder, mmap=mmap)
+
+    def ensure_embeddings(self, semantic_ids: Iterable[str]) -> int:
+        """
+        Embed deferred elements among the given ids.
+
+        Args:
+            semantic_ids: Semantic ids that should have embeddings
+
+        Returns:
+            Number of elements embedded by this call
+        """
+        needed = [semantic_id for semantic_id in semantic_ids if semantic_id in self.pending_embedding_ids]
+        if not needed or not self.semantic_tree:
+            return 0
+
+        self._index_semantic_nodes()
+        nodes = [self._semantic_nodes[semantic_id] for semantic_id in needed]
+        if self._hierarchical_embedder is not None:
+            embeddings = self._hierarchical_embedder.embed(nodes, self._parent_map, self.embedder)
+        else:
+            embeddings, _ = embed_semantic_elements(
+                nodes, self.semantic_tree, self.embedder, self._parent_map, keep_reverse_trees=False
+            )
+        self.semantic_id_to_embedding.add_many(embeddings)
+        self.pending_embedding_ids.difference_update(needed)
+        return len(needed)
+
+    async def aensure_embeddings(self, semantic_ids: Iterable[str]) -> int:
+        """
+        Async variant of ensure_embeddings.
+
+        Args:
+            semantic_ids: Semantic ids that should have embeddings
+
+        Returns:
+            Number of elements embedded by this call
+        """
+        needed = [semantic_id for semantic_id in semantic_ids if semantic_id in self.pending_embedding_ids]
+        if not needed or not self.semantic_tree:
+            return 0
+
+        self._index_semantic_nodes()
+        nodes = [self._semantic_nodes[semantic_id] for semantic_id in needed]
+        embeddings = await self._aembed(nodes)
+        # Elements removed or embedded elsewhere while the request was pending are left alone
+        embeddings = {
+            semantic_id: vector for semantic_id, vector in embeddings.items()
+            if semantic_id in self.pending_embedding_ids
+        }
+        self.semantic_id_to_embedding.add_many(embeddings)
+        self.pending_embedding_ids.difference_update(embeddings)
+        return len(embeddings)
+
+    def neighbor_ids(self, semantic_id: str) -> List[str]:
+        """
+        Ids of the parent and element children of a semantic element.
+
+        Args:
+            semantic_id: Element to get the neighbours of
+
+        Returns:
+            Parent id first, then children in document order; empty if the
+            element is unknown or the semantic tree was released
+        """
+        self._index_semantic_nodes()
+        node = (self._semantic_nodes or {}).get(semantic_id)
+        if node is None:
+            return []
+        parent = self._parent_map.get(semantic_id)
+        ids = [parent.id] if parent is not None else []
+        ids.extend(child.id for child in node.get_element_children())
+        return ids
+
+    def find_dom_nodes(self, tag: str, attributes: Dict[str, str]) -> List[DOMElementNode]:
+        """
+        Find captured DOM elements with the given tag and semantic attributes.
+
+        Only SEMANTIC_ATTRIBUTES are compared, since capture may have pruned
+        the others in the browser; callers disambiguate the candidates.
+        """
+        def semantic(candidate: Dict[str, str]) -> Dict[str, str]:
+            return {
+                key: value for key, value in candidate.items()
+                if key in SEMANTIC_ATTRIBUTES and value and value.strip()
+            }
+
+        self._index_dom_nodes()
+        wanted = semantic(attributes)
+        return [node for node in self._dom_nodes.values() if node.tag == tag and semantic(node.attributes) == wanted]
+
+    def merge_subtree(
+        self,
+        parent_dom_id: str,
+        html_subtree: DOMElementNode,
+        dom_id_to_webelement: Dict[str, WebElement],
+        semantic_subtree: Optional[SemanticElementNode],
+        dom_id_to_semantic_id: Dict[str, str],
+        index: Optional[int] = None
+    ) -> List[SemanticElementNode]:
+        """
+        Attach a separately captured subtree below a DOM element of this snapshot.
+
+        Trees, id mappings and the lexical and attribute indexes are updated in
+        place. The new semantic elements are left pending embedding.
+
+        When the DOM parent has no semantic element of its own (it collapsed
+        into an ancestor or a descendant), the semantic subtree around it is
+        converted again instead, as a full capture would have converted it;
+        semantic elements standing for the same DOM elements keep their ids,
+        and so their embeddings.
+
+        Args:
+            parent_dom_id: DOM element the subtree is a child of
+            html_subtree: Filtered DOM subtree (see create_html_subtree)
+            dom_id_to_webelement: WebElements of the subtree's DOM nodes
+            semantic_subtree: Semantic tree of the subtree, or None if it has no content
+            dom_id_to_semantic_id: DOM -> semantic id mapping of the subtree
+            index: Position among the parent's children (text nodes included).
+                None appends after the existing children.
+
+        Returns:
+            The semantic elements added, root first
+        """
+        self._index_dom_nodes()
+        if parent_dom_id not in self._dom_nodes:
+            raise ValueError(f"DOM node '{parent_dom_id}' is not part of this snapshot")
+
+        parent = self._dom_nodes[parent_dom_id]
+        if index is None:
+            parent.add_child(html_subtree)
+        else:
+            parent.children.insert(index, html_subtree)
+        stack = [(html_subtree, parent_dom_id)]
+        while stack:
+            node, parent_id = stack.pop()
+            self._dom_nodes[node.id] = node
+            self._dom_parents[node.id] = parent_id
+            stack.extend((child, node.id) for child in node.get_element_children())
+        self.dom_id_to_webelement.update(dom_id_to_webelement)
+
+        self._index_semantic_nodes()
+        if self._semantic_nodes is None:
+            # Nothing captured so far had semantic content
+            self._semantic_nodes, self._parent_map = {}, {}
+        owner = self._semantic_owner(parent_dom_id)
+        if owner is None or semantic_subtree is None:
+            # No element to attach to, or content that only shows up as text of the parent
+            return self._reconvert(parent_dom_id)
+
+        self.dom_id_to_semantic_id.update(dom_id_to_semantic_id)
+        for dom_id, semantic_id in dom_id_to_semantic_id.items():
+            if dom_id in dom_id_to_webelement:
+                self.semantic_id_to_webelement[semantic_id] = dom_id_to_webelement[dom_id]
+
+        if index is None:
+            owner.add_child(semantic_subtree)
+        else:
+            # Every earlier text child and converted element child is one item of content
+            position = sum(
+                1 for child in parent.children[:index]
+                if not isinstance(child, DOMElementNode) or child.id in self.dom_id_to_semantic_id
+            )
+            owner.content.insert(position, semantic_subtree)
+        self._parent_map.update(create_parent_mapping(semantic_subtree))
+        self._parent_map[semantic_subtree.id] = owner
+
+        added = []
+        stack = [semantic_subtree]
+        while stack:
+            node = stack.pop()
+            added.append(node)
+            self._semantic_nodes[node.id] = node
+            stack.extend(reversed(node.get_element_children()))
+
+        self.lexical_index.add_semantic_tree(semantic_subtree)
+        # Containers above the subtree now also hold its text
+        self._reindex_ancestors([owner])
+        self.attribute_index.add_semantic_tree(semantic_subtree)
+        self._region_index = None
+        self.pending_embedding_ids.update(node.id for node in added)
+        return added
+
+    def merge_capture(
+        self,
+        html_tree: DOMElementNode,
+        dom_id_to_webelement: Dict[str, WebElement]
+    ) -> Tuple[List[SemanticElementNode], int]:
+        """
+        Merge a capture of a larger part of the same page, adding only the elements this snapshot lacks.
+
+        Captured elements are matched to this snapshot's DOM tree in document
+        order by tag, attributes, own text and geometry. Matched elements keep
+        their nodes, embeddings and WebElements (the capture's WebElements for
+        them are dropped, see `release_dropped_elements`); every unmatched
+        subtree is attached with `merge_subtree` at its position in the
+        capture. Elements missing from the capture are kept.
+
+        Args:
+            html_tree: Filtered DOM tree captured from the same root as `html_tree`
+            dom_id_to_webelement: WebElements of the capture's DOM nodes
+
+        Returns:
+            Tuple of (semantic elements added, number of DOM elements matched)
+
+        Raises:
+            ValueError: If the snapshot kept no DOM tree or the capture starts from another element
+        """
+        if self.html_tree is None:
+            raise ValueError("Snapshot keeps no DOM tree to merge into (see RetentionPolicy)")
+        if _dom_signature(self.html_tree) != _dom_signature(html_tree):
+            raise ValueError("Capture does not start from the snapshot's root element")
+
+        matched = 0
+        # (existing parent, index among the captured siblings, subtree), siblings in document order
+        new_subtrees: List[Tuple[str, int, DOMElementNode]] = []
+        stack = [(self.html_tree, html_tree)]
+        while stack:
+            existing, captured = stack.pop()
+            matched += 1
+            element = dom_id_to_webelement.get(captured.id)
+            if element is not None:
+                self._dropped_elements.append(element)
+            existing_children = existing.get_element_children()
+            position = 0
+            for index, child in enumerate(captured.children):
+                if not isinstance(child, DOMElementNode):
+                    continue
+                signature = _dom_signature(child)
+                match = next(
+                    (candidate for candidate in range(position, len(existing_children))
+                     if _dom_signature(existing_children[candidate]) == signature),
+                    None
+                )
+                if match is None:
+                    new_subtrees.append((existing.id, index, child))
+                else:
+                    stack.append((existing_children[match], child))
+                    position = match + 1
+
+        added: Dict[str, SemanticElementNode] = {}
+        for parent_id, index, html_subtree in new_subtrees:
+            element_mapping = {}
+            nodes = [html_subtree]
+            while nodes:
+                node = nodes.pop()
+                if node.id in dom_id_to_webelement:
+                    element_mapping[node.id] = dom_id_to_webelement[node.id]
+                nodes.extend(node.get_element_children())
+            semantic_subtree, node_mapping = create_semantic_tree(html_subtree)
+            for node in self.merge_subtree(
+                parent_id, html_subtree, element_mapping, semantic_subtree, node_mapping, index
+            ):
+                added[node.id] = node
+        # A later conversion may have replaced elements added by an earlier one
+        return [node for node in added.values() if node.id in self._semantic_nodes], matched
+
+    def _semantic_owner(self, dom_id: str) -> Optional[SemanticElementNode]:
+        """Semantic element created from this DOM element, if it was not collapsed."""
+        semantic_node = self._semantic_nodes.get(self.dom_id_to_semantic_id.get(dom_id))
+        if semantic_node is not None and semantic_node.dom_id == dom_id:
+            return semantic_node
+        return None
+
+    def _reconvert(self, dom_id: str) -> List[SemanticElementNode]:
+        """
+        Convert the semantic subtree around a changed DOM element again.
+
+        Conversion starts from the nearest DOM element with a semantic element
+        of its own, or, when none encloses `dom_id`, from the nearest common
+        ancestor of `dom_id` and the semantic root. Semantic elements created
+        from the same DOM element (with the same tag) keep their ids.
+
+        Returns:
+            The semantic elements added
+        """
+        anchor = self._semantic_owner(dom_id) or self._semantic_anchor(dom_id)
+        if anchor is not None and anchor.dom_id in self._dom_nodes:
+            root_dom_id, old_root = anchor.dom_id, anchor
+        elif anchor is None and self.semantic_tree is not None and self.semantic_tree.dom_id in self._dom_nodes:
+            root_dom_id = self._common_dom_ancestor(dom_id, self.semantic_tree.dom_id)
+            old_root = self.semantic_tree
+        else:
+            # Origins unknown: convert the whole tree
+            root_dom_id, old_root = self.html_tree.id, self.semantic_tree
+
+        new_root, mapping = create_semantic_tree(self._dom_nodes[root_dom_id])
+        old_nodes = _element_nodes(old_root)
+        new_nodes = _element_nodes(new_root)
+        by_dom_id = {node.dom_id: node for node in old_nodes if node.dom_id is not None}
+        renamed = {}
+        for node in new_nodes:
+            old = by_dom_id.get(node.dom_id)
+            if old is not None and old.tag == node.tag:
+                renamed[node.id] = old.id
+                node.id = old.id
+        mapping = {dom: renamed.get(semantic_id, semantic_id) for dom, semantic_id in mapping.items()}
+        kept = set(renamed.values())
+        removed = {node.id for node in old_nodes} - kept
+        added = [node for node in new_nodes if node.id not in kept]
+
+        semantic_parent = self._parent_map.get(old_root.id) if old_root is not None else None
+        if semantic_parent is None:
+            self.semantic_tree = new_root
+        else:
+            semantic_parent.content = [
+                child for child in (new_root if child is old_root else child for child in semantic_parent.content)
+                if child is not None
+            ]
+
+        for node in old_nodes:
+            self._semantic_nodes.pop(node.id, None)
+            self._parent_map.pop(node.id, None)
+            self.lexical_index.remove_document(node.id)
+            self.attribute_index.remove_element(node.id)
+        for semantic_id in removed:
+            self.semantic_id_to_webelement.pop(semantic_id, None)
+            self.pending_embedding_ids.discard(semantic_id)
+            self.scheduled_embedding_ids.discard(semantic_id)
+            self._scheduled_actionable_ids.discard(semantic_id)
+        self.semantic_id_to_embedding.remove_many(removed)
+        if self._hierarchical_embedder is not None:
+            self._hierarchical_embedder.forget(removed)
+
+        if new_root is not None:
+            for node in new_nodes:
+                self._semantic_nodes[node.id] = node
+            self._parent_map.update(create_parent_mapping(new_root))
+            self._parent_map[new_root.id] = semantic_parent
+            self.lexical_index.add_semantic_tree(new_root)
+            self.attribute_index.add_semantic_tree(new_root)
+        self._reindex_ancestors([semantic_parent])
+
+        # DOM elements of the converted subtree, and wrappers that pointed at removed elements
+        stack = [self._dom_nodes[root_dom_id]]
+        while stack:
+            node = stack.pop()
+            self.dom_id_to_semantic_id.pop(node.id, None)
+            stack.extend(node.get_element_children())
+        for dom, semantic_id in list(self.dom_id_to_semantic_id.items()):
+            if semantic_id in removed:
+                del self.dom_id_to_semantic_id[dom]
+        self.dom_id_to_semantic_id.update(mapping)
+        for dom, semantic_id in mapping.items():
+            if dom in self.dom_id_to_webelement:
+                self.semantic_id_to_webelement[semantic_id] = self.dom_id_to_webelement[dom]
+
+        self._region_index = None
+        self.pending_embedding_ids.update(node.id for node in added)
+        return added
+
+    def _common_dom_ancestor(self, first_id: str, second_id: str) -> str:
+        """Nearest DOM element that is (or encloses) both elements."""
+        ancestors = set()
+        current: Optional[str] = first_id
+        while current is not None:
+            ancestors.add(current)
+            current = self._dom_parents.get(current)
+        current = second_id
+        while current is not None and current not in ancestors:
+            current = self._dom_parents.get(current)
+        return current if current is not None else self.html_tree.id
+
+    def remove_dom_subtree(self, dom_id: str) -> int:
+        """
+        Remove a DOM element, its descendants and the semantic elements representing them.
+
+        Args:
+            dom_id: Root of the DOM subtree to remove
+
+        Returns:
+            Number of semantic elements removed
+        """
+        self._index_dom_nodes()
+        node = self._dom_nodes.get(dom_id)
+        if node is None:
+            return 0
+
+        parent_id = self._dom_parents.get(dom_id)
+        if parent_id is not None:
+            parent = self._dom_nodes[parent_id]
+            parent.children = [child for child in parent.children if child is not node]
+
+        removed_dom_ids = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            removed_dom_ids.append(current.id)
+            stack.extend(current.get_element_children())
+
+        self._index_semantic_nodes()
+        semantic_nodes = self._semantic_nodes or {}
+        removed_dom_id_set = set(removed_dom_ids)
+        semantic_roots = []
+        for removed_id in removed_dom_ids:
+            semantic_id = self.dom_id_to_semantic_id.pop(removed_id, None)
+            webelement = self.dom_id_to_webelement.pop(removed_id, None)
+            if webelement is not None:
+                self._dropped_elements.append(webelement)
+            self._dom_nodes.pop(removed_id, None)
+            self._dom_parents.pop(removed_id, None)
+            # Semantic elements created from a remaining ancestor (wrappers collapsed into text) stay
+            semantic_node = semantic_nodes.get(semantic_id)
+            if semantic_node is not None and (semantic_node.dom_id is None or semantic_node.dom_id in removed_dom_id_set):
+                semantic_roots.append(semantic_node)
+
+        removed_semantic_ids = set()
+        semantic_parents = []
+        for semantic_root in semantic_roots:
+            if semantic_root.id in removed_semantic_ids:
+                continue
+            semantic_parent = self._parent_map.get(semantic_root.id)
+            if semantic_parent is None:
+                self.semantic_tree = None
+            else:
+                semantic_parent.content = [child for child in semantic_parent.content if child is not semantic_root]
+                semantic_parents.append(semantic_parent)
+            stack = [semantic_root]
+            while stack:
+                current = stack.pop()
+                removed_semantic_ids.add(current.id)
+                stack.extend(current.get_element_children())
+
+        for semantic_id in removed_semantic_ids:
+            semantic_nodes.pop(semantic_id, None)
+            self._parent_map.pop(semantic_id, None)
+            webelement = self.semantic_id_to_webelement.pop(semantic_id, None)
+            if webelement is not None:
+                self._dropped_elements.append(webelement)
+            self.lexical_index.remove_document(semantic_id)
+            self.attribute_index.remove_element(semantic_id)
+            self.pending_embedding_ids.discard(semantic_id)
+            self.scheduled_embedding_ids.discard(semantic_id)
+            self._scheduled_actionable_ids.discard(semantic_id)
+        self.semantic_id_to_embedding.remove_many(removed_semantic_ids)
+        # Containers that held the removed elements no longer match their text
+        self._reindex_ancestors(
+            [parent for parent in semantic_parents if parent.id not in removed_semantic_ids]
+        )
+        if removed_semantic_ids:
+            self._region_index = None
+        if self._hierarchical_embedder is not None:
+            self._hierarchical_embedder.forget(removed_semantic_ids)
+        return len(removed_semantic_ids)
+
+    async def release_dropped_elements(self) -> int:
+        """
+        Dispose the elements dropped by compaction or `remove_dom_subtree`.
+
+        Elements still mapped (e.g. kept by `semantic_id_to_webelement` after
+        the DOM mappings were dropped) are left alone.
+
+        Returns:
+            Number of elements disposed
+        """
+        live = {id(element) for element in self.semantic_id_to_webelement.values()}
+        live.update(id(element) for element in self.dom_id_to_webelement.values())
+        dropped = _unique(element for element in self._dropped_elements if id(element) not in live)
+        self._dropped_elements = []
+        await asyncio.gather(*(element.dispose() for element in dropped), return_exceptions=True)
+        return len(dropped)
+
+    async def close(self) -> None:
+        """
+        Dispose every WebElement of the snapshot, releasing the browser handles behind them.
+
+        The trees, indexes and embeddings stay, so the snapshot can still be
+        searched, but the elements it returns can no longer be acted on. Safe
+        to call more than once.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        elements = _unique([
+            *self.dom_id_to_webelement.values(),
+            *self.semantic_id_to_webelement.values(),
+            *self._dropped_elements
+        ])
+        self._dropped_elements = []
+        await asyncio.gather(*(element.dispose() for element in elements), return_exceptions=True)
+
+    def _reindex_ancestors(self, nodes: List[Optional[SemanticElementNode]]) -> None:
+        """Rebuild the lexical documents of the given elements and all their ancestors, deepest first."""
+        depths: Dict[str, Tuple[int, SemanticElementNode]] = {}
+        for node in nodes:
+            path = []
+            while node is not None:
+                path.append(node)
+                node = self._parent_map.get(node.id)
+            for depth, ancestor in enumerate(reversed(path)):
+                depths[ancestor.id] = (depth, ancestor)
+
+        for _, node in sorted(depths.values(), key=lambda entry: entry[0], reverse=True):
+            self.lexical_index.update_element(node)
+
+    def _index_dom_nodes(self) -> None:
+        """Build the id -> node and parent lookups of the DOM tree used by incremental capture."""
+        if not self.retention.supports_incremental_capture:
+            raise RuntimeError(
+                "Incremental capture needs the DOM tree, DOM mappings and semantic tree, "
+                "which this snapshot's retention policy drops"
+            )
+        if self._dom_nodes is not None:
+            return
+
+        self._dom_nodes = {}
+        self._dom_parents = {}
+        if not self.html_tree:
+            return
+        stack: List[Tuple[DOMElementNode, Optional[str]]] = [(self.html_tree, None)]
+        while stack:
+            node, parent_id = stack.pop()
+            self._dom_nodes[node.id] = node
+            self._dom_parents[node.id] = parent_id
+            stack.extend((child, node.id) for child in node.get_element_children())
+
+    def _semantic_anchor(self, dom_id: str) -> Optional[SemanticElementNode]:
+        """Nearest semantic element standing for this DOM element or one of its ancestors."""
+        current: Optional[str] = dom_id
+        while current is not None:
+            semantic_node = self._semantic_nodes.get(self.dom_id_to_semantic_id.get(current))
+            # A wrapper collapsed into a descendant element maps to it, but does not contain it
+            if semantic_node is not None and self._is_dom_ancestor_or_self(semantic_node.dom_id, current):
+                return semantic_node
+            current = self._dom_parents.get(current)
+        return None
+
+    def _is_dom_ancestor_or_self(self, ancestor_id: Optional[str], dom_id: str) -> bool:
+        """Whether ancestor_id is dom_id or one of its ancestors; unknown origins (None) count as such."""
+        if ancestor_id is None:
+            return True
+        current: Optional[str] = dom_id
+        while current is not None:
+            if current == ancestor_id:
+                return True
+            current = self._dom_parents.get(current)
+        return False
+
+    def start_background_embedding(
+        self,
+        nodes: List[SemanticElementNode],
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        budget: Optional[SnapshotBudget] = None
+    ) -> None:
+        """
+        Embed elements in batches on the running event loop.
+
+        The snapshot is usable immediately: selection searches whatever has been
+        embedded so far, and `wait_for_embeddings` waits for a class of elements.
+
+        Under a budget, reverse trees are shrunk once time runs low, and when the
+        deadline passes the remaining elements are handed back to on-demand
+        embedding instead of being embedded up front.
+
+        Args:
+            nodes: Elements to embed, in the order they should become searchable
+            batch_size: Number of elements per embedding request
+            budget: Deadline the embedding should finish by
+        """
+        if self._embedding_task and not self._embedding_task.done():
+            raise RuntimeError("Background embedding already running for this snapshot")
+
+        self.scheduled_embedding_ids = {node.id for node in nodes}
+        self._scheduled_actionable_ids = {
+            node.id for node in nodes if is_actionable_element(node.tag, node.attributes)
+        }
+        self.pending_embedding_ids.difference_update(self.scheduled_embedding_ids)
+        self._embedding_progress = asyncio.Condition()
+        if budget is not None:
+            self.budget = budget
+        self._embedding_task = asyncio.create_task(self._embed_in_batches(nodes, batch_size, budget))
+
+    async def _embed_in_batches(
+        self,
+        nodes: List[SemanticElementNode],
+        batch_size: int,
+        budget: Optional[SnapshotBudget] = None
+    ) -> None:
+        self._index_semantic_nodes()
+        try:
+            for start in range(0, len(nodes), batch_size):
+                max_context_nodes = None
+                if budget is not None:
+                    if budget.expired():
+                        # Out of time: whatever is left gets embedded on demand
+                        self.pending_embedding_ids.update(self.scheduled_embedding_ids)
+                        self.scheduled_embedding_ids.clear()
+                        self._scheduled_actionable_ids.clear()
+                        budget.degrade(DEFER_REMAINING_EMBEDDINGS)
+                        break
+                    if budget.below(SHRINK_REVERSE_TREES_BELOW):
+                        budget.degrade(SHRINK_REVERSE_TREES)
+                        max_context_nodes = DEGRADED_REVERSE_TREE_NODES
+
+                batch = nodes[start:start + batch_size]
+                embeddings = await self._aembed(batch, max_context_nodes)
+                self.semantic_id_to_embedding.add_many(embeddings)
+                for node in batch:
+                    self.scheduled_embedding_ids.discard(node.id)
+                    self._scheduled_actionable_ids.discard(node.id)
+                self.embedded_batches += 1
+
+                async with self._embedding_progress:
+                    self._embedding_progress.notify_all()
+
+            self._compact(release_semantic_tree=True)
+        finally:
+            # Wake waiters on completion and on failure alike
+            async with self._embedding_progress:
+                self._embedding_progress.notify_all()
+
+    async def _aembed(
+        self,
+        nodes: List[SemanticElementNode],
+        max_context_nodes: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Embed elements from their full reverse trees, or by composition if configured."""
+        if self._hierarchical_embedder is not None:
+            return await self._hierarchical_embedder.aembed(nodes, self._parent_map, self.embedder, max_context_nodes)
+        embeddings, _ = await aembed_semantic_elements(
+            nodes, self.semantic_tree, self.embedder, self._parent_map, max_context_nodes,
+            keep_reverse_trees=False
+        )
+        return embeddings
+
+    @property
+    def embedding_complete(self) -> bool:
+        """Whether background embedding has finished (or was never started)."""
+        return self._embedding_task is None or self._embedding_task.done()
+
+    async def wait_for_embeddings(self, element_class: str = 'all') -> None:
+        """
+        Wait until a class of elements has been embedded in the background.
+
+        Args:
+            element_class: 'all' waits for every scheduled element, 'actionable' for
+                interactive/role-bearing/labelled ones, 'ready' returns immediately
+
+        Raises:
+            Exception raised by the background embedding task, if it failed
+        """
+        if element_class not in WAIT_CLASSES:
+            raise ValueError(f"Unknown element class '{element_class}', expected one of {sorted(WAIT_CLASSES)}")
+        if element_class == 'ready' or self._embedding_task is None:
+            return
+
+        if element_class == 'all':
+            await self._embedding_task
+            return
+
+        task = self._embedding_task
+        async with self._embedding_progress:
+            await self._embedding_progress.wait_for(lambda: not self._scheduled_actionable_ids or task.done())
+        _raise_if_failed(task)
+
+    async def embedding_updates(self) -> AsyncIterator['WebSnapshot']:
+        """
+        Async iterator yielding this snapshot now and again as embedded batches land.
+
+        Raises:
+            Exception raised by the background embedding task, if it failed
+        """
+        yield self
+        task = self._embedding_task
+        seen = self.embedded_batches
+        while task is not None and not task.done():
+            async with self._embedding_progress:
+                await self._embedding_progress.wait_for(lambda: self.embedded_batches > seen or task.done())
+            if self.embedded_batches > seen:
+                seen = self.embedded_batches
+                yield self
+
+        if self.embedded_batches > seen:
+            yield self
+        # Also reached when the task had already failed before iteration started
+        if task is not None:
+            _raise_if_failed(task)
+
+    def _index_semantic_nodes(self) -> None:
+        """Build the id -> node and parent lookups used to generate reverse trees."""
+        if self._semantic_nodes is not None or not self.semantic_tree:
+            return
+
+        self._semantic_nodes = {}
+        stack = [self.semantic_tree]
+        while stack:
+            node = stack.pop()
+            self._semantic_nodes[node.id] = node
+            stack.extend(node.get_element_children())
+        self._parent_map = create_parent_mapping(self.semantic_tree)
+
     def select_elements(
         self,
         query: str,
         top_k: int = 5,
-        threshold: float = 0
+        threshold: float = 0,
+        shortlist_size: Optional[int] = None,
+        mode: str = 'embedding',
+        where: Optional[Dict[str, Any]] = None,
+        beam_width: Optional[int] = None
     ) -> List[Tuple[str, WebElement, float]]:
         """
         Select elements using natural language query with similarity scoring.
@@ -60,16 +1018,28 @@ class WebSnapshot(Snapshot):
             query: Natural language description of desired elements
             top_k: Maximum number of elements to return
             threshold: Minimum similarity score (0.0 to 1.0)
+            shortlist_size: Candidates kept by the cheap first pass before exact
+                rescoring. None uses the selector's default.
+            mode: 'embedding', 'lexical' (BM25 only, no embedding request), 'hybrid' or
+                'hierarchical' (only elements of the best-scoring page regions are scored)
+            where: Only consider elements matching this filter on 'tag', 'role', 'type'
+                or 'interactive', e.g. {'role': 'textbox'}
+            beam_width: Regions kept at each level in 'hierarchical' mode. None uses
+                the selector's default.
 
         Returns:
             List of (semantic_id, element, similarity_score) tuples, sorted by score
         """
-        return self._element_selector.select_elements(self, query, top_k, threshold)
+        return self._element_selector.select_elements(
+            self, query, top_k, threshold, shortlist_size, mode, where, beam_width=beam_width
+        )
 
     def select_element(
         self,
         query: str,
-        threshold: float = 0
+        threshold: float = 0,
+        mode: str = 'embedding',
+        where: Optional[Dict[str, Any]] = None
     ) -> Optional[Tuple[str, WebElement, float]]:
         """
         Select the single best matching element using natural language query.
@@ -77,13 +1047,51 @@ class WebSnapshot(Snapshot):
         Args:
             query: Natural language description of desired element
             threshold: Minimum similarity score (0.0 to 1.0)
+            mode: 'embedding', 'lexical' (BM25 only, no embedding request), 'hybrid'
+                or 'hierarchical'
+            where: Only consider elements matching this filter on 'tag', 'role', 'type'
+                or 'interactive'
 
         Returns:
             Tuple of (semantic_id, element, similarity_score) or None if no match
         """
-        return self._element_selector.select_element(self, query, threshold)
+        return self._element_selector.select_element(self, query, threshold, mode, where)
    
     
+    async def select_elements_async(
+        self,
+        query: str,
+        top_k: int = 5,
+        threshold: float = 0,
+        wait: str = 'ready',
+        shortlist_size: Optional[int] = None,
+        mode: str = 'embedding',
+        where: Optional[Dict[str, Any]] = None,
+        beam_width: Optional[int] = None
+    ) -> List[Tuple[str, WebElement, float]]:
+        """
+        Select elements from a snapshot whose embeddings may still be streaming in.
+
+        Args:
+            query: Natural language description of desired elements
+            top_k: Maximum number of elements to return
+            threshold: Minimum similarity score (0.0 to 1.0)
+            wait: 'ready' searches what is embedded now, 'actionable' waits for
+                actionable elements first, 'all' waits for background embedding to finish
+            shortlist_size: Candidates kept by the cheap first pass before exact rescoring
+            mode: 'embedding', 'lexical' (BM25 only, no embedding request), 'hybrid'
+                or 'hierarchical'
+            where: Only consider elements matching this filter
+            beam_width: Regions kept at each level in 'hierarchical' mode
+
+        Returns:
+            List of (semantic_id, element, similarity_score) tuples, sorted by score
+        """
+        await self.wait_for_embeddings(wait)
+        return await self._element_selector.aselect_elements(
+            self, query, top_k, threshold, shortlist_size, mode, where, beam_width
+        )
+
     def _semantic_tree_to_dict(self, node: SemanticElementNode) -> Dict[str, Any]:
         """
         Convert a semantic tree to a simple dictionary representation.
@@ -116,3 +1124,35 @@ class WebSnapshot(Snapshot):
 
         return result
 
+
+def _element_nodes(root: Optional[SemanticElementNode]) -> List[SemanticElementNode]:
+    """Element nodes of a semantic subtree, root first."""
+    nodes = []
+    stack = [root] if root is not None else []
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(reversed(node.get_element_children()))
+    return nodes
+
+
+def _dom_signature(node: DOMElementNode) -> Tuple:
+    """What identifies a DOM element across two captures of the same page."""
+    bounds = tuple(round(value) for value in node.bounds) if node.bounds else None
+    texts = tuple(child.text for child in node.get_text_children())
+    return node.tag, tuple(sorted(node.attributes.items())), texts, bounds
+
+
+def _unique(elements: Iterable[WebElement]) -> List[WebElement]:
+    """Elements without repeats (by identity), skipping None."""
+    seen = {}
+    for element in elements:
+        if element is not None:
+            seen.setdefault(id(element), element)
+    return list(seen.values())
+
+
+def _raise_if_failed(task: asyncio.Task) -> None:
+    """Re-raise the exception of a finished background embedding task, if it failed."""
+    if task.done() and not task.cancelled() and task.exception() is not None:
+        raise task.exception()
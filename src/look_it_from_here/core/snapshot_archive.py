@@ -0,0 +1,601 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+from dataclasses import asdict
+import json
+import struct
+import sys
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from .dom_node import DOMElementNode, DOMTextNode
+from .semantic_node import SemanticElementNode, SemanticTextNode
+from .interfaces import WebElement
+from .embeddings import Embedder
+from .embedding_store import EmbeddingStore, EmbeddingStorageConfig
+from .capture_region import CaptureRegion
+from .hierarchical_embeddings import HierarchicalEmbeddingConfig
+from .lexical_index import LexicalIndex
+from .snapshot import WebSnapshot
+
+
+# File layout: magic, little-endian uint64 header length, JSON header, then
+# every array at a multiple of ARRAY_ALIGNMENT bytes so it can be mapped in place
+ARCHIVE_MAGIC = b'LIFHSNAP'
+ARCHIVE_VERSION = 2
+ARRAY_ALIGNMENT = 64
+
+_PREAMBLE = struct.Struct('<8sQ')
+
+# Node kinds of the columnar tree encoding
+_ELEMENT = 0
+_TEXT = 1
+
+TreeNode = Union[DOMElementNode, SemanticElementNode]
+
+
+class ArchivedElement(WebElement):
+    """
+    Stand-in for the WebElement of an element in a reloaded snapshot.
+
+    Answers tag, attribute, children and geometry queries from the captured
+    tree so archived snapshots can be searched and inspected; interacting
+    with it raises, since the page it came from is gone. Elements of a
+    snapshot saved without its semantic tree have no node and answer as empty.
+    """
+
+    def __init__(self, node: Optional[TreeNode]):
+        self.node = node
+
+    async def click(self) -> bool:
+        raise RuntimeError("Cannot click an element of an archived snapshot; capture the page again")
+
+    async def fill(self, text: str) -> bool:
+        raise RuntimeError("Cannot fill an element of an archived snapshot; capture the page again")
+
+    async def is_visible(self) -> bool:
+        return getattr(self.node, 'is_visible', True)
+
+    async def get_attributes(self) -> Dict[str, str]:
+        return dict(self.node.attributes) if self.node is not None else {}
+
+    async def get_tag(self) -> Optional[str]:
+        return self.node.tag if self.node is not None else None
+
+    async def get_children(self) -> List[Union[WebElement, str]]:
+        if self.node is None:
+            return []
+        children = self.node.children if isinstance(self.node, DOMElementNode) else self.node.content
+        return [
+            ArchivedElement(child) if isinstance(child, (DOMElementNode, SemanticElementNode)) else child.text
+            for child in children
+        ]
+
+    async def get_bounding_box(self) -> Optional[Dict[str, float]]:
+        if self.node is None or self.node.bounds is None:
+            return None
+        return dict(zip(('x', 'y', 'width', 'height'), self.node.bounds))
+
+
+class _StringTable:
+    """Deduplicated strings referenced by index from the tree columns."""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self, value: str) -> int:
+        position = self.index.get(value)
+        if position is None:
+            position = self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return position
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Encode as (utf-8 blob, int64 offsets with one entry more than strings)."""
+        encoded = [value.encode('utf-8') for value in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _decode_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]].decode('utf-8') for i in range(len(bounds) - 1)]
+
+
+def _encode_tree(root: Optional[TreeNode], strings: _StringTable, prefix: str) -> Dict[str, np.ndarray]:
+    """
+    Flatten a DOM or semantic tree into preorder columns.
+
+    Every node records its parent's position, so children are rebuilt in
+    order by appending each node to its parent. Text nodes store their text
+    where elements store their tag; text node ids are not kept. Semantic
+    elements also record the DOM element they were created from (origin).
+    """
+    kinds: List[int] = []
+    parents: List[int] = []
+    names: List[int] = []
+    ids: List[int] = []
+    origins: List[int] = []
+    attribute_offsets = [0]
+    attribute_keys: List[int] = []
+    attribute_values: List[int] = []
+    bounds: List[Tuple[float, float, float, float]] = []
+    in_viewport: List[int] = []
+    visible: List[int] = []
+
+    nan_bounds = (np.nan, np.nan, np.nan, np.nan)
+    stack: List[Tuple[Any, int]] = [(root, -1)] if root is not None else []
+    while stack:
+        node, parent = stack.pop()
+        position = len(kinds)
+        parents.append(parent)
+        if isinstance(node, (DOMTextNode, SemanticTextNode)):
+            kinds.append(_TEXT)
+            names.append(strings.add(node.text))
+            ids.append(-1)
+            origins.append(-1)
+            bounds.append(nan_bounds)
+            in_viewport.append(-1)
+            visible.append(1)
+        else:
+            kinds.append(_ELEMENT)
+            names.append(strings.add(node.tag))
+            ids.append(strings.add(node.id))
+            dom_id = getattr(node, 'dom_id', None)
+            origins.append(strings.add(dom_id) if dom_id is not None else -1)
+            attributes = node.attributes.items() if isinstance(node.attributes, dict) else node.attributes
+            for key, value in attributes:
+                attribute_keys.append(strings.add(key))
+                attribute_values.append(strings.add(value))
+            bounds.append(tuple(node.bounds) if node.bounds is not None else nan_bounds)
+            in_viewport.append(-1 if node.in_viewport is None else int(node.in_viewport))
+            visible.append(int(getattr(node, 'is_visible', True)))
+            children = node.children if isinstance(node, DOMElementNode) else node.content
+            stack.extend((child, position) for child in reversed(children))
+        attribute_offsets.append(len(attribute_keys))
+
+    return {
+        f'{prefix}.kind': np.array(kinds, dtype=np.uint8),
+        f'{prefix}.parent': np.array(parents, dtype=np.int32),
+        f'{prefix}.name': np.array(names, dtype=np.int32),
+        f'{prefix}.id': np.array(ids, dtype=np.int32),
+        f'{prefix}.origin': np.array(origins, dtype=np.int32),
+        f'{prefix}.attribute_offsets': np.array(attribute_offsets, dtype=np.int64),
+        f'{prefix}.attribute_keys': np.array(attribute_keys, dtype=np.int32),
+        f'{prefix}.attribute_values': np.array(attribute_values, dtype=np.int32),
+        f'{prefix}.bounds': np.array(bounds, dtype=np.float64).reshape(-1, 4),
+        f'{prefix}.in_viewport': np.array(in_viewport, dtype=np.int8),
+        f'{prefix}.visible': np.array(visible, dtype=np.uint8)
+    }
+
+
+def _decode_tree(arrays: Dict[str, np.ndarray], strings: List[str], prefix: str, dom: bool) -> Optional[TreeNode]:
+    """Rebuild a tree written by _encode_tree."""
+    kinds = arrays[f'{prefix}.kind'].tolist()
+    if not kinds:
+        return None
+
+    parents = arrays[f'{prefix}.parent'].tolist()
+    names = arrays[f'{prefix}.name'].tolist()
+    ids = arrays[f'{prefix}.id'].tolist()
+    origins = arrays[f'{prefix}.origin'].tolist()
+    offsets = arrays[f'{prefix}.attribute_offsets'].tolist()
+    keys = arrays[f'{prefix}.attribute_keys'].tolist()
+    values = arrays[f'{prefix}.attribute_values'].tolist()
+    bounds = arrays[f'{prefix}.bounds']
+    has_bounds = (~np.isnan(bounds[:, 0])).tolist()
+    bounds = bounds.tolist()
+    in_viewport = arrays[f'{prefix}.in_viewport'].tolist()
+    visible = arrays[f'{prefix}.visible'].tolist()
+
+    nodes: List[Any] = []
+    for position, kind in enumerate(kinds):
+        if kind == _TEXT:
+            node = DOMTextNode(strings[names[position]]) if dom else SemanticTextNode(strings[names[position]])
+        else:
+            pairs = [
+                (strings[keys[i]], strings[values[i]]) for i in range(offsets[position], offsets[position + 1])
+            ]
+            node_bounds = tuple(bounds[position]) if has_bounds[position] else None
+            viewport = None if in_viewport[position] < 0 else bool(in_viewport[position])
+            if dom:
+                node = DOMElementNode(
+                    strings[names[position]], dict(pairs), is_visible=bool(visible[position]),
+                    bounds=node_bounds, in_viewport=viewport
+                )
+            else:
+                node = SemanticElementNode(
+                    strings[names[position]], pairs, bounds=node_bounds, in_viewport=viewport,
+                    dom_id=strings[origins[position]] if origins[position] >= 0 else None
+                )
+            node.id = strings[ids[position]]
+        nodes.append(node)
+        if parents[position] >= 0:
+            nodes[parents[position]].add_child(node)
+    return nodes[0]
+
+
+def save_snapshot(
+    snapshot: WebSnapshot,
+    path: str,
+    include_html_tree: bool = True,
+    embedding_storage: Optional[EmbeddingStorageConfig] = None
+) -> int:
+    """
+    Write a snapshot to a single binary archive file.
+
+    Trees and lexical index documents are stored as columns of integer string
+    references, id mappings as pairs of string references and embeddings as
+    the store's encoded matrix, each at an aligned offset so `load_snapshot`
+    can map them without copying. WebElements are not saved.
+
+    Args:
+        snapshot: Snapshot to save
+        path: File to write
+        include_html_tree: Also store the DOM tree (needed for incremental capture)
+        embedding_storage: Re-encode the embeddings with this configuration
+            (e.g. int8) before saving. None keeps the snapshot's encoding.
+
+    Returns:
+        Size of the archive in bytes
+    """
+    arrays, metadata = _encode_snapshot(snapshot, include_html_tree, embedding_storage)
+    header, _, size = _archive_header(arrays, metadata)
+    with open(path, 'wb') as f:
+        f.write(header)
+        for array in arrays.values():
+            f.write(array.tobytes())
+            f.write(b'\0' * (-array.nbytes % ARRAY_ALIGNMENT))
+    return size
+
+
+def _encode_snapshot(
+    snapshot: WebSnapshot,
+    include_html_tree: bool,
+    embedding_storage: Optional[EmbeddingStorageConfig]
+) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Turn a snapshot into the (arrays, metadata) an archive stores."""
+    store = snapshot.semantic_id_to_embedding
+    if embedding_storage is not None and embedding_storage != store.config:
+        store = EmbeddingStore.from_vectors(dict(store.items()), embedding_storage)
+
+    strings = _StringTable()
+    arrays = _encode_tree(snapshot.semantic_tree, strings, 'semantic')
+    arrays.update(_encode_tree(snapshot.html_tree if include_html_tree else None, strings, 'dom'))
+
+    mapping = list(snapshot.dom_id_to_semantic_id.items())
+    arrays['dom_id_to_semantic_id'] = np.array(
+        [(strings.add(dom_id), strings.add(semantic_id)) for dom_id, semantic_id in mapping], dtype=np.int32
+    ).reshape(-1, 2)
+    # Selectable elements by semantic id too: a lean retention policy drops the DOM mappings
+    arrays['selectable_ids'] = np.array(
+        [strings.add(semantic_id) for semantic_id in snapshot.semantic_id_to_webelement], dtype=np.int32
+    )
+
+    arrays['embeddings.ids'] = np.array([strings.add(semantic_id) for semantic_id in store.ids], dtype=np.int32)
+    for name, array in (('matrix', store._matrix), ('scales', store._scales), ('full', store._full)):
+        if array is not None:
+            arrays[f'embeddings.{name}'] = np.ascontiguousarray(array)
+
+    # Term frequencies of the lexical index, so loading skips tokenization
+    lexical = snapshot.lexical_index
+    document_ids = list(lexical.document_lengths)
+    term_offsets = [0]
+    terms: List[int] = []
+    frequencies: List[int] = []
+    for semantic_id in document_ids:
+        for term, frequency in lexical.term_frequencies(semantic_id).items():
+            terms.append(strings.add(term))
+            frequencies.append(frequency)
+        term_offsets.append(len(terms))
+    arrays['lexical.ids'] = np.array([strings.add(semantic_id) for semantic_id in document_ids], dtype=np.int32)
+    arrays['lexical.term_offsets'] = np.array(term_offsets, dtype=np.int64)
+    arrays['lexical.terms'] = np.array(terms, dtype=np.int32)
+    arrays['lexical.frequencies'] = np.array(frequencies, dtype=np.int32)
+
+    arrays['strings.blob'], arrays['strings.offsets'] = strings.to_arrays()
+
+    metadata = {
+        'embedding_config': asdict(store.config),
+        'hierarchical_embeddings': (
+            asdict(snapshot.hierarchical_embeddings) if snapshot.hierarchical_embeddings is not None else None
+        ),
+        'lexical_parameters': {'k1': lexical.k1, 'b': lexical.b},
+        'full_dimension': store.full_dimension,
+        'region': asdict(snapshot.region) if snapshot.region is not None else None,
+        'region_truncated': snapshot.region_truncated,
+        'containers': snapshot.containers,
+        'container_items': snapshot.container_items
+    }
+    return arrays, metadata
+
+
+def _aligned(size: int) -> int:
+    """Round a byte count up to a multiple of ARRAY_ALIGNMENT."""
+    return -(-size // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+
+def _archive_header(arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]) -> Tuple[bytes, int, int]:
+    """
+    Lay out an archive.
+
+    Returns:
+        Tuple of (preamble and padded header, offset of the data section, total size)
+    """
+    # Array offsets are relative to the data section, which starts after the padded header
+    layout = {}
+    position = 0
+    for name, array in arrays.items():
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': position}
+        position += _aligned(array.nbytes)
+
+    header = {'version': ARCHIVE_VERSION, 'metadata': metadata, 'arrays': layout}
+    encoded = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    data_start = _aligned(_PREAMBLE.size + len(encoded))
+    encoded += b' ' * (data_start - _PREAMBLE.size - len(encoded))
+
+    return _PREAMBLE.pack(ARCHIVE_MAGIC, len(encoded)) + encoded, data_start, data_start + position
+
+
+def read_archive(path: str, mmap: bool = True) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Read the header and arrays of a snapshot archive.
+
+    Args:
+        path: Archive file
+        mmap: Map the file read-only instead of reading it into memory
+
+    Returns:
+        Tuple of (metadata, arrays by name)
+    """
+    if mmap:
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        buffer = np.fromfile(path, dtype=np.uint8)
+    return _parse_archive(buffer, f"'{path}'")
+
+
+def _parse_archive(buffer: np.ndarray, source: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Split an archive held in a uint8 buffer into metadata and array views of the buffer."""
+    if len(buffer) < _PREAMBLE.size:
+        raise ValueError(f"{source} is not a snapshot archive")
+    magic, header_length = _PREAMBLE.unpack(buffer[:_PREAMBLE.size].tobytes())
+    if magic != ARCHIVE_MAGIC:
+        raise ValueError(f"{source} is not a snapshot archive")
+    data_start = _PREAMBLE.size + header_length
+    header = json.loads(buffer[_PREAMBLE.size:data_start].tobytes())
+    if header['version'] != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported snapshot archive version {header['version']}, expected {ARCHIVE_VERSION}")
+
+    data = buffer[data_start:]
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        start = spec['offset']
+        arrays[name] = data[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+    return header['metadata'], arrays
+
+
+def load_snapshot(
+    path: str,
+    embedder: Optional[Embedder] = None,
+    dom_id_to_webelement: Optional[Dict[str, WebElement]] = None,
+    mmap: bool = True
+) -> WebSnapshot:
+    """
+    Reopen a snapshot written by save_snapshot.
+
+    Embedding arrays stay memory-mapped, so only the rows a search touches
+    are read from disk. Trees, id mappings and the lexical index are rebuilt
+    in memory from their columns; the attribute index is recomputed.
+
+    Args:
+        path: Archive file
+        embedder: Embedder for queries and on-demand embedding. If None, creates a new one.
+        dom_id_to_webelement: Live WebElements to attach, e.g. after re-locating the
+            elements on a page. Elements without one get an ArchivedElement.
+        mmap: Map the embeddings instead of reading them into memory
+
+    Returns:
+        WebSnapshot equivalent to the saved one, without live WebElements
+    """
+    metadata, arrays = read_archive(path, mmap)
+    return _decode_snapshot(metadata, arrays, embedder, dom_id_to_webelement)
+
+
+def _decode_snapshot(
+    metadata: Dict[str, Any],
+    arrays: Dict[str, np.ndarray],
+    embedder: Optional[Embedder],
+    dom_id_to_webelement: Optional[Dict[str, WebElement]]
+) -> WebSnapshot:
+    """Rebuild a snapshot from archive arrays, keeping the embedding arrays as views."""
+    strings = _decode_strings(arrays['strings.blob'], arrays['strings.offsets'])
+
+    semantic_tree = _decode_tree(arrays, strings, 'semantic', dom=False)
+    html_tree = _decode_tree(arrays, strings, 'dom', dom=True)
+
+    dom_id_to_semantic_id = {
+        strings[dom_id]: strings[semantic_id] for dom_id, semantic_id in arrays['dom_id_to_semantic_id'].tolist()
+    }
+
+    config = EmbeddingStorageConfig(**metadata['embedding_config'])
+    store = EmbeddingStore.from_arrays(
+        [strings[i] for i in arrays['embeddings.ids'].tolist()],
+        arrays.get('embeddings.matrix', np.zeros((0, 0), dtype=np.float32)),
+        arrays.get('embeddings.scales'),
+        arrays.get('embeddings.full'),
+        config,
+        metadata['full_dimension']
+    )
+
+    lexical_index = LexicalIndex(**metadata['lexical_parameters'])
+    term_offsets = arrays['lexical.term_offsets'].tolist()
+    terms = arrays['lexical.terms'].tolist()
+    frequencies = arrays['lexical.frequencies'].tolist()
+    for position, semantic_id in enumerate(arrays['lexical.ids'].tolist()):
+        start, end = term_offsets[position], term_offsets[position + 1]
+        lexical_index.add_term_frequencies(
+            strings[semantic_id], {strings[terms[i]]: frequencies[i] for i in range(start, end)}
+        )
+
+    # Every mapped element needs a WebElement to be selectable
+    webelements = dict(dom_id_to_webelement or {})
+    nodes: Dict[str, TreeNode] = {}
+    for tree in (semantic_tree, html_tree):
+        stack = [tree] if tree is not None else []
+        while stack:
+            node = stack.pop()
+            nodes[node.id] = node
+            stack.extend(node.get_element_children())
+    for dom_id, semantic_id in dom_id_to_semantic_id.items():
+        if dom_id not in webelements:
+            node = nodes.get(dom_id) or nodes.get(semantic_id)
+            if node is not None:
+                webelements[dom_id] = ArchivedElement(node)
+
+    # Elements embedded on demand after loading are composed the same way; archives
+    # written before composed embeddings existed have no such entry
+    hierarchical = metadata.get('hierarchical_embeddings')
+    snapshot = WebSnapshot(
+        html_tree, semantic_tree, webelements, dom_id_to_semantic_id,
+        semantic_id_to_embedding=store, embedder=embedder, lexical_index=lexical_index,
+        hierarchical_embeddings=HierarchicalEmbeddingConfig(**hierarchical) if hierarchical is not None else None
+    )
+    # Elements that were selectable without a saved DOM mapping (older archives have no such column)
+    for semantic_id in arrays.get('selectable_ids', np.zeros(0, dtype=np.int32)).tolist():
+        semantic_id = strings[semantic_id]
+        if semantic_id not in snapshot.semantic_id_to_webelement:
+            snapshot.semantic_id_to_webelement[semantic_id] = ArchivedElement(nodes.get(semantic_id))
+    if metadata['region'] is not None:
+        snapshot.region = CaptureRegion(**metadata['region'])
+    snapshot.region_truncated = metadata['region_truncated']
+    snapshot.containers = metadata['containers']
+    snapshot.container_items = metadata['container_items']
+    return snapshot
+
+
+class SharedSnapshot:
+    """
+    Snapshot archive published in a shared memory block for other processes to query.
+
+    The publishing process writes the archive once with `publish`; workers
+    `attach` by name and get a WebSnapshot whose embedding arrays are
+    read-only views of the block, so the vectors exist once however many
+    workers serve queries. Only the Python trees and indexes are rebuilt per
+    worker. (A file written by save_snapshot and opened with
+    `load_snapshot(mmap=True)` shares pages through the OS cache the same way.)
+
+    The publisher owns the block and unlinks it on close; attached handles
+    only unmap it.
+    """
+
+    def __init__(self, block: shared_memory.SharedMemory, snapshot: Optional[WebSnapshot], owner: bool):
+        self._block = block
+        self.snapshot = snapshot
+        self.owner = owner
+
+    @classmethod
+    def publish(
+        cls,
+        snapshot: WebSnapshot,
+        name: Optional[str] = None,
+        include_html_tree: bool = True,
+        embedding_storage: Optional[EmbeddingStorageConfig] = None
+    ) -> 'SharedSnapshot':
+        """
+        Copy a snapshot into a new shared memory block.
+
+        Args:
+            snapshot: Snapshot to publish
+            name: Name of the block. None lets the system choose one.
+            include_html_tree: Also publish the DOM tree
+            embedding_storage: Re-encode the embeddings with this configuration first
+
+        Returns:
+            Owning handle; pass `handle.name` to the workers
+        """
+        arrays, metadata = _encode_snapshot(snapshot, include_html_tree, embedding_storage)
+        header, data_start, size = _archive_header(arrays, metadata)
+        block = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        buffer = np.frombuffer(block.buf, dtype=np.uint8)
+        buffer[:len(header)] = np.frombuffer(header, dtype=np.uint8)
+        position = data_start
+        for array in arrays.values():
+            buffer[position:position + array.nbytes] = array.reshape(-1).view(np.uint8)
+            position += _aligned(array.nbytes)
+        del buffer
+        return cls(block, snapshot, owner=True)
+
+    @classmethod
+    def attach(
+        cls,
+        name: str,
+        embedder: Optional[Embedder] = None,
+        dom_id_to_webelement: Optional[Dict[str, WebElement]] = None
+    ) -> 'SharedSnapshot':
+        """
+        Open a published snapshot read-only.
+
+        Args:
+            name: Name of the block, as in the publisher's `name`
+            embedder: Embedder for queries and on-demand embedding. If None, creates a new one.
+            dom_id_to_webelement: Live WebElements to attach (see load_snapshot)
+
+        Returns:
+            Handle whose `snapshot` is backed by the shared block
+        """
+        if sys.version_info >= (3, 13):
+            block = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            block = shared_memory.SharedMemory(name=name)
+            # The publisher owns the block; without this the resource tracker
+            # would unlink it when this process exits
+            resource_tracker.unregister(block._name, 'shared_memory')
+
+        # frombuffer holds a buffer export, so the block cannot be unmapped under live arrays
+        buffer = np.frombuffer(block.buf, dtype=np.uint8)
+        buffer.flags.writeable = False
+        metadata, arrays = _parse_archive(buffer, f"Shared memory block '{name}'")
+        return cls(block, _decode_snapshot(metadata, arrays, embedder, dom_id_to_webelement), owner=False)
+
+    @property
+    def name(self) -> str:
+        """Name other processes attach with."""
+        return self._block.name
+
+    @property
+    def size(self) -> int:
+        """Size of the shared block in bytes."""
+        return self._block.size
+
+    def close(self) -> None:
+        """
+        Unmap the block, and unlink it if this handle published it.
+
+        Raises:
+            RuntimeError: If arrays of an attached snapshot are still referenced elsewhere
+        """
+        if self.owner:
+            if sys.version_info < (3, 13):
+                # Workers sharing this process's resource tracker unregistered the
+                # block when attaching; register it again so unlink can unregister it
+                resource_tracker.register(self._block._name, 'shared_memory')
+            self._block.unlink()
+            self.owner = False
+        snapshot, self.snapshot = self.snapshot, None
+        del snapshot
+        try:
+            self._block.close()
+        except BufferError:
+            raise RuntimeError(
+                "The attached snapshot is still referenced; drop references to it before closing"
+            ) from None
+
+    def __enter__(self) -> 'SharedSnapshot':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
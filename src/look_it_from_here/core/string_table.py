@@ -0,0 +1,31 @@
+from typing import Dict
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of whitespace (non-breaking spaces and newlines included) to one space and trim."""
+    return ' '.join(text.split())
+
+
+class StringTable:
+    """
+    Interns the strings of one snapshot's captured nodes.
+
+    Tags, attribute names and values and repeated texts ("Add to cart",
+    "Learn more") then share one object across all nodes, and the semantic
+    tree, built from the DOM tree, shares them too. Incremental captures of
+    the same snapshot reuse its table.
+    """
+
+    def __init__(self):
+        self._strings: Dict[str, str] = {}
+
+    def intern(self, value: str) -> str:
+        """Return the table's copy of a string, adding it if new."""
+        return self._strings.setdefault(value, value)
+
+    def intern_text(self, text: str) -> str:
+        """Normalize whitespace in a text node's text, then intern it."""
+        return self.intern(normalize_whitespace(text))
+
+    def __len__(self) -> int:
+        return len(self._strings)
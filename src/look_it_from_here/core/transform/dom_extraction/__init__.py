@@ -1,3 +1,3 @@
-from .pipeline import create_html_tree
+from .pipeline import create_html_tree, create_html_subtree
 
-__all__ = ['create_html_tree']
\ No newline at end of file
+__all__ = ['create_html_tree', 'create_html_subtree']
\ No newline at end of file
@@ -1,33 +1,104 @@
 import asyncio
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from ...dom_node import DOMElementNode, DOMTextNode
 from ...interfaces import WebPage, WebElement
+from ...capture_region import RegionCapture
+from ...budget import (
+    SnapshotBudget, SKIP_HIDDEN_SUBTREES, CAP_DEPTH, STOP_CAPTURE,
+    SKIP_HIDDEN_SUBTREES_BELOW, CAP_DEPTH_BELOW, DEGRADED_MAX_DEPTH
+)
 
 
-async def extract_dom_structure(page: WebPage) -> Tuple[DOMElementNode, Dict[str, WebElement]]:
+async def extract_dom_structure(
+    page: WebPage,
+    budget: Optional[SnapshotBudget] = None,
+    region: Optional[RegionCapture] = None
+) -> Tuple[DOMElementNode, Dict[str, WebElement]]:
     """
     Build DOM tree using DFS with parallelization at each level.
     Returns tuple of (tree_root, id_to_element_mapping)
+
+    With a budget, capture degrades as time runs out: children of hidden
+    elements are no longer fetched, then depth is capped, and once the
+    budget is spent no further children are fetched at all.
+
+    With a region, capture starts at the region's root and elements whose
+    bounding box lies outside the region's rectangle are left out together
+    with their subtrees.
+
+    Pages implementing `capture_dom` (shadow roots and frames included)
+    are captured that way; the rest are walked element by element.
     """
-    id_to_element = {}
+    # Pages that can capture in bulk save the per-element round trips
+    captured = await page.capture_dom(budget, region)
+    if captured is not None:
+        return captured
 
-    root_element = await page.get_root()
+    root_element = await (region.get_root(page) if region else page.get_root())
     if not root_element:
         raise ValueError("Could not get root element")
 
-    async def build_node(element: WebElement) -> DOMElementNode:
-        # Gather all element data in parallel
-        tag_task = element.get_tag()
-        children_task = element.get_children()
-        is_visible_task = element.is_visible()
+    return await extract_dom_subtree(root_element, budget, region)
 
-        # Get ALL attributes from the element
-        attributes_task = element.get_attributes()
 
-        # Wait for all data
-        tag, children, is_visible, attributes = await asyncio.gather(
-            tag_task, children_task, is_visible_task, attributes_task
-        )
+async def extract_dom_subtree(
+    root_element: WebElement,
+    budget: Optional[SnapshotBudget] = None,
+    region: Optional[RegionCapture] = None
+) -> Tuple[DOMElementNode, Dict[str, WebElement]]:
+    """
+    Build the DOM tree below a single element, e.g. an item appended to a list.
+    Returns tuple of (tree_root, id_to_element_mapping)
+
+    Budget and region behave as in extract_dom_structure.
+    """
+    id_to_element = {}
+    budget = budget or SnapshotBudget()
+
+    def should_descend(depth: int) -> bool:
+        if budget.expired():
+            budget.degrade(STOP_CAPTURE)
+            return False
+        if depth >= DEGRADED_MAX_DEPTH and budget.below(CAP_DEPTH_BELOW):
+            budget.degrade(CAP_DEPTH)
+            return False
+        return True
+
+    async def keep_children_in_region(children: List[Union[WebElement, str]]) -> List[Union[WebElement, str]]:
+        # One round of bounding box lookups per level rather than one per child
+        elements = [child for child in children if not isinstance(child, str)]
+        boxes = await asyncio.gather(*(element.get_bounding_box() for element in elements))
+        outside = {id(element) for element, box in zip(elements, boxes) if not region.contains(box)}
+        return [child for child in children if id(child) not in outside]
+
+    async def build_node(element: WebElement, depth: int = 0) -> DOMElementNode:
+        children = None
+        if budget.below(SKIP_HIDDEN_SUBTREES_BELOW):
+            # Short on time: check visibility before paying for the children of hidden elements
+            tag, is_visible, attributes = await asyncio.gather(
+                element.get_tag(), element.is_visible(), element.get_attributes()
+            )
+            if not is_visible:
+                budget.degrade(SKIP_HIDDEN_SUBTREES)
+            elif should_descend(depth):
+                children = await element.get_children()
+        elif should_descend(depth):
+            # Gather all element data in parallel
+            tag_task = element.get_tag()
+            children_task = element.get_children()
+            is_visible_task = element.is_visible()
+
+            # Get ALL attributes from the element
+            attributes_task = element.get_attributes()
+
+            # Wait for all data
+            tag, children, is_visible, attributes = await asyncio.gather(
+                tag_task, children_task, is_visible_task, attributes_task
+            )
+        else:
+            tag, is_visible, attributes = await asyncio.gather(
+                element.get_tag(), element.is_visible(), element.get_attributes()
+            )
 
         # Create tree node
         tree_node = DOMElementNode(
@@ -41,16 +112,18 @@ async def extract_dom_structure(page: WebPage) -> Tuple[DOMElementNode, Dict[str
 
         # Process mixed children (WebElements and text strings)
         if children:
+            if region is not None and region.rect is not None:
+                children = await keep_children_in_region(children)
             for child in children:
                 if isinstance(child, str):
                     # It's a text node
                     tree_node.add_child(DOMTextNode(text=child))
                 else:
                     # It's an element node - process recursively
-                    child_node = await build_node(child)
+                    child_node = await build_node(child, depth + 1)
                     tree_node.add_child(child_node)
 
         return tree_node
 
     root_tree_node = await build_node(root_element)
-    return root_tree_node, id_to_element
\ No newline at end of file
+    return root_tree_node, id_to_element
@@ -1,20 +1,21 @@
 from typing import Optional
 from ...dom_node import DOMElementNode, DOMTextNode
+from ...constants import EXCLUDED_TAGS
+from ...string_table import StringTable
 
 
-# Tags that should be excluded from display
-EXCLUDED_TAGS = {'script', 'style', 'meta', 'link', 'head', 'noscript', 'title'}
-
-
-def filter_non_visual_pass(node: DOMElementNode) -> Optional[DOMElementNode]:
+def filter_non_visual_pass(node: DOMElementNode, strings: Optional[StringTable] = None) -> Optional[DOMElementNode]:
     """
     Remove nodes that should never be displayed.
 
     This pass filters out script, style, meta, and other non-visual elements
     that contribute to the large text content but aren't useful for interaction.
+    As it rebuilds the tree, whitespace in text nodes is collapsed and trimmed
+    (texts left empty are dropped), and tags, attributes and texts are interned.
 
     Args:
         node: DOMElementNode tree
+        strings: String table of the snapshot being captured; a new one if None
 
     Returns:
         DOMElementNode tree with excluded nodes removed, None if node itself is excluded
@@ -23,23 +24,30 @@ def filter_non_visual_pass(node: DOMElementNode) -> Optional[DOMElementNode]:
     if node.tag in EXCLUDED_TAGS:
         return None
 
+    if strings is None:
+        strings = StringTable()
+
     # Process children, filtering out excluded element nodes and keeping text nodes
     filtered_children = []
     for child in node.children:
         if isinstance(child, DOMElementNode):
             # Process element children recursively
-            filtered_child = filter_non_visual_pass(child)
+            filtered_child = filter_non_visual_pass(child, strings)
             if filtered_child:
                 filtered_children.append(filtered_child)
         elif isinstance(child, DOMTextNode):
-            # Keep text nodes as-is
-            filtered_children.append(child)
+            # Keep text nodes, normalized in place
+            child.text = strings.intern_text(child.text)
+            if child.text:
+                filtered_children.append(child)
 
     # Create new node with filtered children
     filtered_node = DOMElementNode(
-        tag=node.tag,
-        attributes=node.attributes.copy(),
-        is_visible=node.is_visible
+        tag=strings.intern(node.tag),
+        attributes={strings.intern(key): strings.intern(value) for key, value in node.attributes.items()},
+        is_visible=node.is_visible,
+        bounds=node.bounds,
+        in_viewport=node.in_viewport
     )
     filtered_node.id = node.id  # Preserve the ID
 
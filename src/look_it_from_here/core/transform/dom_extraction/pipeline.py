@@ -1,19 +1,32 @@
 from typing import Dict, Tuple, Optional
 from ...dom_node import DOMElementNode
 from ...interfaces import WebPage, WebElement
-from .extract_dom_structure import extract_dom_structure
+from .extract_dom_structure import extract_dom_structure, extract_dom_subtree
 from .filter_non_visual import filter_non_visual_pass
 from .propagate_visibility import propagate_visibility_pass
 from .filter_hidden_elements import filter_hidden_elements_pass
+from ...budget import SnapshotBudget
+from ...capture_region import RegionCapture
+from ...string_table import StringTable
 
 
-async def create_html_tree(page: WebPage) -> Tuple[Optional[DOMElementNode], Dict[str, WebElement]]:
+async def create_html_tree(
+    page: WebPage,
+    budget: Optional[SnapshotBudget] = None,
+    region: Optional[RegionCapture] = None,
+    strings: Optional[StringTable] = None
+) -> Tuple[Optional[DOMElementNode], Dict[str, WebElement]]:
     """
     Create an HTML tree representation from a web page.
-    Builds the DOM tree, excludes unwanted tags, and filters invisible elements.
+    Builds the DOM tree, excludes unwanted tags, normalizes text and filters
+    invisible elements.
 
     Args:
         page: WebPage instance to process
+        budget: Optional time budget; capture degrades as it runs out
+        region: Optional region to capture instead of the whole document
+        strings: String table to intern tags, attributes and texts in
+            (the snapshot's); a new one if None
 
     Returns:
         Tuple of (
@@ -22,19 +35,53 @@ async def create_html_tree(page: WebPage) -> Tuple[Optional[DOMElementNode], Dic
         )
     """
     # Pass 1: Extract the initial DOM structure from the page
-    tree, tree_id_to_element = await extract_dom_structure(page)
+    tree, tree_id_to_element = await extract_dom_structure(page, budget, region)
 
+    return _filter_html_tree(tree, strings), tree_id_to_element
+
+
+async def create_html_subtree(
+    element: WebElement,
+    budget: Optional[SnapshotBudget] = None,
+    strings: Optional[StringTable] = None,
+    page: Optional[WebPage] = None
+) -> Tuple[Optional[DOMElementNode], Dict[str, WebElement]]:
+    """
+    Create an HTML tree for the subtree below a single element.
+    Runs the same passes as create_html_tree, for merging into an existing snapshot.
+
+    Args:
+        element: Root element of the subtree
+        budget: Optional time budget; capture degrades as it runs out
+        strings: String table of the snapshot the subtree is merged into
+        page: Page the element is on. Pages implementing `capture_dom` capture
+            the subtree in bulk; otherwise it is walked element by element.
+
+    Returns:
+        Tuple of (
+            Optional[DOMElementNode] root of the filtered subtree,
+            Dict mapping DOM node IDs to WebElements
+        )
+    """
+    captured = await page.capture_dom(budget, root=element) if page is not None else None
+    if captured is None:
+        captured = await extract_dom_subtree(element, budget)
+    tree, tree_id_to_element = captured
+    return _filter_html_tree(tree, strings), tree_id_to_element
+
+
+def _filter_html_tree(tree: DOMElementNode, strings: Optional[StringTable]) -> Optional[DOMElementNode]:
+    """Apply the filtering passes to an extracted DOM tree."""
     # Pass 2: Remove non-visual tags (script, style, meta, etc.) first
-    # This avoids wasting computation on elements we'll remove anyway
-    filtered_tree = filter_non_visual_pass(tree)
+    # This avoids wasting computation on elements we'll remove anyway.
+    # Texts are normalized and strings interned while the tree is rebuilt.
+    filtered_tree = filter_non_visual_pass(tree, strings)
     if not filtered_tree:
-        return None, {}
+        return None
 
     # Pass 3: Propagate visibility bottom-up (if child is visible, parent becomes visible)
     # Now we only propagate through meaningful elements
     visibility_corrected_tree = propagate_visibility_pass(filtered_tree)
 
     # Pass 4: Filter out hidden/invisible elements from the tree
-    visible_tree = filter_hidden_elements_pass(visibility_corrected_tree)
-
-    return visible_tree, tree_id_to_element
\ No newline at end of file
+    return filter_hidden_elements_pass(visibility_corrected_tree)
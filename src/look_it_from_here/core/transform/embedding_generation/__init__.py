@@ -1,5 +1,11 @@
-from .pipeline import create_embeddings_from_semantic_tree
+from .pipeline import (
+    create_embeddings_from_semantic_tree,
+    select_elements_to_embed,
+    prioritize_elements,
+)
 
 __all__ = [
-    'create_embeddings_from_semantic_tree'
+    'create_embeddings_from_semantic_tree',
+    'select_elements_to_embed',
+    'prioritize_elements'
 ]
\ No newline at end of file
@@ -1,14 +1,34 @@
 from typing import Dict, List, Optional, Tuple
 from ...semantic_node import SemanticElementNode, SemanticTextNode
 from ...embeddings import Embedder
+from ...attribute_index import is_actionable_element
 from .reverse_tree_node import ReverseTreeElementNode, ReverseTreeTextNode, ReverseTreeMarkerNode
+from .reverse_tree_text import ContextBudget, ReverseTreeWriter
 
 
-def convert_semantic_to_reverse_tree(semantic_node: SemanticElementNode) -> ReverseTreeElementNode:
+# Which elements get embedded eagerly when a snapshot is created:
+# 'all' embeds every element, 'actionable' only interactive, role-bearing
+# and labelled elements (the rest can be embedded on demand)
+EMBEDDING_POLICIES = {'all', 'actionable'}
+
+# Number of reverse-tree texts sent to the embedding provider per request
+EMBEDDING_BATCH_SIZE = 32
+
+
+def convert_semantic_to_reverse_tree(
+    semantic_node: SemanticElementNode,
+    context_budget: Optional[ContextBudget] = None
+) -> Optional[ReverseTreeElementNode]:
     """
     Convert a complete semantic subtree to reverse tree format recursively.
-    This preserves all elements in the subtree.
+    This preserves all elements in the subtree, unless a context budget runs out.
+
+    Returns:
+        Reverse tree subtree, or None if the context budget was already spent
     """
+    if context_budget is not None and not context_budget.take():
+        return None
+
     reverse_node = ReverseTreeElementNode(
         tag=semantic_node.tag,
         attributes=semantic_node.attributes.copy()
@@ -17,10 +37,12 @@ def convert_semantic_to_reverse_tree(semantic_node: SemanticElementNode) -> Reve
     # Convert all content recursively
     for child in semantic_node.content:
         if isinstance(child, SemanticTextNode):
-            reverse_node.add_content(ReverseTreeTextNode(child.text))
+            if context_budget is None or context_budget.take():
+                reverse_node.add_content(ReverseTreeTextNode(child.text))
         elif isinstance(child, SemanticElementNode):
-            child_reverse = convert_semantic_to_reverse_tree(child)
-            reverse_node.add_content(child_reverse)
+            child_reverse = convert_semantic_to_reverse_tree(child, context_budget)
+            if child_reverse is not None:
+                reverse_node.add_content(child_reverse)
 
     return reverse_node
 
@@ -49,19 +71,32 @@ def create_parent_mapping(semantic_tree: SemanticElementNode) -> Dict[str, Optio
     return parent_map
 
 
-def generate_reverse_tree(target_node: SemanticElementNode, semantic_tree: SemanticElementNode) -> ReverseTreeElementNode:
+def generate_reverse_tree(
+    target_node: SemanticElementNode,
+    semantic_tree: SemanticElementNode,
+    parent_map: Optional[Dict[str, Optional[SemanticElementNode]]] = None,
+    max_context_nodes: Optional[int] = None
+) -> ReverseTreeElementNode:
     """
     Generate a reverse tree for a target element using temporary parent mapping.
 
     Args:
         target_node: The element to create reverse tree for
         semantic_tree: The full semantic tree to create parent mapping from
+        parent_map: Precomputed parent mapping of the tree. Pass it when generating
+            many reverse trees so the tree is not re-walked for every element.
+        max_context_nodes: Cap on content and sibling nodes included, spent on the
+            target's content first and then on the nearest ancestors' siblings.
+            The parent chain and focus markers are always kept. None means no cap.
 
     Returns:
         ReverseTreeElementNode with target as root and parent chain
     """
     # Create temporary parent mapping with single DFS
-    parent_map = create_parent_mapping(semantic_tree)
+    if parent_map is None:
+        parent_map = create_parent_mapping(semantic_tree)
+
+    context_budget = ContextBudget(max_context_nodes) if max_context_nodes is not None else None
 
     def create_parent_chain(current_node: SemanticElementNode) -> Optional[ReverseTreeElementNode]:
         """Create parent chain using temporary mapping."""
@@ -83,10 +118,12 @@ def generate_reverse_tree(target_node: SemanticElementNode, semantic_tree: Seman
                     reverse_parent.add_content(ReverseTreeMarkerNode("_FOCUS_ELEMENT_"))
                 else:
                     # Add complete sibling subtree recursively
-                    sibling = convert_semantic_to_reverse_tree(child)
-                    reverse_parent.add_content(sibling)
+                    sibling = convert_semantic_to_reverse_tree(child, context_budget)
+                    if sibling is not None:
+                        reverse_parent.add_content(sibling)
             elif isinstance(child, SemanticTextNode):
-                reverse_parent.add_content(ReverseTreeTextNode(child.text))
+                if context_budget is None or context_budget.take():
+                    reverse_parent.add_content(ReverseTreeTextNode(child.text))
 
         # Recursively create grandparent chain
         grandparent = parent_map.get(current_parent.id)
@@ -104,11 +141,13 @@ def generate_reverse_tree(target_node: SemanticElementNode, semantic_tree: Seman
     # Add target's complete content tree
     for child in target_node.content:
         if isinstance(child, SemanticTextNode):
-            reverse_tree.add_content(ReverseTreeTextNode(child.text))
+            if context_budget is None or context_budget.take():
+                reverse_tree.add_content(ReverseTreeTextNode(child.text))
         elif isinstance(child, SemanticElementNode):
             # Convert complete child subtree
-            child_reverse = convert_semantic_to_reverse_tree(child)
-            reverse_tree.add_content(child_reverse)
+            child_reverse = convert_semantic_to_reverse_tree(child, context_budget)
+            if child_reverse is not None:
+                reverse_tree.add_content(child_reverse)
 
     # Create parent chain using temporary mapping
     reverse_tree.parent = create_parent_chain(target_node)
@@ -133,64 +172,169 @@ def create_embedding_from_text(text: str, embedder: Optional[Embedder] = None) -
     return embedder.create_embedding(text)
 
 
-def create_embeddings_from_semantic_tree(semantic_tree: SemanticElementNode, embedder: Optional[Embedder] = None) -> Tuple[Dict[str, List[float]], Dict[str, ReverseTreeElementNode]]:
+def select_elements_to_embed(semantic_tree: SemanticElementNode, policy: str = 'actionable') -> List[SemanticElementNode]:
     """
-    Create embeddings for all elements in a semantic tree.
+    Pick the elements an embedding policy embeds eagerly, in document order.
 
     Args:
         semantic_tree: Root of the semantic tree
-        embedder: Embedder instance to use. If None, creates a new one.
+        policy: 'all' or 'actionable'
 
     Returns:
-        Tuple of (embeddings_dict, reverse_trees_dict) mapping semantic_node_id to embedding vector and reverse tree node
+        List of SemanticElementNodes to embed
     """
-    if embedder is None:
-        embedder = Embedder()
+    if policy not in EMBEDDING_POLICIES:
+        raise ValueError(f"Unknown embedding policy '{policy}', expected one of {sorted(EMBEDDING_POLICIES)}")
 
-    embeddings = {}
-    reverse_trees = {}
-    total_nodes = 0
-    processed_nodes = 0
+    selected = []
 
-    # Count total nodes first
-    def count_nodes(node: SemanticElementNode):
-        nonlocal total_nodes
-        total_nodes += 1
+    def visit(node: SemanticElementNode):
+        if policy == 'all' or is_actionable_element(node.tag, node.attributes):
+            selected.append(node)
         for child in node.content:
             if isinstance(child, SemanticElementNode):
-                count_nodes(child)
+                visit(child)
 
-    count_nodes(semantic_tree)
-    print(f"🔍 Processing {total_nodes} elements for embedding generation...")
+    visit(semantic_tree)
+    return selected
 
-    def traverse_and_embed(node: SemanticElementNode):
-        """Recursively traverse tree and create embeddings."""
-        nonlocal processed_nodes
 
-        # Generate reverse tree for this node
-        reverse_tree = generate_reverse_tree(node, semantic_tree)
+def embed_semantic_elements(
+    nodes: List[SemanticElementNode],
+    semantic_tree: SemanticElementNode,
+    embedder: Embedder,
+    parent_map: Optional[Dict[str, Optional[SemanticElementNode]]] = None,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    max_context_nodes: Optional[int] = None,
+    keep_reverse_trees: bool = True
+) -> Tuple[Dict[str, List[float]], Dict[str, ReverseTreeElementNode]]:
+    """
+    Embed the reverse trees of the given elements, batching provider requests.
 
-        # Convert to text representation
-        text_representation = reverse_tree.to_text()
+    Args:
+        nodes: Elements to embed
+        semantic_tree: Root of the semantic tree the elements belong to
+        embedder: Embedder instance to use
+        parent_map: Precomputed parent mapping of the tree
+        batch_size: Number of texts per embedding request
+        max_context_nodes: Cap on context nodes per reverse tree (see generate_reverse_tree)
+        keep_reverse_trees: Return the reverse trees. When False each tree is
+            released as soon as its text is built and an empty dict is returned.
 
-        # Generate embedding
-        embedding_vector = create_embedding_from_text(text_representation, embedder)
+    Returns:
+        Tuple of (embeddings_dict, reverse_trees_dict) keyed by semantic node id
+    """
+    if parent_map is None:
+        parent_map = create_parent_mapping(semantic_tree)
 
-        # Store mappings
-        embeddings[node.id] = embedding_vector
-        reverse_trees[node.id] = reverse_tree
+    # Texts are written straight from the semantic tree; trees are built only to be returned
+    writer = ReverseTreeWriter()
+    embeddings = {}
+    reverse_trees = {}
+    for start in range(0, len(nodes), batch_size):
+        batch = nodes[start:start + batch_size]
+        texts = []
+        for node in batch:
+            texts.append(writer.write(node, parent_map, max_context_nodes))
+            if keep_reverse_trees:
+                reverse_trees[node.id] = generate_reverse_tree(node, semantic_tree, parent_map, max_context_nodes)
+        vectors = embedder.create_embeddings(texts)
+        for node, vector in zip(batch, vectors):
+            embeddings[node.id] = vector
+    return embeddings, reverse_trees
+
+
+async def aembed_semantic_elements(
+    nodes: List[SemanticElementNode],
+    semantic_tree: SemanticElementNode,
+    embedder: Embedder,
+    parent_map: Optional[Dict[str, Optional[SemanticElementNode]]] = None,
+    max_context_nodes: Optional[int] = None,
+    keep_reverse_trees: bool = True
+) -> Tuple[Dict[str, List[float]], Dict[str, ReverseTreeElementNode]]:
+    """
+    Async variant of embed_semantic_elements that embeds the elements as one batch.
 
-        processed_nodes += 1
-        if processed_nodes % 5 == 0 or processed_nodes == total_nodes:
-            print(f"✅ Generated {processed_nodes}/{total_nodes} embeddings")
+    Args:
+        nodes: Elements to embed
+        semantic_tree: Root of the semantic tree the elements belong to
+        embedder: Embedder instance to use
+        parent_map: Precomputed parent mapping of the tree
+        max_context_nodes: Cap on context nodes per reverse tree (see generate_reverse_tree)
+        keep_reverse_trees: Return the reverse trees (see embed_semantic_elements)
 
-        # Process children
-        for child in node.content:
-            if isinstance(child, SemanticElementNode):
-                traverse_and_embed(child)
+    Returns:
+        Tuple of (embeddings_dict, reverse_trees_dict) keyed by semantic node id
+    """
+    if parent_map is None:
+        parent_map = create_parent_mapping(semantic_tree)
 
-    # Start traversal from root
-    traverse_and_embed(semantic_tree)
+    writer = ReverseTreeWriter()
+    reverse_trees = {}
+    texts = []
+    for node in nodes:
+        texts.append(writer.write(node, parent_map, max_context_nodes))
+        if keep_reverse_trees:
+            reverse_trees[node.id] = generate_reverse_tree(node, semantic_tree, parent_map, max_context_nodes)
+    vectors = await embedder.acreate_embeddings(texts)
+    embeddings = {node.id: vector for node, vector in zip(nodes, vectors)}
+    return embeddings, reverse_trees
+
+
+def prioritize_elements(nodes: List[SemanticElementNode]) -> List[SemanticElementNode]:
+    """
+    Order elements so the ones an agent most likely acts on are embedded first.
+
+    Actionable elements come first, and within them and the rest, elements on
+    screen come first when capture reported geometry. Document order is kept
+    within each group.
+    """
+    return sorted(
+        nodes,
+        key=lambda node: (not is_actionable_element(node.tag, node.attributes), not node.in_viewport)
+    )
+
+
+def create_embeddings_from_semantic_tree(
+    semantic_tree: SemanticElementNode,
+    embedder: Optional[Embedder] = None,
+    policy: str = 'all',
+    keep_reverse_trees: bool = True
+) -> Tuple[Dict[str, List[float]], Dict[str, ReverseTreeElementNode]]:
+    """
+    Create embeddings for the elements of a semantic tree selected by an embedding policy.
+
+    Args:
+        semantic_tree: Root of the semantic tree
+        embedder: Embedder instance to use. If None, creates a new one.
+        policy: 'all' (default) embeds every element; 'actionable' embeds
+            interactive, role-bearing and labelled elements only
+        keep_reverse_trees: Return every reverse tree. Each holds a copy of its
+            element's context, so together they can dwarf the page; pass False
+            when only embeddings are needed.
+
+    Returns:
+        Tuple of (embeddings_dict, reverse_trees_dict) mapping semantic_node_id to embedding vector and reverse tree node
+    """
+    if embedder is None:
+        embedder = Embedder()
+
+    nodes = select_elements_to_embed(semantic_tree, policy)
+    parent_map = create_parent_mapping(semantic_tree)
+    total_elements = len(select_elements_to_embed(semantic_tree, 'all'))
+    total_nodes = len(nodes)
+    print(f"🔍 Processing {total_nodes} of {total_elements} elements for embedding generation...")
+
+    embeddings = {}
+    reverse_trees = {}
+    for start in range(0, total_nodes, EMBEDDING_BATCH_SIZE):
+        batch_embeddings, batch_trees = embed_semantic_elements(
+            nodes[start:start + EMBEDDING_BATCH_SIZE], semantic_tree, embedder, parent_map,
+            keep_reverse_trees=keep_reverse_trees
+        )
+        embeddings.update(batch_embeddings)
+        reverse_trees.update(batch_trees)
+        print(f"✅ Generated {len(embeddings)}/{total_nodes} embeddings")
 
     print(f"🎉 Completed embedding generation for {total_nodes} elements")
-    return embeddings, reverse_trees
\ No newline at end of file
+    return embeddings, reverse_trees
@@ -3,6 +3,29 @@ from dataclasses import dataclass
 import json
 
 
+# Prepended to every reverse tree's JSON in the texts that get embedded
+REVERSE_TREE_PROMPT = """This is a web element represented as a reverse tree structure for natural language web automation. The reverse tree places the target element at the root while preserving its hierarchical context through a parent chain.
+
+Structure explanation:
+- Root element: The target web element that can be interacted with
+- "content": Direct children and text content of the target element
+- "parent": Hierarchical chain showing containers and context
+- "_FOCUS_ELEMENT_": Marker showing where the target element (or its ancestor) sits among siblings at each level of the parent chain
+
+Use this structure to match natural language queries like:
+- "click the submit button"
+- "fill the email field in the login form"
+- "find the search button in the header"
+- "click the add to cart button for wireless headphones"
+
+The _FOCUS_ELEMENT_ markers trace the path from target to root, showing spatial relationships and context at each level.
+
+Match based on element semantics, text content, hierarchy, and spatial relationships.
+
+Element description:
+"""
+
+
 type ReverseTreeNode = Union['ReverseTreeElementNode', 'ReverseTreeTextNode', 'ReverseTreeMarkerNode']
 
 
@@ -66,27 +89,6 @@ class ReverseTreeElementNode:
     def to_text(self) -> str:
         """Convert reverse tree to prompt-enhanced text for embedding generation."""
 
-        prompt = """This is a web element represented as a reverse tree structure for natural language web automation. The reverse tree places the target element at the root while preserving its hierarchical context through a parent chain.
-
-Structure explanation:
-- Root element: The target web element that can be interacted with
-- "content": Direct children and text content of the target element
-- "parent": Hierarchical chain showing containers and context
-- "_FOCUS_ELEMENT_": Marker showing where the target element (or its ancestor) sits among siblings at each level of the parent chain
-
-Use this structure to match natural language queries like:
-- "click the submit button"
-- "fill the email field in the login form"
-- "find the search button in the header"
-- "click the add to cart button for wireless headphones"
-
-The _FOCUS_ELEMENT_ markers trace the path from target to root, showing spatial relationships and context at each level.
-
-Match based on element semantics, text content, hierarchy, and spatial relationships.
-
-Element description:
-"""
-
         reverse_tree_json = json.dumps(self.to_dict(), indent=2)
 
-        return prompt + reverse_tree_json
\ No newline at end of file
+        return REVERSE_TREE_PROMPT + reverse_tree_json
\ No newline at end of file
@@ -0,0 +1,224 @@
+from typing import Any, Dict, List, Optional, Tuple
+from json import dumps
+from json.encoder import encode_basestring_ascii
+from ...semantic_node import SemanticElementNode, SemanticTextNode
+from .reverse_tree_node import REVERSE_TREE_PROMPT
+
+
+class ContextBudget:
+    """Number of content/sibling nodes a reverse tree may still include."""
+
+    def __init__(self, max_nodes: int):
+        self.remaining = max_nodes
+
+    def take(self) -> bool:
+        """Consume one node; False once the budget is spent."""
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+# Slots of an element object besides "tag" and its attributes
+_CONTENT = object()
+_PARENT = object()
+_MISSING = object()
+_RESERVED_KEYS = frozenset(('tag', 'content', 'parent'))
+
+
+class ReverseTreeWriter:
+    """
+    Writes reverse-tree texts straight from the semantic tree.
+
+    The target's content, then each ancestor with its siblings and the focus
+    marker, are written into a buffer reused across calls, in the order the
+    context budget is spent, without building ReverseTreeElementNodes or
+    dicts. With indent=2 the text is identical to
+    `generate_reverse_tree(...).to_text()`; indent=None gives the compact
+    one-line layout of `json.dumps`, without the indentation that makes up
+    most of the text of deep trees.
+
+    Not thread-safe: use one writer per thread or task.
+    """
+
+    def __init__(self, indent: Optional[int] = 2, include_prompt: bool = True):
+        """
+        Args:
+            indent: JSON indentation as in json.dumps; None for a single line
+            include_prompt: Start texts with the reverse-tree prompt, as to_text does
+        """
+        self.indent = indent
+        self.include_prompt = include_prompt
+        self._parts: List[str] = []
+        self._newlines: List[str] = []
+        self._item_separator = ', ' if indent is None else ','
+
+    def write(
+        self,
+        target_node: SemanticElementNode,
+        parent_map: Dict[str, Optional[SemanticElementNode]],
+        max_context_nodes: Optional[int] = None
+    ) -> str:
+        """
+        Build the reverse-tree text of an element.
+
+        Args:
+            target_node: The element to write the reverse tree of
+            parent_map: Parent mapping of its semantic tree (see create_parent_mapping)
+            max_context_nodes: Cap on context nodes, as in generate_reverse_tree
+
+        Returns:
+            The reverse-tree text
+        """
+        parts = self._parts
+        parts.clear()
+        if self.include_prompt:
+            parts.append(REVERSE_TREE_PROMPT)
+        context_budget = ContextBudget(max_context_nodes) if max_context_nodes is not None else None
+        self._write_element(target_node, 0, context_budget, parent_map, None)
+        text = ''.join(parts)
+        parts.clear()
+        return text
+
+    def _newline(self, level: int) -> str:
+        """Line break and indentation before an item at this nesting level."""
+        if self.indent is None:
+            return ''
+        newlines = self._newlines
+        while len(newlines) <= level:
+            newlines.append('\n' + ' ' * (self.indent * len(newlines)))
+        return newlines[level]
+
+    def _write_element(
+        self,
+        node: SemanticElementNode,
+        level: int,
+        context_budget: Optional[ContextBudget],
+        parent_map: Optional[Dict[str, Optional[SemanticElementNode]]],
+        focus_child: Optional[SemanticElementNode]
+    ) -> None:
+        """
+        Write one element object.
+
+        The target and its ancestors are written with the parent map, which
+        adds their "parent"; an ancestor's focus_child (the element below it
+        on the way to the target) is written as the focus marker. Sibling and
+        content subtrees are written without a parent map.
+        """
+        inner = self._newline(level + 1)
+        separator = self._item_separator + inner
+        slots, parent_first = self._slots(node)
+
+        # The budget is spent on the content before the parent chain. When an
+        # attribute named "parent" puts the parent first, the content is written
+        # aside first and copied in at its slot.
+        content_written = None
+        if parent_first:
+            self._parts, parts = [], self._parts
+            content_written = self._write_content(node, level + 1, context_budget, parent_map, focus_child, separator)
+            self._parts, content_parts = parts, self._parts
+
+        parts = self._parts
+        append = parts.append
+        append('{')
+        append(inner)
+        for key, value in slots:
+            if key is not None:
+                self._write_value(key, value, separator)
+                continue
+            slot, fallback = value
+            if slot is _CONTENT and content_written is not None:
+                parts.extend(content_parts)
+                written = content_written
+            elif slot is _CONTENT:
+                written = self._write_content(node, level + 1, context_budget, parent_map, focus_child, separator)
+            else:
+                parent = parent_map.get(node.id) if parent_map is not None else None
+                written = bool(parent)
+                if written:
+                    append('"parent": ')
+                    self._write_element(parent, level + 1, context_budget, parent_map, node)
+                    append(separator)
+            if not written and fallback is not _MISSING:
+                self._write_value('content' if slot is _CONTENT else 'parent', fallback, separator)
+
+        # Drop the separator after the last slot ("tag" is always written)
+        parts[-1] = self._newline(level)
+        append('}')
+
+    def _write_value(self, key: str, value: Any, separator: str) -> None:
+        """Write a "key": value pair with a plain (attribute) value."""
+        append = self._parts.append
+        append(encode_basestring_ascii(key))
+        append(': ')
+        append(encode_basestring_ascii(value) if isinstance(value, str) else dumps(value))
+        append(separator)
+
+    def _write_content(
+        self,
+        node: SemanticElementNode,
+        level: int,
+        context_budget: Optional[ContextBudget],
+        parent_map: Optional[Dict[str, Optional[SemanticElementNode]]],
+        focus_child: Optional[SemanticElementNode],
+        separator: str
+    ) -> bool:
+        """Write the "content" slot; False (nothing written) if the budget leaves it empty."""
+        parts = self._parts
+        append = parts.append
+        inner = self._newline(level + 1)
+        item_separator = self._item_separator + inner
+        opened = False
+
+        for child in node.content:
+            if isinstance(child, SemanticElementNode):
+                if child is focus_child:
+                    item = '"_FOCUS_ELEMENT_"'
+                elif context_budget is None or context_budget.take():
+                    item = None
+                else:
+                    continue
+            elif isinstance(child, SemanticTextNode):
+                if context_budget is not None and not context_budget.take():
+                    continue
+                item = encode_basestring_ascii(child.text)
+            else:
+                continue
+
+            append(item_separator if opened else '"content": [' + inner)
+            opened = True
+            if item is None:
+                self._write_element(child, level + 1, context_budget, None, None)
+            else:
+                append(item)
+
+        if opened:
+            append(self._newline(level))
+            append(']')
+            append(separator)
+        return opened
+
+    @staticmethod
+    def _slots(node: SemanticElementNode) -> Tuple[List[Tuple[Optional[str], Any]], bool]:
+        """
+        Keys of the element object in order: (key, value) for "tag" and the
+        attributes, (None, (_CONTENT or _PARENT, fallback)) for the content
+        and parent slots, and whether the parent slot comes first.
+
+        As in to_dict, where later keys overwrite earlier ones, an attribute
+        named like a slot gives the slot its position and is written as the
+        fallback if the slot stays empty.
+        """
+        attributes = node.attributes
+        keys = [key for key, _ in attributes]
+        if _RESERVED_KEYS.isdisjoint(keys) and len(set(keys)) == len(keys):
+            return [('tag', node.tag), *attributes, (None, (_CONTENT, _MISSING)), (None, (_PARENT, _MISSING))], False
+
+        fields: Dict[str, Any] = {'tag': node.tag}
+        for key, value in attributes:
+            fields[key] = value
+        fields['content'] = (_CONTENT, fields.get('content', _MISSING))
+        fields['parent'] = (_PARENT, fields.get('parent', _MISSING))
+        order = list(fields)
+        slots = [(None, value) if key in ('content', 'parent') else (key, value) for key, value in fields.items()]
+        return slots, order.index('parent') < order.index('content')
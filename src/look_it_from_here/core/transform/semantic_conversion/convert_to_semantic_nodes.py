@@ -1,70 +1,99 @@
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, List
 from ...dom_node import DOMElementNode, DOMTextNode
-from ...semantic_node import SemanticElementNode, SemanticTextNode
-from ...constants import SEMANTIC_ATTRIBUTES, NON_SEMANTIC_ROLES
+from ...semantic_node import SemanticElementNode, SemanticTextNode, SemanticNode
+from ...constants import SEMANTIC_ATTRIBUTES, NON_SEMANTIC_ROLES, INTERACTIVE_ELEMENTS
 
 
-def convert_to_semantic_nodes_pass(node: DOMElementNode) -> Tuple[Optional[SemanticElementNode], Dict[str, str]]:
+def convert_to_semantic_tree(node: DOMElementNode) -> Tuple[Optional[SemanticElementNode], Dict[str, str]]:
     """
-    Convert DOMElementNode tree to SemanticElementNode tree.
-    Also creates a mapping from DOMElementNode IDs to SemanticElementNode IDs.
+    Convert a DOMElementNode tree to a SemanticElementNode tree in one post-order pass.
 
-    This pass handles:
-    - Applying tag-specific renderers
-    - Building the HTMLDisplayNode tree structure
-    - Creating ID mapping between trees
+    For each DOM element, once its children are converted:
+    - Elements with a non-semantic role are skipped with their subtree
+    - Attributes are filtered to the non-blank semantic ones
+    - Elements with no semantic attributes and no content are removed
+    - Elements with no semantic attributes and exactly one child are replaced
+      by that child (wrappers), unless they are interactive
+
+    DOM ids of collapsed wrappers are mapped to the semantic element that
+    survives in their place: the element they collapsed into, or, when they
+    collapsed into text, the nearest surviving ancestor holding that text.
+    Removed empty elements are left out of the mapping.
 
     Args:
-        node: HTMLTreeNode to render
+        node: DOMElementNode root to convert
 
     Returns:
-        Tuple of (HTMLDisplayNode tree, mapping of tree_node_id -> display_node_id)
+        Tuple of (semantic tree or None if nothing meaningful remains,
+        mapping of DOM element id -> semantic element id). Entries of
+        collapsed wrappers come before the entries of the DOM elements the
+        semantic elements were created from.
     """
-    # Mapping from HTMLTreeNode ID to HTMLDisplayNode ID
-    tree_to_display_mapping = {}
+    own_mapping: Dict[str, str] = {}
+    collapsed_mapping: Dict[str, str] = {}
 
     def filter_attributes(tree_node: DOMElementNode) -> list:
-        """Filter attributes to only include standardized semantic attributes."""
-        # Use semantic attributes from constants
-        semantic_attributes = SEMANTIC_ATTRIBUTES
-
-        # Filter attributes: only keep semantic ones
-        filtered_attributes = []
-        for key, value in tree_node.attributes.items():
-            # Keep attribute if it's in the semantic set and has a value
-            if key in semantic_attributes and value and value.strip():
-                filtered_attributes.append((key, value))
-
-        return filtered_attributes
-
-
-    def render_node_recursive(tree_node: DOMElementNode) -> Optional[SemanticElementNode]:
+        """Keep only standardized semantic attributes that have a value."""
+        return [
+            (key, value) for key, value in tree_node.attributes.items()
+            if key in SEMANTIC_ATTRIBUTES and value and value.strip()
+        ]
+
+    def convert(tree_node: DOMElementNode) -> Tuple[Optional[SemanticNode], List[str]]:
+        """
+        Returns the node standing for tree_node (None if removed) and the DOM
+        ids collapsed into text, which the nearest surviving ancestor adopts.
+        """
         # Skip elements with non-semantic roles (explicitly non-semantic)
         role = tree_node.attributes.get('role', '').lower()
         if role in NON_SEMANTIC_ROLES:
-            return None
+            return None, []
 
-        # Filter attributes based on semantic relevance
-        filtered_attributes = filter_attributes(tree_node)
-
-        # Create display node with tag and filtered attributes
-        display_node = SemanticElementNode(tag=tree_node.tag, attributes=filtered_attributes)
-
-        # Store the mapping
-        tree_to_display_mapping[tree_node.id] = display_node.id
-
-        # Process mixed children
+        attributes = filter_attributes(tree_node)
+        content: List[SemanticNode] = []
+        text_wrappers: List[str] = []
         for child in tree_node.children:
             if isinstance(child, DOMTextNode):
-                # Convert text node
-                display_node.add_child(SemanticTextNode(text=child.text))
+                content.append(SemanticTextNode(text=child.text))
             elif isinstance(child, DOMElementNode):
-                # Convert element node recursively
-                child_display = render_node_recursive(child)
-                if child_display:
-                    display_node.add_child(child_display)
-
-        return display_node
-
-    rendered_tree = render_node_recursive(node)
-    return rendered_tree, tree_to_display_mapping
\ No newline at end of file
+                converted, child_text_wrappers = convert(child)
+                if converted is not None:
+                    content.append(converted)
+                    text_wrappers.extend(child_text_wrappers)
+
+        # Empty elements like <div></div> with no semantic attributes
+        if not attributes and not content:
+            return None, []
+
+        # Wrappers without semantic value, but interactive elements are kept
+        if len(content) == 1 and not attributes and tree_node.tag.lower() not in INTERACTIVE_ELEMENTS:
+            only_child = content[0]
+            if isinstance(only_child, SemanticElementNode):
+                collapsed_mapping[tree_node.id] = only_child.id
+                return only_child, []
+            text_wrappers.append(tree_node.id)
+            return only_child, text_wrappers
+
+        semantic_node = SemanticElementNode(
+            tag=tree_node.tag,
+            attributes=attributes,
+            content=content,
+            bounds=tree_node.bounds,
+            in_viewport=tree_node.in_viewport,
+            dom_id=tree_node.id
+        )
+        own_mapping[tree_node.id] = semantic_node.id
+        for wrapper_id in text_wrappers:
+            collapsed_mapping[wrapper_id] = semantic_node.id
+        return semantic_node, []
+
+    semantic_tree, _ = convert(node)
+    # A root collapsed into text has no element to stand for the page
+    if not isinstance(semantic_tree, SemanticElementNode):
+        return None, {}
+
+    # Own entries last, so assigning WebElements entry by entry ends with the
+    # element each semantic node was created from
+    mapping = dict(collapsed_mapping)
+    mapping.update(own_mapping)
+    return semantic_tree, mapping
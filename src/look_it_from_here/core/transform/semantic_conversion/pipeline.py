@@ -1,34 +1,22 @@
 from typing import Dict, Tuple, Optional
 from ...dom_node import DOMElementNode
 from ...semantic_node import SemanticElementNode
-from .convert_to_semantic_nodes import convert_to_semantic_nodes_pass
-from .remove_meaningless_elements import remove_meaningless_elements_pass
+from .convert_to_semantic_nodes import convert_to_semantic_tree
 
 
 def create_semantic_tree(html_tree: DOMElementNode) -> Tuple[Optional[SemanticElementNode], Dict[str, str]]:
     """
     Create a semantic tree from an HTML tree.
-    Applies rendering, content filtering, and collapsing passes.
+    Filters attributes, removes empty elements and collapses meaningless
+    wrappers in a single pass (see convert_to_semantic_tree).
 
     Args:
-        html_tree: HTMLTreeNode root (must be non-None)
+        html_tree: DOMElementNode root (must be non-None)
 
     Returns:
         Tuple of (
-            Optional[HTMLDisplayNode] root with semantic roles,
-            Dict mapping tree node IDs to display node IDs
+            Optional[SemanticElementNode] root,
+            Dict mapping DOM node IDs to the IDs of the semantic elements standing for them
         )
     """
-    # Pass 1: Convert tree nodes to semantic nodes
-    semantic_tree, tree_to_semantic_mapping = convert_to_semantic_nodes_pass(html_tree)
-
-    if not semantic_tree:
-        return None, {}
-
-    # Pass 2: Remove meaningless elements (empty elements + single-child wrappers)
-    final_tree = remove_meaningless_elements_pass(semantic_tree)
-
-    if not final_tree:
-        return None, {}
-
-    return final_tree, tree_to_semantic_mapping
\ No newline at end of file
+    return convert_to_semantic_tree(html_tree)